@@ -1,7 +1,10 @@
+import os
 from pathlib import Path
 
 CURRENT_PATH = Path.cwd()
 HOME_PATH = Path.home()
-ROOT_PATH = HOME_PATH / "absorb/"
+ROOT_PATH = Path(os.environ.get("ABSORB_HOME", HOME_PATH / "absorb/"))
 REPO_PATH = ROOT_PATH
 LOGS_PATH = ROOT_PATH / "logs/"
+CACHE_PATH = ROOT_PATH / ".cache/"
+STATE_PATH = ROOT_PATH / ".state/"
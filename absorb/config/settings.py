@@ -0,0 +1,77 @@
+import json
+import os
+from typing import Any, Dict, Optional
+from . import paths
+
+CONFIG_FILE = "config.json"
+
+DEFAULTS: Dict[str, Any] = {
+    # json, journal or sqlite
+    "storage_backend": "json",
+    # Number of journal entries which triggers a compaction (journal backend).
+    "journal_max_entries": 10000,
+    # Keep a binary snapshot of each JSON file in the cache directory, loaded
+    # instead of parsing the file while it matches (json and journal backends).
+    "snapshot_cache": False,
+    # per-op, batch, on-exit or off
+    "commit_strategy": "per-op",
+    # Number of pending changes which triggers a batched commit.
+    "commit_batch_size": 20,
+    # Age (in seconds) of the oldest pending change which triggers a batched commit.
+    # It is checked by every absorb command; there is no timer in between.
+    "commit_batch_interval": 300,
+    # Columns of the kanban board, by status, in order.
+    "kanban_columns": ["completed", "doing", "planned"],
+    # Maximum number of cards of each status, e.g. {"doing": 3}.
+    "kanban_wip_limits": {},
+    # Size (in bytes) from which the log file is rotated.
+    "log_max_bytes": 1048576,
+    # Interval at which the log file is rotated instead (e.g. "midnight"), see
+    # logging.handlers.TimedRotatingFileHandler.
+    "log_rotate_when": "",
+    # Number of rotated, compressed log files kept.
+    "log_backup_count": 5,
+    # Share of the commands traced into logs/traces.jsonl, from 0 (none) to 1.
+    "trace_sample_rate": 0.0,
+}
+
+# Settings read from the config file, loaded on first use.
+_config = None  # type: Optional[Dict[str, Any]]
+
+
+def load_config() -> Dict[str, Any]:
+    """Loads the config file from the absorb directory.
+
+    :return: Settings from the config file, or an empty dict if it doesn't exist.
+    :rtype: Dict[str, Any]
+    """
+
+    global _config
+    if _config is None:
+        try:
+            with (paths.ROOT_PATH / CONFIG_FILE).open("r") as config_file:
+                _config = json.load(config_file)
+        except (OSError, ValueError):
+            _config = {}
+    return _config
+
+
+def get_setting(name: str) -> Any:
+    """Returns a setting. Environment variables (`ABSORB_<NAME>`) take
+    precedence over the config file, which takes precedence over the defaults.
+
+    :param name: Name of the setting.
+    :type name: str
+    :return: Value of the setting.
+    :rtype: Any
+    """
+
+    default = DEFAULTS[name]
+    env_value = os.environ.get("ABSORB_" + name.upper())
+    if env_value is not None:
+        if isinstance(default, bool):
+            return env_value.lower() in ("1", "true", "yes", "on")
+        if isinstance(default, (int, float, str)):
+            return type(default)(env_value)
+        return json.loads(env_value)
+    return load_config().get(name, default)
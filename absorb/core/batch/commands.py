@@ -0,0 +1,34 @@
+import click
+import shlex
+import sys
+import time
+from rich.console import Console
+from ...utils import batch_utils
+
+console = Console()
+
+
+@click.command()
+def batch() -> None:
+    """Runs absorb commands read from the standard input as one change."""
+
+    from ...main import cli
+
+    try:
+        operations = batch_utils.parse_operations(click.get_text_stream("stdin").read())
+    except ValueError as e:
+        console.print(f":cross_mark: {e}")
+        sys.exit(-1)
+
+    start = time.perf_counter()
+    failed = batch_utils.run_batch(cli, operations)
+    if failed is not None:
+        command = " ".join(shlex.quote(argument) for argument in operations[failed - 1])
+        console.print(
+            f":cross_mark: Operation {failed} (absorb {command}) failed, no changes were applied."
+        )
+        sys.exit(-1)
+
+    console.print(
+        f":white_check_mark: Ran {len(operations)} operations in {time.perf_counter() - start:.2f}s."
+    )
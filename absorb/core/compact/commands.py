@@ -0,0 +1,26 @@
+import click
+from rich.console import Console
+from ... import storage
+from ...utils import git_utils
+
+console = Console()
+
+
+@click.command()
+def compact() -> None:
+    """Folds the journals of the stores back into their snapshots."""
+
+    for name in storage.STORE_FILES:
+        store = storage.get_store(name)
+        try:
+            # Writers append to the journal under the lock of the store, so
+            # it is held until the journal is replaced.
+            with store.transaction():
+                if store.compact():
+                    git_utils.record(store.tracked_paths(), f"Compacted {name}.")
+                    console.print(f":white_check_mark: {name} has been compacted!")
+                else:
+                    console.print(f"{name}: nothing to compact.")
+        except FileNotFoundError:
+            # A store which was never used has nothing to compact.
+            console.print(f"{name}: nothing to compact.")
@@ -0,0 +1,73 @@
+import click
+import sys
+import time
+from json.decoder import JSONDecodeError
+from typing import Optional, Tuple
+from rich.console import Console
+from ...utils import log_utils, render_utils, search_utils
+
+console = Console()
+
+
+@click.command()
+@click.argument("terms", nargs=-1, required=True)
+@click.option(
+    "--store",
+    "store_names",
+    multiple=True,
+    type=click.Choice(search_utils.SEARCHED_STORES),
+    help="Only searches this store; can be repeated.",
+)
+@render_utils.paginated
+def find(
+    terms: Tuple[str, ...],
+    store_names: Tuple[str, ...],
+    limit: Optional[int],
+    offset: int,
+    page: Optional[int],
+) -> None:
+    """Searches the names and descriptions (including description files) of
+    tasks, cards and ideas, best matches first.
+
+    :param terms: Terms every result must contain.
+    :type terms: Tuple[str, ...]
+    :param store_names: Stores to search, every store by default.
+    :type store_names: Tuple[str, ...]
+    :param limit: Maximum number of results shown.
+    :type limit: Optional[int]
+    :param offset: Number of results skipped.
+    :type offset: int
+    :param page: Page shown, of `limit` results.
+    :type page: Optional[int]
+    :rtype: None
+    """
+
+    start = time.perf_counter()
+    index = search_utils.SearchIndex()
+    try:
+        index.refresh()
+        results = index.search(
+            " ".join(terms), store_names or search_utils.SEARCHED_STORES
+        )
+    except JSONDecodeError as e:
+        log_utils.get_logger().error(e)
+        console.print(
+            ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
+        )
+        sys.exit(-1)
+    finally:
+        index.close()
+    elapsed = time.perf_counter() - start
+
+    if not results:
+        console.print(f":mag: No matches ({elapsed * 1000:.0f}ms).")
+        return
+
+    rows = (
+        (store_name, record_id, name, f"{score:.2f}")
+        for store_name, record_id, name, score in render_utils.window(
+            results, limit, offset, page
+        )
+    )
+    render_utils.stream_table(("Store", "ID", "Name", "Score"), rows)
+    console.print(f":mag: {len(results)} matches ({elapsed * 1000:.0f}ms).")
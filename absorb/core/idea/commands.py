@@ -1,26 +1,29 @@
 import click
 import os
-import json
-import git
 from pathlib import Path
 from rich.console import Console
-from ...utils import idea_utils, log_utils
-from ...config.paths import ROOT_PATH, REPO_PATH
-
-
-repo = git.Repo.init(str(REPO_PATH))
-logger = log_utils.get_logger()
+from typing import Any, Dict, Optional, TextIO, Tuple
+from ... import storage
+from ...config import paths
+from ...utils import (
+    batch_utils,
+    filter_utils,
+    format_utils,
+    git_utils,
+    idea_utils,
+    import_utils,
+    log_utils,
+    render_utils,
+)
 
 console = Console()
 
-idea_path = ROOT_PATH / "ideas.json"
-
 
 @click.group()
 def idea() -> None:
     """The main click group for idea."""
 
-    pass
+    paths.ROOT_PATH.mkdir(parents=True, exist_ok=True)
 
 
 @idea.command()
@@ -44,43 +47,28 @@ def new(name: str, description: str, tags: str) -> None:
     extracted_tags = [word[1:] for word in words if word[0] == "@"]
 
     description = description.strip()
+    store = storage.get_store("ideas")
     try:
-        with idea_path.open("r") as ideas_file:
-            ideas_json = json.load(ideas_file)
-            card_id = len(list(ideas_json)) + 1
-            if description == "+file":
-                description_file_name = input("Enter file path to load description: ")
-                content = {
-                    "id": ("#" + str(card_id)),
-                    "name": name,
-                    "description": os.fspath(Path(description_file_name)),
-                    "tags": extracted_tags,
-                }
-            else:
-                content = {
-                    "id": ("#" + str(card_id)),
-                    "name": name,
-                    "description": description,
-                    "tags": extracted_tags,
-                }
+        store.load()
+        if description == "+file":
+            description_file_name = input("Enter file path to load description: ")
+            description = os.fspath(Path(description_file_name))
 
-            ideas_json.append(content)
+        with store.transaction():
+            store.add(storage.Idea(name, description, extracted_tags).to_record())
 
-            with idea_path.open("w") as ideas_file:
-                json.dump(ideas_json, ideas_file)
+            if store.save():
                 console.print(
                     f':white_check_mark: "{name}" has been added to the list!'
                 )
-
-            repo.index.add([str(REPO_PATH / "ideas.json")])
-            repo.index.commit(f'Added idea "{name}"')
+                git_utils.record(store.tracked_paths(), f'Added idea "{name}"')
     except FileNotFoundError as e:
-        with idea_path.open("a") as ideas_file:
-            ideas_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
 
 
 @idea.command()
@@ -106,86 +94,197 @@ def edit(id: str, name: str, description: str, tags: str) -> None:
     words = tags.split(" ")
     extracted_tags = [word[1:] for word in words if word[0] == "@"]
 
+    store = storage.get_store("ideas")
     try:
-        with idea_path.open("r") as idea_file:
-            idea_json = json.load(idea_file)
-            filtered_idea = idea_json
-
-            for card in filtered_idea:
-                if card["id"] == id:
-                    if name.strip() != ".":
-                        card["name"] = name
-
-                    if description.strip() == "+file":
-                        description_file_name = input(
-                            "Enter file path to load description: "
-                        )
-
-                        card["description"] = os.fspath(Path(description_file_name))
-                    else:
-                        if description != ".":
-                            card["description"] = description
-
-                    if tags.strip() != ".":
-                        card["tags"] = extracted_tags
-
-            with idea_path.open("w") as idea_file:
-                json.dump(filtered_idea, idea_file)
-                console.print(
-                    f":white_check_mark: Card {id} has been modified in the idea!"
-                )
-                repo.index.add([str(idea_path)])
-                repo.index.commit(f"Modified Card {id} in the idea board.")
-                console.print(
-                    f":white_check_mark: Card {id} has been modified in the git repository!"
-                )
+        if store.get(id) is not None:
+            changes = {}
+            if name.strip() != ".":
+                changes["name"] = name
+
+            if description.strip() == "+file":
+                description_file_name = input("Enter file path to load description: ")
+
+                changes["description"] = os.fspath(Path(description_file_name))
+            else:
+                if description != ".":
+                    changes["description"] = description
+
+            if tags.strip() != ".":
+                changes["tags"] = extracted_tags
+
+            # The description prompt is answered before taking the lock.
+            with store.transaction():
+                store.update(id, changes)
+
+                if store.save():
+                    console.print(
+                        f":white_check_mark: Card {id} has been modified in the idea!"
+                    )
+                    git_utils.record(
+                        store.tracked_paths(),
+                        f"Modified Card {id} in the idea board.",
+                    )
+                    console.print(
+                        f":white_check_mark: Card {id} has been modified in the git repository!"
+                    )
+        else:
+            batch_utils.fail(f"Idea {id} doesn't exist.")
 
     except FileNotFoundError as e:
-        with idea_path.open("a") as idea_file:
-            idea_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
 
 
 @idea.command()
-@click.argument("id")
-def open(id: str) -> None:
-    """Opens an idea present in ideas.json.
-
-    :param id: ID of the idea.
-    :type id: str
+@click.argument("ids", nargs=-1, required=True)
+@click.option(
+    "--lines",
+    type=click.IntRange(min=1),
+    help="Only shows the first lines of description files.",
+)
+@format_utils.formatted("ideas", ("description_text",))
+def open(
+    ids: Tuple[str, ...],
+    lines: Optional[int],
+    output_format: str,
+    fields: Tuple[str, ...],
+) -> None:
+    """Opens ideas present in ideas.json.
+
+    :param ids: IDs of the ideas.
+    :type ids: Tuple[str, ...]
+    :param lines: Number of lines shown from each description file.
+    :type lines: Optional[int]
+    :param output_format: `table` (the ideas as text), `json`, `ndjson` or
+        `csv`.
+    :type output_format: str
+    :param fields: Fields output by the formats other than `table`.
+    :type fields: Tuple[str, ...]
     :rtype: None
     """
 
+    store = storage.get_store("ideas")
     try:
-        with idea_path.open("r") as idea_file:
-            idea_content = json.load(idea_file)
-            filtered_ideas = []
-            for idea in idea_content:
-                if idea["id"] == id:
-                    filtered_ideas.append(idea)
-            idea_utils.open_idea(filtered_ideas)
+        found_ideas = [store.get(id) for id in ids]
+        found_ideas = [found_idea for found_idea in found_ideas if found_idea]
+        if output_format == "table":
+            idea_utils.open_idea(found_ideas, lines)
+        else:
+            format_utils.write_records(found_ideas, output_format, fields, lines)
     except FileNotFoundError as e:
-        logger.error(e)
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
 
 
 @idea.command()
-def show() -> None:
-    """Shows all ideas present in ideas.json."""
+@click.option(
+    "--tag",
+    "tags",
+    multiple=True,
+    help="Only shows the ideas with this tag; can be repeated.",
+)
+@click.option(
+    "--any", "any_tag", is_flag=True, help="Shows the ideas with any of the tags."
+)
+@render_utils.paginated
+@format_utils.formatted("ideas")
+def show(
+    tags: Tuple[str, ...],
+    any_tag: bool,
+    limit: Optional[int],
+    offset: int,
+    page: Optional[int],
+    output_format: str,
+    fields: Tuple[str, ...],
+) -> None:
+    """Shows all ideas present in ideas.json, or a page of them.
+
+    :param tags: Tags the ideas must have (every one, or any with `any_tag`).
+    :type tags: Tuple[str, ...]
+    :param any_tag: Show the ideas with any of the tags.
+    :type any_tag: bool
+    :param limit: Maximum number of ideas shown.
+    :type limit: Optional[int]
+    :param offset: Number of ideas skipped.
+    :type offset: int
+    :param page: Page shown, of `limit` ideas.
+    :type page: Optional[int]
+    :param output_format: `table`, `json`, `ndjson` or `csv`.
+    :type output_format: str
+    :param fields: Fields output by the formats other than `table`.
+    :type fields: Tuple[str, ...]
+    :rtype: None
+    """
 
+    store = storage.get_store("ideas")
     try:
-        with idea_path.open("r") as ideas_file:
-            idea_content = json.load(ideas_file)
-            idea_utils.parse_ideas(idea_content)
+        tag_list = filter_utils.tag_list(tags)
+        records = (
+            store.find_tags(tag_list, match_all=not any_tag)
+            if tag_list
+            else store.all()
+        )
+        records = render_utils.window(records, limit, offset, page)
+        if output_format == "table":
+            idea_utils.parse_ideas(records)
+        else:
+            format_utils.write_records(records, output_format, fields)
     except FileNotFoundError as e:
-        with idea_path.open("a") as idea_file:
-            idea_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
+
+
+def build_idea(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds an idea from an imported row. An invalid row raises `ValueError`.
+
+    :param row: The imported row.
+    :type row: Dict[str, Any]
+    :return: The idea, without an ID.
+    :rtype: Dict[str, Any]
+    """
+
+    idea = storage.Idea(
+        import_utils.required(row, "name"),
+        str(row.get("description") or "."),
+        import_utils.split_tags(row.get("tags")),
+    )
+    return idea.to_record()
+
+
+@idea.command("import")
+@click.argument("source", type=click.File("r"), default="-")
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(import_utils.FORMATS),
+    help="Format of the source, guessed from its extension by default.",
+)
+def import_ideas(source: TextIO, file_format: Optional[str]) -> None:
+    """Imports ideas from a CSV or JSON Lines file (or standard input), with
+    the fields of `new`, as a single commit.
+
+    :param source: The file to import, `-` for standard input.
+    :type source: TextIO
+    :param file_format: `csv` or `jsonl`.
+    :type file_format: Optional[str]
+    :rtype: None
+    """
+
+    file_format = file_format or import_utils.guess_format(source.name)
+    import_utils.import_rows(
+        storage.get_store("ideas"),
+        import_utils.read_rows(source, file_format),
+        build_idea,
+        "ideas",
+    )
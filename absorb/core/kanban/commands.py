@@ -1,24 +1,29 @@
 from pathlib import Path
-from ...utils import kanban_utils, log_utils
-from ...config.paths import ROOT_PATH, REPO_PATH
+from typing import Any, Dict, Optional, TextIO, Tuple
+from ... import storage
+from ...utils import (
+    batch_utils,
+    filter_utils,
+    format_utils,
+    git_utils,
+    import_utils,
+    kanban_utils,
+    log_utils,
+    render_utils,
+)
+from ...config import paths
 import click
 from rich.console import Console
-import json
-import git
 import os
 
-repo = git.Repo.init(str(REPO_PATH))
-logger = log_utils.get_logger()
-
 console = Console()
 
-kanban_path = ROOT_PATH / "kanban.json"
-
 
 @click.group()
 def kanban() -> None:
     """Creates the main click group for kanban boards."""
-    pass
+
+    paths.ROOT_PATH.mkdir(parents=True, exist_ok=True)
 
 
 @kanban.command()
@@ -44,75 +49,79 @@ def add(name: str, status: str, description: str, tags: str) -> None:
     extracted_tags = [word[1:] for word in words if word[0] == "@"]
 
     description = description.strip()
+    store = storage.get_store("kanban")
     try:
-        with kanban_path.open("r") as kanban_file:
-            kanban_json = json.load(kanban_file)
+        store.load()
+        if description == "+file":
+            description_file_name = input("Enter file path to load description: ")
+            description = os.fspath(Path(description_file_name))
 
-            card_id = len(list(kanban_json)) + 1
-            if description == "+file":
-                description_file_name = input("Enter file path to load description: ")
-                content = {
-                    "id": ("#" + str(card_id)),
-                    "name": name,
-                    "status": status.lower(),
-                    "description": os.fspath(Path(description_file_name)),
-                    "tags": extracted_tags,
-                }
-            else:
-                content = {
-                    "id": ("#" + str(card_id)),
-                    "name": name,
-                    "status": status.lower(),
-                    "description": description,
-                    "tags": extracted_tags,
-                }
-            kanban_json.append(content)
-
-            with kanban_path.open("w") as kanban_file:
-                json.dump(kanban_json, kanban_file)
+        with store.transaction():
+            card = storage.Card(name, status.lower(), description, extracted_tags)
+            store.add(card.to_record())
+
+            if store.save():
                 console.print(
                     f':white_check_mark: "{name}" has been added to the board!'
                 )
+                git_utils.record(
+                    store.tracked_paths(), f'Added card "{name}" to the kanban board.'
+                )
     except FileNotFoundError as e:
-        with kanban_path.open("a") as kanban_file:
-            kanban_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
 
 
 @kanban.command()
-@click.argument("id")
-def delete(id: str) -> None:
-    """Deletes a card from the kanban board.
-
-    :param id: ID of the card.
+@click.argument("id", default=".")
+@click.option("--tag", help="Deletes the cards with this tag.")
+@click.option("--status", help="Deletes the cards with this status.")
+@click.option("--dry-run", is_flag=True, help="Only shows the matching cards.")
+def delete(id: str, tag: Optional[str], status: Optional[str], dry_run: bool) -> None:
+    """Deletes a card from the kanban board. Without an ID, every card
+    matching the filters is deleted, in a single commit.
+
+    :param id: ID of the card, or `.` to use the filters.
     :type id: str
+    :param tag: Tag of the cards to delete.
+    :type tag: Optional[str]
+    :param status: Status of the cards to delete.
+    :type status: Optional[str]
+    :param dry_run: Only show the matching cards.
+    :type dry_run: bool
     :rtype: None
     """
 
+    filters = filter_utils.selection_filters(id, tag=tag, status=status)
+
+    store = storage.get_store("kanban")
     try:
-        kanban_json = None
-        with kanban_path.open("r") as kanban_file:
-            kanban_json = json.load(kanban_file)
-
-        filtered_kanban = [card for card in kanban_json if card["id"] != id]
-
-        try:
-            with kanban_path.open("w") as kanban_file:
-                json.dump(filtered_kanban, kanban_file)
-        except FileNotFoundError as e:
-            logger.error(e)
-            console.print(
-                ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
-            )
+        with store.transaction():
+            matched = store.select(id, **filters)
+            if dry_run:
+                filter_utils.report_matches(matched, "cards")
+                return
+            filter_utils.require_matches(id, matched, "Card", "cards")
+
+            for card in matched:
+                store.delete(card["id"])
+
+            if store.save():
+                target = filter_utils.describe(id, matched, "Card", "cards")
+                git_utils.record(
+                    store.tracked_paths(), f"Deleted {target} from the kanban board."
+                )
 
     except FileNotFoundError as e:
-        logger.error(e)
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
 
 
 @kanban.command()
@@ -137,101 +146,236 @@ def edit(id: str, name: str, description: str, tags: str) -> None:
     words = tags.split(" ")
     extracted_tags = [word[1:] for word in words if word[0] == "@"]
 
+    store = storage.get_store("kanban")
     try:
-        with kanban_path.open("r") as kanban_file:
-            kanban_json = json.load(kanban_file)
-            filtered_kanban = kanban_json
-
-            for card in filtered_kanban:
-                if card["id"] == id:
-                    if name.strip() != ".":
-                        card["name"] = name
-
-                    if description.strip() == "+file":
-                        description_file_name = input(
-                            "Enter file path to load description: "
-                        )
-
-                        card["description"] = os.fspath(Path(description_file_name))
-                    else:
-                        if description != ".":
-                            card["description"] = description
-
-                    if tags.strip() != ".":
-                        card["tags"] = extracted_tags
-
-            with kanban_path.open("w") as kanban_file:
-                json.dump(filtered_kanban, kanban_file)
-                console.print(
-                    f":white_check_mark: Card {id} has been modified in the kanban!"
-                )
-                repo.index.add([str(kanban_path)])
-                repo.index.commit(f"Modified Card {id} in the kanban board.")
-                console.print(
-                    f":white_check_mark: Card {id} has been modified in the git repository!"
-                )
+        if store.get(id) is not None:
+            changes = {}
+            if name.strip() != ".":
+                changes["name"] = name
+
+            if description.strip() == "+file":
+                description_file_name = input("Enter file path to load description: ")
+
+                changes["description"] = os.fspath(Path(description_file_name))
+            else:
+                if description != ".":
+                    changes["description"] = description
+
+            if tags.strip() != ".":
+                changes["tags"] = extracted_tags
+
+            # The description prompt is answered before taking the lock.
+            with store.transaction():
+                store.update(id, changes)
+
+                if store.save():
+                    console.print(
+                        f":white_check_mark: Card {id} has been modified in the kanban!"
+                    )
+                    git_utils.record(
+                        store.tracked_paths(),
+                        f"Modified Card {id} in the kanban board.",
+                    )
+                    console.print(
+                        f":white_check_mark: Card {id} has been modified in the git repository!"
+                    )
+        else:
+            batch_utils.fail(f"Card {id} doesn't exist.")
 
     except FileNotFoundError as e:
-        with kanban_path.open("a") as kanban_file:
-            kanban_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
 
 
 @kanban.command()
 @click.argument("id")
 @click.argument("new_status")
-def move_card(id: str, new_status: str) -> None:
-    """Moves a card to the specified status.
-
-    :param id: ID of the card.
+@click.option("--tag", help='With the ID ".", moves the cards with this tag.')
+@click.option("--status", help='With the ID ".", moves the cards with this status.')
+@click.option("--dry-run", is_flag=True, help="Only shows the matching cards.")
+def move_card(
+    id: str,
+    new_status: str,
+    tag: Optional[str],
+    status: Optional[str],
+    dry_run: bool,
+) -> None:
+    """Moves a card to the specified status. With the ID `.`, every card
+    matching the filters is moved, in a single commit.
+
+    :param id: ID of the card, or `.` to use the filters.
     :type id: str
     :param new_status: The new status to which the card should be moved to.
     :type new_status: str
+    :param tag: Tag of the cards to move.
+    :type tag: Optional[str]
+    :param status: Status of the cards to move.
+    :type status: Optional[str]
+    :param dry_run: Only show the matching cards.
+    :type dry_run: bool
     :rtype: None
     """
 
+    filters = filter_utils.selection_filters(id, tag=tag, status=status)
+
+    store = storage.get_store("kanban")
     try:
-        kanban_json = None
-        with kanban_path.open("r") as kanban_file:
-            kanban_json = json.load(kanban_file)
-
-        filtered_kanban = kanban_json
-
-        for task in filtered_kanban:
-            if task["id"] == id:
-                task["status"] = new_status
-
-        try:
-            with kanban_path.open("w") as kanban_file:
-                json.dump(filtered_kanban, kanban_file)
-        except FileNotFoundError as e:
-            logger.error(e)
-            console.print(
-                ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
-            )
+        with store.transaction():
+            matched = store.select(id, **filters)
+            if dry_run:
+                filter_utils.report_matches(matched, "cards")
+                return
+            filter_utils.require_matches(id, matched, "Card", "cards")
+
+            for card in matched:
+                store.update(card["id"], {"status": new_status})
+
+            if store.save():
+                target = filter_utils.describe(id, matched, "Card", "cards")
+                git_utils.record(
+                    store.tracked_paths(),
+                    f"Moved {target} to {new_status} in the kanban board.",
+                )
 
     except FileNotFoundError as e:
-        logger.error(e)
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
 
 
 @kanban.command()
-def show() -> None:
-    """Shows the kanban board."""
+@click.option(
+    "--tag",
+    "tags",
+    multiple=True,
+    help="Only shows the cards with this tag; can be repeated.",
+)
+@click.option(
+    "--any", "any_tag", is_flag=True, help="Shows the cards with any of the tags."
+)
+@click.option(
+    "--lines",
+    type=click.IntRange(min=1),
+    help="Only shows the first lines of description files.",
+)
+@click.option(
+    "--max-cards",
+    type=click.IntRange(min=0),
+    help="Shows at most this many cards in each column, then how many are left.",
+)
+@render_utils.paginated
+@format_utils.formatted("kanban")
+def show(
+    tags: Tuple[str, ...],
+    any_tag: bool,
+    lines: Optional[int],
+    max_cards: Optional[int],
+    limit: Optional[int],
+    offset: int,
+    page: Optional[int],
+    output_format: str,
+    fields: Tuple[str, ...],
+) -> None:
+    """Shows the kanban board, or a page of it. Pages are taken in each
+    column. The columns are set by the kanban_columns setting; cards with
+    other statuses are shown in extra columns. Formats other than `table`
+    output the cards in stored order, and take pages over all of them.
+
+    :param tags: Tags the cards must have (every one, or any with `any_tag`).
+    :type tags: Tuple[str, ...]
+    :param any_tag: Show the cards with any of the tags.
+    :type any_tag: bool
+    :param lines: Number of lines shown from each description file.
+    :type lines: Optional[int]
+    :param max_cards: Maximum number of cards shown in each column, followed
+        by the number of cards left out.
+    :type max_cards: Optional[int]
+    :param limit: Maximum number of cards shown in each column.
+    :type limit: Optional[int]
+    :param offset: Number of cards skipped in each column.
+    :type offset: int
+    :param page: Page shown, of `limit` cards in each column.
+    :type page: Optional[int]
+    :param output_format: `table`, `json`, `ndjson` or `csv`.
+    :type output_format: str
+    :param fields: Fields output by the formats other than `table`.
+    :type fields: Tuple[str, ...]
+    :rtype: None
+    """
 
+    store = storage.get_store("kanban")
     try:
-        with kanban_path.open("r") as kanban_file:
-            kanban_content = json.load(kanban_file)
-            kanban_utils.parse_kanban(kanban_content)
+        tag_list = filter_utils.tag_list(tags)
+        records = (
+            store.find_tags(tag_list, match_all=not any_tag)
+            if tag_list
+            else store.all()
+        )
+        if output_format == "table":
+            kanban_utils.parse_kanban(records, limit, offset, page, lines, max_cards)
+        else:
+            format_utils.write_records(
+                render_utils.window(records, limit, offset, page),
+                output_format,
+                fields,
+                lines,
+            )
     except FileNotFoundError as e:
-        with kanban_path.open("a") as kanban_file:
-            kanban_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
+
+
+def build_card(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds a card from an imported row. An invalid row raises `ValueError`.
+
+    :param row: The imported row.
+    :type row: Dict[str, Any]
+    :return: The card, without an ID.
+    :rtype: Dict[str, Any]
+    """
+
+    card = storage.Card(
+        import_utils.required(row, "name"),
+        import_utils.required(row, "status").lower(),
+        str(row.get("description") or "."),
+        import_utils.split_tags(row.get("tags")),
+    )
+    return card.to_record()
+
+
+@kanban.command("import")
+@click.argument("source", type=click.File("r"), default="-")
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(import_utils.FORMATS),
+    help="Format of the source, guessed from its extension by default.",
+)
+def import_cards(source: TextIO, file_format: Optional[str]) -> None:
+    """Imports cards from a CSV or JSON Lines file (or standard input), with
+    the fields of `add`, as a single commit.
+
+    :param source: The file to import, `-` for standard input.
+    :type source: TextIO
+    :param file_format: `csv` or `jsonl`.
+    :type file_format: Optional[str]
+    :rtype: None
+    """
+
+    file_format = file_format or import_utils.guess_format(source.name)
+    import_utils.import_rows(
+        storage.get_store("kanban"),
+        import_utils.read_rows(source, file_format),
+        build_card,
+        "cards",
+    )
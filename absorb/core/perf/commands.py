@@ -0,0 +1,63 @@
+import click
+from typing import Optional
+from rich.console import Console
+from ...utils import render_utils, trace_utils
+
+console = Console()
+
+# Percentiles reported for each phase.
+PERCENTILES = (50, 95, 99)
+
+
+@click.group()
+def perf() -> None:
+    """Reports the timings recorded in the trace file."""
+
+
+@perf.command()
+@click.option("--command", "command_name", help="Only reports this command.")
+def report(command_name: Optional[str]) -> None:
+    """Shows the p50, p95 and p99 durations of each command, and of each phase
+    of the commands, from the traces recorded with trace_sample_rate.
+
+    :param command_name: Command to report, e.g. `tasks add`; every command by
+        default.
+    :type command_name: Optional[str]
+    :rtype: None
+    """
+
+    traces = trace_utils.read_traces()
+    if command_name is not None:
+        traces = (trace for trace in traces if trace.get("command") == command_name)
+    durations = trace_utils.phase_durations(traces)
+    if not durations:
+        console.print(
+            ":information: No traces recorded. Set trace_sample_rate (e.g. "
+            "ABSORB_TRACE_SAMPLE_RATE=1) to record them."
+        )
+        return
+
+    rows = []
+    for (command, phase), values in sorted(
+        durations.items(), key=lambda item: (item[0][0], item[0][1] != "total")
+    ):
+        rows.append(
+            (
+                command or "absorb",
+                phase,
+                str(len(values)),
+                *(
+                    f"{trace_utils.percentile(values, rank):.1f}"
+                    for rank in PERCENTILES
+                ),
+            )
+        )
+    render_utils.stream_table(
+        (
+            "Command",
+            "Phase",
+            "Count",
+            *(f"p{rank} (ms)" for rank in PERCENTILES),
+        ),
+        rows,
+    )
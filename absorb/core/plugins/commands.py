@@ -0,0 +1,52 @@
+import click
+from rich.console import Console
+from rich.table import Table
+from ...utils import plugin_utils
+
+console = Console()
+
+
+@click.command()
+@click.option(
+    "--timings", is_flag=True, help="Import every plugin and report its load time."
+)
+@click.option("--refresh", is_flag=True, help="Rescan the environment for plugins.")
+def plugins(timings: bool, refresh: bool) -> None:
+    """Lists the installed plugins.
+
+    :param timings: Import every plugin and report its load time.
+    :type timings: bool
+    :param refresh: Rescan the environment for plugins.
+    :type refresh: bool
+    :rtype: None
+    """
+
+    discovered = plugin_utils.discover_plugins(refresh=refresh)
+    if not discovered:
+        console.print("No plugins installed.")
+        return
+
+    load_times = plugin_utils.time_plugins() if timings else {}
+
+    plugins_table = Table(show_header=True, header_style="bold")
+    plugins_table.add_column("Plugin")
+    plugins_table.add_column("Entry Point")
+    if timings:
+        plugins_table.add_column("Load Time", justify="right")
+
+    for name, plugin in sorted(discovered.items()):
+        if timings:
+            load_time = load_times[name]
+            plugins_table.add_row(
+                name,
+                plugin["value"],
+                (
+                    "[bold red]failed[/bold red]"
+                    if load_time < 0
+                    else f"{load_time:.1f} ms"
+                ),
+            )
+        else:
+            plugins_table.add_row(name, plugin["value"])
+
+    console.print(plugins_table)
@@ -0,0 +1,47 @@
+import click
+import sys
+from datetime import datetime
+from rich.console import Console
+from ...config import settings
+from ...utils import git_utils
+
+console = Console()
+
+
+@click.command()
+@click.option(
+    "--flush", is_flag=True, help="Commit every pending and queued change now."
+)
+def status(flush: bool) -> None:
+    """Shows the state of the git versioning of the workspace.
+
+    :param flush: Commit every pending and queued change now.
+    :type flush: bool
+    :rtype: None
+    """
+
+    if flush:
+        git_utils.flush_pending()
+        git_utils.drain_queue()
+
+    worker_status = git_utils.read_status()
+    last_commit = worker_status["last_commit"]
+
+    console.print(f"Commit strategy: {settings.get_setting('commit_strategy')}")
+    console.print(f"Batched changes: {len(git_utils.read_pending()['changes'])}")
+    console.print(f"Queued commits: {len(git_utils.read_queue())}")
+    if last_commit is not None:
+        console.print(
+            "Last background commit: "
+            + datetime.fromtimestamp(last_commit).strftime("%b %d, %Y at %I:%M%p")
+        )
+
+    failure = worker_status["failure"]
+    if failure is not None:
+        failed_at = datetime.fromtimestamp(failure["time"]).strftime(
+            "%b %d, %Y at %I:%M%p"
+        )
+        console.print(
+            f':cross_mark: Background commit "{failure["message"]}" failed on {failed_at}: {failure["error"]}'
+        )
+        sys.exit(-1)
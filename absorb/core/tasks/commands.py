@@ -1,29 +1,35 @@
 import click
 import json
-import git
 import sys
 from json.decoder import JSONDecodeError
 from datetime import datetime, timedelta
 from rich.console import Console
-from typing import Any, TextIO
-from ...config.paths import ROOT_PATH, REPO_PATH
-from ...utils import tasks_utils, log_utils
-
-repo = git.Repo.init(str(REPO_PATH))
-logger = log_utils.get_logger()
+from typing import Any, Dict, Iterable, Optional, TextIO, Tuple
+from ... import storage
+from ...config import paths
+from ...utils import (
+    batch_utils,
+    date_utils,
+    filter_utils,
+    format_utils,
+    git_utils,
+    import_utils,
+    tasks_utils,
+    log_utils,
+    render_utils,
+)
 
 console = Console()
 
-tasks_path = ROOT_PATH / "tasks.json"
-
 
 @click.group()
 def tasks() -> None:
     """The main click group for tasks."""
-    pass
 
+    paths.ROOT_PATH.mkdir(parents=True, exist_ok=True)
 
-def parse_date(date_str: str, *args: str) -> datetime:
+
+def parse_date(date_str: str, *args: str, strict: bool = False) -> datetime:
     """Parses a date string and returns a datetime object after parsing the
     date string. The date string might contain some values which tells the
     function to shift the date by a particular period.
@@ -32,6 +38,10 @@ def parse_date(date_str: str, *args: str) -> datetime:
     :type date_str: str
     :param args: Optional arguments.
     :type args: str
+    :param strict: Raise on an invalid date string instead of falling back to
+        the current date.
+    :type strict: bool
+    :raises ValueError: If `strict` is set and the date string is invalid.
     :return: Datetime object.
     :rtype: datetime
     """
@@ -56,7 +66,7 @@ def parse_date(date_str: str, *args: str) -> datetime:
 
         if len(args) > 0:
             task_due_str = args[0]
-            task_due_date = datetime.strptime(task_due_str, "%Y-%m-%d %H:%M:%S.%f")
+            task_due_date = date_utils.parse_stored(task_due_str)
             shifted_date = task_due_date + timedelta(
                 days=float(days_filtered),
                 hours=float(hours_filtered),
@@ -74,23 +84,41 @@ def parse_date(date_str: str, *args: str) -> datetime:
         return shifted_date
     if len(date_str) > 1:
         try:
-            task_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S.%f")
+            task_date = date_utils.parse_stored(date_str)
             return task_date
         except ValueError as e:
-            logger.warning("Date string provided: " + date_str)
-            logger.error(e)
+            if strict:
+                raise
+            log_utils.get_logger().warning("Date string provided: " + date_str)
+            log_utils.get_logger().error(e)
             console.print(
                 ":cross_mark: Invalid date string provided. Continued with current date as the due date. Check the logs in the home directory to know more."
             )
             return datetime.now()
     else:
-        logger.warning("Date string provided: " + date_str)
+        if strict:
+            raise ValueError(f'Invalid date string "{date_str}".')
+        log_utils.get_logger().warning("Date string provided: " + date_str)
         console.print(
             ":cross_mark: Invalid date string provided. Continued with current date as the due date. Check the logs in the home directory to know more."
         )
         return datetime.now()
 
 
+def report_corrupted_file(error: JSONDecodeError) -> None:
+    """Logs and reports a tasks file which couldn't be decoded.
+
+    :param error: The decoding error.
+    :type error: JSONDecodeError
+    :rtype: None
+    """
+
+    log_utils.get_logger().error(error)
+    console.print(
+        ":cross_mark: Failed to read from the file! This might be due to corruption of the file. Please backup from the previous commits in the git repository, if possible."
+    )
+
+
 def load_json(tasks_file: TextIO) -> Any:
     """Loads a file pointer and returns a JSON object. Used as a utility for
     checking any encoding/decoding while reading a JSON file.
@@ -105,10 +133,7 @@ def load_json(tasks_file: TextIO) -> Any:
         tasks_json = json.load(tasks_file)
         return tasks_json
     except JSONDecodeError as e:
-        logger.error(e)
-        console.print(
-            ":cross_mark: Failed to read from the file! This might be due to corruption of the file. Please backup from the previous commits in the git repository, if possible."
-        )
+        report_corrupted_file(e)
 
         # return -1 to sys.exit(-1)
         return -1
@@ -139,42 +164,56 @@ def add(name: str, due_date: str, priority: str, group: str) -> None:
 
     task_date = parse_date(due_date)
 
+    store = storage.get_store("tasks")
     try:
-        with tasks_path.open("r") as tasks_file:
-            tasks_json = load_json(tasks_file)
-            if tasks_json == -1:
-                sys.exit(-1)
-
-            task_id = len(list(tasks_json)) + 1
-            content = {
-                "id": ("#" + str(task_id)),
-                "name": name,
-                "date": str(datetime.now()),
-                "due_date": str(task_date),
-                "priority": priority.lower(),
-                "group": extracted_groups,
-            }
-
-            tasks_json.append(content)
-
-            with tasks_path.open("w") as tasks_file:
-                json.dump(tasks_json, tasks_file)
+        with store.transaction():
+            task = storage.Task(
+                name,
+                date_utils.format_date(datetime.now()),
+                date_utils.format_date(task_date),
+                priority.lower(),
+                extracted_groups,
+            )
+            store.add(task.to_record())
+
+            if store.save():
                 console.print(
                     f':white_check_mark: "{name}" has been added to the list!'
                 )
-                repo.index.add([str(tasks_path)])
-                repo.index.commit(f'Added "{name}" in tasks.')
+                git_utils.record(store.tracked_paths(), f'Added "{name}" in tasks.')
                 console.print(
                     f':white_check_mark: "{name}" has been added to the git repository!'
                 )
 
     except FileNotFoundError as e:
-        with tasks_path.open("a") as tasks_file:
-            tasks_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
+    except JSONDecodeError as e:
+        report_corrupted_file(e)
+        sys.exit(-1)
+
+
+def due_before_filter(due_before: Optional[str]) -> Optional[str]:
+    """Parses the `--due-before` filter, which takes the same values as the
+    due date of `add`.
+
+    :param due_before: Value of the filter.
+    :type due_before: Optional[str]
+    :raises BadParameter: If the date string is invalid.
+    :return: The date, in the stored format.
+    :rtype: Optional[str]
+    """
+
+    if due_before is None:
+        return None
+    try:
+        return date_utils.format_date(parse_date(due_before, strict=True))
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--due-before")
 
 
 @tasks.command()
@@ -183,11 +222,28 @@ def add(name: str, due_date: str, priority: str, group: str) -> None:
 @click.argument("date")
 @click.argument("priority")
 @click.argument("group")
-def edit(id: str, name: str, date: str, priority: str, group: str) -> None:
+@click.option(
+    "--group", "group_filter", help='With the ID ".", edits the tasks in this group.'
+)
+@click.option(
+    "--due-before", help='With the ID ".", edits the tasks due before this date.'
+)
+@click.option("--dry-run", is_flag=True, help="Only shows the matching tasks.")
+def edit(
+    id: str,
+    name: str,
+    date: str,
+    priority: str,
+    group: str,
+    group_filter: Optional[str],
+    due_before: Optional[str],
+    dry_run: bool,
+) -> None:
     """Edits an existing task in tasks.json and commits the changes in the git
-    repository.
+    repository. With the ID `.`, every task matching the filters is edited,
+    in a single commit.
 
-    :param id: ID of the task.
+    :param id: ID of the task, or `.` to use the filters.
     :type id: str
     :param name: Name of the task.
     :type name: str
@@ -197,146 +253,314 @@ def edit(id: str, name: str, date: str, priority: str, group: str) -> None:
     :type priority: str
     :param group: Group for the task.
     :type group: str
+    :param group_filter: Group of the tasks to edit.
+    :type group_filter: Optional[str]
+    :param due_before: Date the tasks to edit are due before.
+    :type due_before: Optional[str]
+    :param dry_run: Only show the matching tasks.
+    :type dry_run: bool
     :rtype: None
     """
 
     words = group.split(" ")
     extracted_groups = [word[1:] for word in words if word[0] == "@"]
+    filters = filter_utils.selection_filters(
+        id, tag=group_filter, due_before=due_before_filter(due_before)
+    )
 
+    store = storage.get_store("tasks")
     try:
-        with tasks_path.open("r") as tasks_file:
-            tasks_json = load_json(tasks_file)
-            if tasks_json == -1:
-                sys.exit(-1)
-            filtered_tasks = tasks_json
-
-            for task in filtered_tasks:
-                if task["id"] == id:
-                    if date.strip() != ".":
-                        task["due_date"] = str(parse_date(date, task["due_date"]))
-                    if name.strip() != ".":
-                        task["name"] = name
-
-                    if priority.strip() != ".":
-                        task["priority"] = priority
-
-                    if group.strip() != ".":
-                        task["group"] = extracted_groups
-
-            with tasks_path.open("w") as tasks_file:
-                json.dump(filtered_tasks, tasks_file)
+        with store.transaction():
+            matched = store.select(id, **filters)
+            if dry_run:
+                filter_utils.report_matches(matched, "tasks")
+                return
+            filter_utils.require_matches(id, matched, "Task", "tasks")
+
+            for task in matched:
+                changes = {}
+                if date.strip() != ".":
+                    due_date = parse_date(date, task["due_date"])
+                    changes["due_date"] = date_utils.format_date(due_date)
+                if name.strip() != ".":
+                    changes["name"] = name
+
+                if priority.strip() != ".":
+                    changes["priority"] = priority
+
+                if group.strip() != ".":
+                    changes["group"] = extracted_groups
+
+                store.update(task["id"], changes)
+
+            if store.save():
+                target = filter_utils.describe(id, matched, "Task", "tasks")
+                verb = "have" if id == "." and len(matched) != 1 else "has"
                 console.print(
-                    f":white_check_mark: Task {id} has been modified in the list!"
+                    f":white_check_mark: {target} {verb} been modified in the list!"
                 )
-                repo.index.add([str(tasks_path)])
-                repo.index.commit(f"Modified Task {id} in tasks.")
+                git_utils.record(store.tracked_paths(), f"Modified {target} in tasks.")
                 console.print(
-                    f":white_check_mark: Task {id} has been modified in the git repository!"
+                    f":white_check_mark: {target} {verb} been modified in the git repository!"
                 )
 
     except FileNotFoundError as e:
-        with tasks_path.open("a") as tasks_file:
-            tasks_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
+    except JSONDecodeError as e:
+        report_corrupted_file(e)
+        sys.exit(-1)
 
 
 @tasks.command()
-@click.argument("id")
-def delete(id: str) -> None:
-    """Deletes a task from tasks.json.
-
-    :param id: ID of the task.
+@click.argument("id", default=".")
+@click.option("--group", "group_filter", help="Deletes the tasks in this group.")
+@click.option("--due-before", help="Deletes the tasks due before this date.")
+@click.option("--dry-run", is_flag=True, help="Only shows the matching tasks.")
+def delete(
+    id: str, group_filter: Optional[str], due_before: Optional[str], dry_run: bool
+) -> None:
+    """Deletes a task from tasks.json. Without an ID, every task matching the
+    filters is deleted, in a single commit.
+
+    :param id: ID of the task, or `.` to use the filters.
     :type id: str
+    :param group_filter: Group of the tasks to delete.
+    :type group_filter: Optional[str]
+    :param due_before: Date the tasks to delete are due before.
+    :type due_before: Optional[str]
+    :param dry_run: Only show the matching tasks.
+    :type dry_run: bool
     """
 
-    try:
-        tasks_json = None
-        with tasks_path.open("r") as tasks_file:
-            tasks_json = load_json(tasks_file)
-            if tasks_json == -1:
-                sys.exit(-1)
-
-        filtered_tasks = [task for task in tasks_json if task["id"] != id]
+    filters = filter_utils.selection_filters(
+        id, tag=group_filter, due_before=due_before_filter(due_before)
+    )
 
-        try:
-            with tasks_path.open("w") as tasks_file:
-                json.dump(filtered_tasks, tasks_file)
-                repo.index.add([str(tasks_path)])
-                repo.index.commit(f"Deleted Task {id} from tasks.")
+    store = storage.get_store("tasks")
+    try:
+        with store.transaction():
+            matched = store.select(id, **filters)
+            if dry_run:
+                filter_utils.report_matches(matched, "tasks")
+                return
+            filter_utils.require_matches(id, matched, "Task", "tasks")
+
+            for task in matched:
+                store.delete(task["id"])
+
+            if store.save():
+                target = filter_utils.describe(id, matched, "Task", "tasks")
+                verb = "have" if id == "." and len(matched) != 1 else "has"
+                git_utils.record(store.tracked_paths(), f"Deleted {target} from tasks.")
                 console.print(
-                    f":white_check_mark: Task {id} has been removed from the git repository!"
+                    f":white_check_mark: {target} {verb} been removed from the git repository!"
                 )
-        except FileNotFoundError as e:
-            logger.error(e)
-            console.print(
-                ":cross_mark: Failed to write to the file! Please check the logs in the home directory."
-            )
 
     except FileNotFoundError as e:
-        with tasks_path.open("a") as tasks_file:
-            tasks_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
         )
+        batch_utils.fail()
+    except JSONDecodeError as e:
+        report_corrupted_file(e)
+        sys.exit(-1)
+
+
+def show_tasks(
+    records: Iterable[Dict[str, Any]], output_format: str, fields: Tuple[str, ...]
+) -> None:
+    """Prints tasks in the requested format.
+
+    :param records: The tasks.
+    :type records: Iterable[Dict[str, Any]]
+    :param output_format: `table`, `json`, `ndjson` or `csv`.
+    :type output_format: str
+    :param fields: Fields output by the formats other than `table`.
+    :type fields: Tuple[str, ...]
+    :rtype: None
+    """
+
+    if output_format == "table":
+        tasks_utils.parse_tasks(records)
+    else:
+        format_utils.write_records(records, output_format, fields)
 
 
 @tasks.command()
-def show() -> None:
-    """Shows all tasks present in tasks.json."""
+@render_utils.paginated
+@format_utils.formatted("tasks", ("due_in_seconds",))
+def show(
+    limit: Optional[int],
+    offset: int,
+    page: Optional[int],
+    output_format: str,
+    fields: Tuple[str, ...],
+) -> None:
+    """Shows all tasks present in tasks.json, or a page of them.
+
+    :param limit: Maximum number of tasks shown.
+    :type limit: Optional[int]
+    :param offset: Number of tasks skipped.
+    :type offset: int
+    :param page: Page shown, of `limit` tasks.
+    :type page: Optional[int]
+    :param output_format: `table`, `json`, `ndjson` or `csv`.
+    :type output_format: str
+    :param fields: Fields output by the formats other than `table`.
+    :type fields: Tuple[str, ...]
+    :rtype: None
+    """
 
+    store = storage.get_store("tasks")
     try:
-        with tasks_path.open("r") as tasks_file:
-            file_content = load_json(tasks_file)
-            if file_content == -1:
-                sys.exit(-1)
-            tasks_utils.parse_tasks(file_content)
+        show_tasks(
+            render_utils.window(store.all(), limit, offset, page),
+            output_format,
+            fields,
+        )
     except FileNotFoundError as e:
-        with tasks_path.open("a") as tasks_file:
-            tasks_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
         )
         sys.exit(-1)
+    except JSONDecodeError as e:
+        report_corrupted_file(e)
+        sys.exit(-1)
 
 
 @tasks.command()
 @click.argument("group_name")
-def show_group(group_name: str) -> None:
-    """Shows all tasks belonging to `group_name`
+@click.option(
+    "--any", "any_group", is_flag=True, help="Shows tasks in any of the groups."
+)
+@render_utils.paginated
+@format_utils.formatted("tasks", ("due_in_seconds",))
+def show_group(
+    group_name: str,
+    any_group: bool,
+    limit: Optional[int],
+    offset: int,
+    page: Optional[int],
+    output_format: str,
+    fields: Tuple[str, ...],
+) -> None:
+    """Shows all tasks belonging to `group_name`. Several groups can be
+    given, separated by spaces: tasks in every group are shown, or in any of
+    them with `--any`.
 
     :param group_name: Group name to which the task belongs.
     :type group_name: str
+    :param any_group: Show the tasks in any of the groups.
+    :type any_group: bool
+    :param limit: Maximum number of tasks shown.
+    :type limit: Optional[int]
+    :param offset: Number of tasks skipped.
+    :type offset: int
+    :param page: Page shown, of `limit` tasks.
+    :type page: Optional[int]
+    :param output_format: `table`, `json`, `ndjson` or `csv`.
+    :type output_format: str
+    :param fields: Fields output by the formats other than `table`.
+    :type fields: Tuple[str, ...]
     :rtype: None
     """
 
+    store = storage.get_store("tasks")
     try:
-        with tasks_path.open("r") as tasks_file:
-            file_content = load_json(tasks_file)
-            if file_content == -1:
-                sys.exit(-1)
+        groups = filter_utils.tag_list([group_name])
+        filtered_tasks = store.find_tags(groups, match_all=not any_group)
 
-            filtered_tasks = []
-            for task in file_content:
-                for group in task["group"]:
-                    if group_name[1:] == group:
-                        filtered_tasks.append(task)
+        # should return -1 for passing tests
+        if filtered_tasks == []:
+            sys.exit(-1)
 
-            # should return -1 for passing tests
-            if filtered_tasks == []:
-                sys.exit(-1)
-
-            tasks_utils.parse_tasks(filtered_tasks)
+        show_tasks(
+            render_utils.window(filtered_tasks, limit, offset, page),
+            output_format,
+            fields,
+        )
 
     except FileNotFoundError as e:
-        with tasks_path.open("a") as tasks_file:
-            tasks_file.write("[]")
-        logger.error(e)
+        store.initialize()
+        log_utils.get_logger().error(e)
         console.print(
             ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
         )
         sys.exit(-1)
+    except JSONDecodeError as e:
+        report_corrupted_file(e)
+        sys.exit(-1)
+
+
+def build_task(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds a task from an imported row. The due date takes the same values
+    as for `add`; the date the task was added defaults to now.
+
+    :param row: The imported row.
+    :type row: Dict[str, Any]
+    :raises ValueError: If the row is invalid.
+    :return: The task, without an ID.
+    :rtype: Dict[str, Any]
+    """
+
+    name = import_utils.required(row, "name")
+    task_date = parse_date(import_utils.required(row, "due_date"), strict=True)
+    priority = import_utils.required(row, "priority")
+    added_date = row.get("date")
+    if added_date:
+        if not isinstance(added_date, str):
+            raise ValueError('"date" should be a string')
+        added_date = date_utils.parse_stored(added_date)
+    else:
+        added_date = datetime.now()
+
+    task = storage.Task(
+        name,
+        date_utils.format_date(added_date),
+        date_utils.format_date(task_date),
+        priority.lower(),
+        import_utils.split_tags(row.get("group")),
+    )
+    return task.to_record()
+
+
+@tasks.command("import")
+@click.argument("source", type=click.File("r"), default="-")
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(import_utils.FORMATS),
+    help="Format of the source, guessed from its extension by default.",
+)
+def import_tasks(source: TextIO, file_format: Optional[str]) -> None:
+    """Imports tasks from a CSV or JSON Lines file (or standard input), with
+    the fields of `add`, as a single commit.
+
+    :param source: The file to import, `-` for standard input.
+    :type source: TextIO
+    :param file_format: `csv` or `jsonl`.
+    :type file_format: Optional[str]
+    :rtype: None
+    """
+
+    file_format = file_format or import_utils.guess_format(source.name)
+    store = storage.get_store("tasks")
+    try:
+        import_utils.import_rows(
+            store,
+            import_utils.read_rows(source, file_format),
+            build_task,
+            "tasks",
+        )
+    except JSONDecodeError as e:
+        report_corrupted_file(e)
+        sys.exit(-1)
@@ -1,22 +1,253 @@
-from absorb.core.tasks import commands as tasks_group
-from absorb.core.kanban import commands as kanban_group
-from absorb.core.idea import commands as idea_group
-
-from pkg_resources import iter_entry_points
+# Imported first, to time the startup of absorb.
+from .utils import trace_utils
+import importlib
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Tuple
 
 import click
-from click_plugins import with_plugins
+from .utils.plugin_utils import discover_plugins, load_plugin
+
+# Built-in groups, resolved only when they are dispatched. Each entry maps the
+# command name to its import path and the short help shown in `absorb --help`,
+# so listing the commands doesn't import the groups themselves.
+LAZY_COMMANDS: Dict[str, Tuple[str, str]] = {
+    "tasks": ("absorb.core.tasks.commands:tasks", "The main click group for tasks."),
+    "kanban": (
+        "absorb.core.kanban.commands:kanban",
+        "Creates the main click group for kanban boards.",
+    ),
+    "idea": ("absorb.core.idea.commands:idea", "The main click group for idea."),
+    "plugins": (
+        "absorb.core.plugins.commands:plugins",
+        "Lists the installed plugins.",
+    ),
+    "compact": (
+        "absorb.core.compact.commands:compact",
+        "Folds the journals of the stores back into their snapshots.",
+    ),
+    "batch": (
+        "absorb.core.batch.commands:batch",
+        "Runs absorb commands read from the standard input as one change.",
+    ),
+    "status": (
+        "absorb.core.status.commands:status",
+        "Shows the state of the git versioning of the workspace.",
+    ),
+    "find": (
+        "absorb.core.find.commands:find",
+        "Searches the names and descriptions of tasks, cards and ideas.",
+    ),
+    "perf": (
+        "absorb.core.perf.commands:perf",
+        "Reports the timings recorded in the trace file.",
+    ),
+}
+
+
+def import_command(import_path: str) -> click.Command:
+    """Imports a click command from a `module:attribute` path.
+
+    :param import_path: Import path of the command.
+    :type import_path: str
+    :return: The click command.
+    :rtype: click.Command
+    """
+
+    module_name, attribute = import_path.split(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+
+class LazyGroup(click.Group):
+    """A click group which imports its subcommands and plugins only when they
+    are dispatched."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initializes the group with the built-in lazy commands.
+
+        :param args: Positional arguments for `click.Group`.
+        :type args: Any
+        :param kwargs: Keyword arguments for `click.Group`.
+        :type kwargs: Any
+        """
+
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(LAZY_COMMANDS)
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        """Lists the eager, lazy and plugin commands.
+
+        :param ctx: Click context.
+        :type ctx: click.Context
+        :return: Sorted command names.
+        :rtype: List[str]
+        """
+
+        names = set(super().list_commands(ctx))
+        names.update(self.lazy_commands)
+        names.update(discover_plugins())
+        return sorted(names)
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        """Resolves a command, importing it on first use.
+
+        :param ctx: Click context.
+        :type ctx: click.Context
+        :param cmd_name: Name of the command.
+        :type cmd_name: str
+        :return: The click command, if it exists.
+        :rtype: Optional[click.Command]
+        """
+
+        if cmd_name in self.commands:
+            return self.commands[cmd_name]
+
+        if cmd_name in self.lazy_commands:
+            with trace_utils.span("import"):
+                command = import_command(self.lazy_commands[cmd_name][0])
+        elif cmd_name in discover_plugins():
+            with trace_utils.span("plugin.load"):
+                command = self.load_plugin(cmd_name)
+        else:
+            return None
+
+        self.add_command(command, cmd_name)
+        return command
+
+    def load_plugin(self, cmd_name: str) -> click.Command:
+        """Loads a plugin command. A broken plugin is replaced with a command
+        explaining the error instead of taking down the CLI.
+
+        :param cmd_name: Name of the plugin command.
+        :type cmd_name: str
+        :return: The plugin command.
+        :rtype: click.Command
+        """
+
+        try:
+            return load_plugin(cmd_name)
+        except Exception:
+            from click_plugins.core import BrokenCommand
+
+            return BrokenCommand(cmd_name)
+
+    def invoke(self, ctx: click.Context) -> Any:
+        """Invokes the command, under the profilers requested by the options of
+        the group, and traced if it is sampled.
+
+        :param ctx: Click context.
+        :type ctx: click.Context
+        :return: Whatever the command returns.
+        :rtype: Any
+        """
+
+        with ExitStack() as profiling:
+            if ctx.params.get("profile") or ctx.params.get("memprofile"):
+                # Only imported when profiling.
+                from .utils import profile_utils
+            if ctx.params.get("profile"):
+                profiling.enter_context(
+                    profile_utils.cpu_profile(ctx.params["profile_format"])
+                )
+            if ctx.params.get("memprofile"):
+                profiling.enter_context(
+                    profile_utils.memory_profile(self.command_name(ctx))
+                )
+
+            if not trace_utils.start_trace():
+                return super().invoke(ctx)
+            command_name = self.command_name(ctx)
+            try:
+                return super().invoke(ctx)
+            finally:
+                trace_utils.finish_trace(command_name)
+
+    def command_name(self, ctx: click.Context) -> str:
+        """Returns the full name of the command about to be invoked, e.g.
+        `tasks add`, resolving (and importing) its groups.
+
+        :param ctx: Click context.
+        :type ctx: click.Context
+        :return: The name of the command.
+        :rtype: str
+        """
+
+        names = []
+        command = self  # type: click.Command
+        for arg in [*ctx.protected_args, *ctx.args]:
+            if not isinstance(command, click.MultiCommand):
+                break
+            subcommand = command.get_command(ctx, arg)
+            if subcommand is None:
+                break
+            names.append(arg)
+            command = subcommand
+        return " ".join(names)
+
+    def format_commands(
+        self, ctx: click.Context, formatter: click.HelpFormatter
+    ) -> None:
+        """Writes the command listing for `--help` without importing the lazy
+        commands.
+
+        :param ctx: Click context.
+        :type ctx: click.Context
+        :param formatter: Click help formatter.
+        :type formatter: click.HelpFormatter
+        """
+
+        rows = []
+        for cmd_name in self.list_commands(ctx):
+            if cmd_name in self.commands:
+                command = self.commands[cmd_name]
+                if command.hidden:
+                    continue
+                rows.append((cmd_name, command.get_short_help_str()))
+            elif cmd_name in self.lazy_commands:
+                rows.append((cmd_name, self.lazy_commands[cmd_name][1]))
+            else:
+                rows.append((cmd_name, discover_plugins()[cmd_name]["help"]))
+
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Profiles the command with cProfile; the profile is written to the logs directory.",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(["pstats", "collapsed"]),
+    default="pstats",
+    show_default=True,
+    help="Format of the profile: pstats, or collapsed stacks for flamegraphs.",
+)
+@click.option(
+    "--memprofile",
+    is_flag=True,
+    help="Reports the peak memory of the command and of each of its phases, "
+    "with tracemalloc, in the logs directory.",
+)
+def cli(profile: bool, profile_format: str, memprofile: bool) -> None:
+    """Creates the main click group for absorb.
 
+    :param profile: Profile the command with cProfile.
+    :type profile: bool
+    :param profile_format: `pstats` or `collapsed`.
+    :type profile_format: str
+    :param memprofile: Profile the memory of the command with tracemalloc.
+    :type memprofile: bool
+    :rtype: None
+    """
 
-@with_plugins(iter_entry_points("absorb.plugins"))
-@click.group()
-def cli() -> None:
-    """Creates the main click group for absorb."""
+    from .utils import git_utils
 
+    git_utils.flush_overdue()
 
-cli.add_command(tasks_group.tasks)
-cli.add_command(kanban_group.kanban)
-cli.add_command(idea_group.idea)
 
 if __name__ == "__main__":
     cli()
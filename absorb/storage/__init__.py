@@ -0,0 +1,90 @@
+"""Storage backends for tasks, kanban cards and ideas."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Type
+from ..config import settings
+from .base import STORE_FILES, Record, Store
+from .journal_store import JournalStore
+from .json_store import JSONStore
+from .models import Card, Idea, Task
+from .sqlite_store import SQLiteStore
+
+BACKENDS: Dict[str, Type[Store]] = {
+    "json": JSONStore,
+    "journal": JournalStore,
+    "sqlite": SQLiteStore,
+}
+
+__all__ = [
+    "BACKENDS",
+    "Card",
+    "Idea",
+    "STORE_FILES",
+    "JSONStore",
+    "JournalStore",
+    "Record",
+    "SQLiteStore",
+    "Store",
+    "Task",
+    "export",
+    "get_store",
+    "shared",
+]
+
+# Stores shared by the commands run in a `shared` block, by name.
+_shared = None  # type: Optional[Dict[str, Store]]
+
+
+def get_store(name: str) -> Store:
+    """Opens a store with the backend chosen by the `storage_backend` setting.
+
+    :param name: Name of the store (tasks, kanban or ideas).
+    :type name: str
+    :return: The store.
+    :rtype: Store
+    """
+
+    if _shared is not None and name in _shared:
+        return _shared[name]
+    return BACKENDS[settings.get_setting("storage_backend")](name)
+
+
+@contextmanager
+def shared(stores):
+    # type: (Dict[str, Store]) -> Iterator[None]
+    """Makes `get_store` return the given stores for the duration of the
+    block, so that several commands work on the same loaded records.
+
+    :param stores: The stores, by name.
+    :type stores: Dict[str, Store]
+    :yield: Nothing.
+    :rtype: Iterator[None]
+    """
+
+    global _shared
+    _shared = stores
+    try:
+        yield
+    finally:
+        _shared = None
+
+
+def export(file_paths: Iterable[Any]) -> None:
+    """Brings the JSON files of the stores up to date before they are
+    committed. Only matters for backends which don't keep their records in
+    those files.
+
+    :param file_paths: Paths of the files about to be committed.
+    :type file_paths: Iterable[Any]
+    :rtype: None
+    """
+
+    if settings.get_setting("storage_backend") != "sqlite":
+        return
+
+    targets = {Path(file_path) for file_path in file_paths}
+    for name in STORE_FILES:
+        store = get_store(name)
+        if store.path in targets:
+            store.export()
@@ -0,0 +1,521 @@
+import json
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from ..config import paths, settings
+from ..utils import date_utils, lock_utils, log_utils, store_utils, trace_utils
+from . import snapshot_cache, tag_index
+
+# JSON file holding each store. It is the file versioned in git, whatever the
+# storage backend.
+STORE_FILES = {"tasks": "tasks.json", "kanban": "kanban.json", "ideas": "ideas.json"}
+
+# Field holding the tags of a record.
+TAG_FIELDS = {"tasks": "group", "kanban": "tags", "ideas": "tags"}
+
+Record = Dict[str, Any]
+
+
+class Store(ABC):
+    """Interface of a store of records (tasks, kanban cards or ideas).
+
+    Mutations are kept in the store until `save` is called. Reading a store
+    which doesn't exist yet raises `FileNotFoundError`; `initialize` creates
+    it empty. Read-modify-write cycles go through `transaction`, so that
+    concurrent absorb processes don't lose each other's changes.
+
+    IDs are allocated from a counter of the highest ID ever used, kept by
+    each backend, so the ID of a deleted record is never handed out again.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initializes the store.
+
+        :param name: Name of the store (tasks, kanban or ideas).
+        :type name: str
+        """
+
+        self.name = name
+        self.tag_field = TAG_FIELDS[name]
+        self._transactions = 0
+        self._last_id = 0
+        self._deferring = False
+        self._mutations = 0
+        self._reported = 0
+        self._index = None  # type: Optional[tag_index.TagIndex]
+        # Whether the tag index was built from the records as loaded, and
+        # isn't cached yet.
+        self._index_built = False
+        self._signature = []  # type: tag_index.Signature
+        # Signature and hash of the JSON file parsed by `read_file`, until
+        # its records are snapshotted.
+        self._parsed = None  # type: Optional[Tuple[snapshot_cache.FileSignature, str]]
+
+    @property
+    def path(self) -> Path:
+        """Path of the JSON file versioned in git for this store.
+
+        :return: Path of the JSON file.
+        :rtype: Path
+        """
+
+        return paths.ROOT_PATH / STORE_FILES[self.name]
+
+    def load(self) -> Any:
+        """Opens the store. Backends reading files raise `FileNotFoundError`
+        if the store doesn't exist yet, and return what they loaded; by
+        default, there is nothing to open.
+
+        :rtype: Any
+        """
+
+    def reload(self) -> None:
+        """Drops whatever was loaded from the store, so that the next read sees
+        the changes of other processes."""
+
+    def discard(self) -> None:
+        """Drops the unsaved mutations, e.g. of a failed batch, along with
+        whatever was loaded from the store."""
+
+        self.reload()
+
+    @contextmanager
+    def transaction(self):
+        # type: () -> Iterator[Store]
+        """Holds the lock of the store for the duration of the block. The
+        store is reloaded when the lock is taken, so the block reads the
+        latest content; it should save (and record) its changes before the
+        block ends. Nested transactions share the outer one.
+
+        :yield: The store.
+        :rtype: Iterator[Store]
+        """
+
+        with lock_utils.file_lock(paths.STATE_PATH / f"{self.name}.lock"):
+            if not self._transactions:
+                self.reload()
+            self._transactions += 1
+            try:
+                yield self
+            finally:
+                self._transactions -= 1
+
+    def defer(self, deferring: bool = True) -> None:
+        """Defers saves, for running several commands against the store as
+        one change. While deferring, `save` only reports whether the store
+        was mutated since it was last called; the mutations are persisted by
+        the first `save` after deferring stops, or dropped by `reload`.
+
+        :param deferring: Start (True) or stop (False) deferring.
+        :type deferring: bool
+        """
+
+        self._deferring = deferring
+
+    def mutated(self) -> None:
+        """Counts a mutation of the store, for deferred saves."""
+
+        self._mutations += 1
+
+    def report_mutations(self) -> bool:
+        """Reports whether the store was mutated since this was last called.
+
+        :return: True if the store was mutated.
+        :rtype: bool
+        """
+
+        mutated = self._mutations != self._reported
+        self._reported = self._mutations
+        return mutated
+
+    @abstractmethod
+    def initialize(self) -> None:
+        """Creates the store, empty, unless another process created it first."""
+
+    @abstractmethod
+    def all(self) -> List[Record]:
+        """Returns every record, in insertion order.
+
+        :return: The records.
+        :rtype: List[Record]
+        """
+
+    @abstractmethod
+    def get(self, record_id: str) -> Optional[Record]:
+        """Returns the record with the given ID.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: The record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+    @abstractmethod
+    def add(self, record: Record) -> Record:
+        """Adds a record, assigning it a new ID.
+
+        :param record: The record, without an ID.
+        :type record: Record
+        :return: The stored record.
+        :rtype: Record
+        """
+
+    @abstractmethod
+    def update(self, record_id: str, changes: Record) -> Optional[Record]:
+        """Updates fields of a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :param changes: Fields to be updated.
+        :type changes: Record
+        :return: The updated record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+    @abstractmethod
+    def delete(self, record_id: str) -> bool:
+        """Deletes a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: True if the record existed.
+        :rtype: bool
+        """
+
+    @abstractmethod
+    def find(
+        self,
+        tag: Optional[str] = None,
+        status: Optional[str] = None,
+        due_before: Optional[str] = None,
+    ) -> List[Record]:
+        """Returns the records matching every given filter, in insertion order.
+
+        :param tag: Tag (or group) the records must have.
+        :type tag: Optional[str]
+        :param status: Status the records must have.
+        :type status: Optional[str]
+        :param due_before: Date the records must be due before.
+        :type due_before: Optional[str]
+        :return: The matching records.
+        :rtype: List[Record]
+        """
+
+    @abstractmethod
+    def save(self) -> bool:
+        """Persists the pending mutations.
+
+        :return: True if the stored content changed.
+        :rtype: bool
+        """
+
+    def compact(self) -> bool:
+        """Folds any pending history of the store into its JSON file. Stores
+        without history have nothing to do.
+
+        :return: True if the store was compacted.
+        :rtype: bool
+        """
+
+        return False
+
+    def export(self) -> None:
+        """Brings the JSON file versioned in git up to date with the store.
+        Stores kept in that file have nothing to do."""
+
+    def tracked_paths(self) -> List[Path]:
+        """Returns the files to be committed after a change to the store.
+
+        :return: Paths of the files.
+        :rtype: List[Path]
+        """
+
+        return [self.path]
+
+    def next_id(self, last_id: int) -> str:
+        """Returns the ID following the highest ID used so far.
+
+        :param last_id: Number of the highest ID used so far.
+        :type last_id: int
+        :return: The new ID.
+        :rtype: str
+        """
+
+        return "#" + str(last_id + 1)
+
+    def allocate_id(self) -> str:
+        """Allocates an ID for a new record from the loaded counter.
+
+        :return: The new ID.
+        :rtype: str
+        """
+
+        record_id = self.next_id(self._last_id)
+        self._last_id += 1
+        return record_id
+
+    @staticmethod
+    def id_number(record_id: str) -> int:
+        """Returns the number of an ID.
+
+        :param record_id: ID of a record.
+        :type record_id: str
+        :return: The number of the ID, 0 if it has none.
+        :rtype: int
+        """
+
+        number = record_id.lstrip("#")
+        return int(number) if number.isdigit() else 0
+
+    def track_id(self, record_id: str) -> None:
+        """Keeps the counter above the number of an ID in use.
+
+        :param record_id: ID of a record.
+        :type record_id: str
+        """
+
+        self._last_id = max(self._last_id, self.id_number(record_id))
+
+    def read_file(self) -> Tuple[List[Record], Optional[int]]:
+        """Reads the records of the JSON file of the store. With the
+        snapshot_cache setting, they are loaded from the snapshot of the file
+        while it matches the file. The snapshot only holds records needing no
+        fix, so the IDs and dates of records loaded from it aren't checked
+        again; once a parsed file is found to need no fix, `snapshot_file`
+        snapshots it. Raises `FileNotFoundError` if the JSON file doesn't
+        exist.
+
+        :return: The records, and the highest ID number among them if they
+            were loaded from the snapshot, None if the file was parsed.
+        :rtype: Tuple[List[Record], Optional[int]]
+        """
+
+        self._parsed = None
+        use_snapshot = settings.get_setting("snapshot_cache")
+        current = tag_index.signature([self.path])[0]
+        with store_utils.gc_paused():
+            if use_snapshot:
+                with trace_utils.span("store.snapshot"):
+                    snapshot = snapshot_cache.SnapshotCache(self.name).load(
+                        current, self.path
+                    )
+                if snapshot is not None:
+                    return snapshot
+            with trace_utils.span("store.read"):
+                content = self.path.read_bytes()
+            with trace_utils.span("store.parse"):
+                records = json.loads(content)
+        if use_snapshot:
+            self._parsed = (current, snapshot_cache.content_digest(content))
+        return records, None
+
+    def snapshot_file(self, records: List[Record]) -> None:
+        """Snapshots the records of the JSON file parsed by `read_file`, once
+        they are found to need no fix.
+
+        :param records: Records of the file.
+        :type records: List[Record]
+        """
+
+        if self._parsed is None:
+            return
+        current, digest = self._parsed
+        self._parsed = None
+        self.write_snapshot(records, current, digest)
+
+    def save_snapshot(self, records: List[Record]) -> None:
+        """Snapshots the records of the JSON file just written, with the
+        snapshot_cache setting.
+
+        :param records: Records of the file.
+        :type records: List[Record]
+        """
+
+        if not settings.get_setting("snapshot_cache"):
+            return
+        current = tag_index.signature([self.path])[0]
+        digest = snapshot_cache.content_digest(self.path.read_bytes())
+        self.write_snapshot(records, current, digest)
+
+    def write_snapshot(
+        self,
+        records: List[Record],
+        current: snapshot_cache.FileSignature,
+        digest: str,
+    ) -> None:
+        """Writes the snapshot of the JSON file.
+
+        :param records: Records of the file, needing no fix.
+        :type records: List[Record]
+        :param current: Signature of the file.
+        :type current: snapshot_cache.FileSignature
+        :param digest: Hash of the content of the file.
+        :type digest: str
+        """
+
+        with trace_utils.span("store.snapshot"):
+            last_id = max(
+                (self.id_number(record["id"]) for record in records), default=0
+            )
+            snapshot_cache.SnapshotCache(self.name).save(
+                records, current, digest, last_id
+            )
+
+    def renumber_duplicates(self, records: List[Record]) -> bool:
+        """Gives a new ID to every record reusing the ID of an earlier record,
+        as stores written by older versions of absorb may. The counter must
+        already account for the IDs of `records`.
+
+        :param records: The records, in insertion order.
+        :type records: List[Record]
+        :return: True if any record was renumbered.
+        :rtype: bool
+        """
+
+        seen = set()
+        renumbered = False
+        for record in records:
+            if record["id"] in seen:
+                record_id = self.allocate_id()
+                log_utils.get_logger().warning(
+                    f'Duplicate ID {record["id"]} in {self.name}, renumbered to {record_id}.'
+                )
+                record["id"] = record_id
+                renumbered = True
+            seen.add(record["id"])
+        return renumbered
+
+    def upgrade_dates(self, records: Iterable[Record]) -> bool:
+        """Rewrites in ISO 8601 the dates stored by older versions of absorb,
+        which used the `str` of the date.
+
+        :param records: The records.
+        :type records: Iterable[Record]
+        :return: True if any date was rewritten.
+        :rtype: bool
+        """
+
+        upgraded = False
+        for record in records:
+            if date_utils.upgrade_record(record):
+                upgraded = True
+        return upgraded
+
+    def get_tag_index(self) -> tag_index.TagIndex:
+        """Returns the tag index of the store. It is loaded from the cache if
+        it was built from the files the records were loaded from, and rebuilt
+        otherwise. Mutations get it before changing the records, so that it
+        is built from the records as loaded; it is only cached by `save_index`
+        and `find_tags`, for the files on disk.
+
+        :return: The index.
+        :rtype: TagIndex
+        """
+
+        if self._index is None:
+            records = self.all()
+            index = tag_index.TagIndex(self.name)
+            self._index_built = not index.load(self._signature, self.tracked_paths())
+            if self._index_built:
+                index.build(records, self.tag_field)
+            self._index = index
+        return self._index
+
+    def reindex(
+        self, record_id: str, old: Optional[Record], new: Optional[Record]
+    ) -> None:
+        """Updates the tag index after a mutation of a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :param old: The record before the mutation, None if it was added.
+        :type old: Optional[Record]
+        :param new: The record after the mutation, None if it was deleted.
+        :type new: Optional[Record]
+        """
+
+        index = self.get_tag_index()
+        # The index no longer matches the files until they are saved.
+        self._index_built = False
+        if old is not None:
+            index.remove(record_id, tag_index.record_tags(old, self.tag_field))
+        if new is not None:
+            index.add(record_id, tag_index.record_tags(new, self.tag_field))
+
+    def save_index(self) -> None:
+        """Writes the tag index, if loaded, for the files just saved."""
+
+        self._signature = tag_index.signature(self.tracked_paths())
+        self._index_built = False
+        if self._index is not None:
+            self._index.save(self._signature)
+
+    def find_tags(self, tags: Sequence[str], match_all: bool = True) -> List[Record]:
+        """Returns the records having every given tag (or any of them),
+        through the tag index.
+
+        :param tags: The tags (or groups).
+        :type tags: Sequence[str]
+        :param match_all: Require every tag rather than any of them.
+        :type match_all: bool
+        :return: The matching records, in ID order.
+        :rtype: List[Record]
+        """
+
+        index = self.get_tag_index()
+        if self._index_built:
+            # Built from the records as loaded, so it matches the files.
+            index.save(self._signature)
+            self._index_built = False
+        found = [self.get(record_id) for record_id in index.query(tags, match_all)]
+        return [record for record in found if record is not None]
+
+    def matches(
+        self,
+        record: Record,
+        tag: Optional[str],
+        status: Optional[str],
+        due_before: Optional[str] = None,
+    ) -> bool:
+        """Checks a record against the filters of `find`. Dates are compared
+        as strings, which orders the stored format chronologically.
+
+        :param record: The record.
+        :type record: Record
+        :param tag: Tag (or group) the record must have.
+        :type tag: Optional[str]
+        :param status: Status the record must have.
+        :type status: Optional[str]
+        :param due_before: Date the record must be due before.
+        :type due_before: Optional[str]
+        :return: True if the record matches.
+        :rtype: bool
+        """
+
+        if tag is not None and tag not in record.get(self.tag_field, []):
+            return False
+        if status is not None and record.get("status") != status:
+            return False
+        if due_before is not None:
+            due_date = record.get("due_date")
+            if due_date is None or not due_date < due_before:
+                return False
+        return True
+
+    def select(self, record_id: str, **filters: Optional[str]) -> List[Record]:
+        """Returns the records a command acts on: the record with the given ID,
+        or with the ID `.`, every record matching the filters of `find`.
+
+        :param record_id: ID of the record, or `.`.
+        :type record_id: str
+        :param filters: Filters of `find`; unset filters are None.
+        :type filters: Optional[str]
+        :return: The selected records.
+        :rtype: List[Record]
+        """
+
+        if record_id != ".":
+            record = self.get(record_id)
+            return [record] if record is not None else []
+        return self.find(**filters)
@@ -0,0 +1,327 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from ..config import paths, settings
+from ..utils import store_utils, trace_utils
+from . import tag_index
+from .base import STORE_FILES, Record, Store
+
+
+class JournalStore(Store):
+    """Store kept as a compacted JSON snapshot plus an append-only JSON Lines
+    journal. Every add, update and delete appends one line to the journal
+    instead of rewriting the snapshot; deletes are kept as tombstones so that
+    IDs are never reused. `compact` folds the journal back into the snapshot.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initializes the store.
+
+        :param name: Name of the store (tasks, kanban or ideas).
+        :type name: str
+        """
+
+        super().__init__(name)
+        self._records = None  # type: Optional[Dict[str, Record]]
+        self._pending = []  # type: List[Dict[str, Any]]
+        self._journal_entries = 0
+        self._outdated = False
+        self._index = None
+
+    @property
+    def journal_path(self) -> Path:
+        """Path of the journal.
+
+        :return: Path of the journal.
+        :rtype: Path
+        """
+
+        return paths.ROOT_PATH / (Path(STORE_FILES[self.name]).stem + ".journal.jsonl")
+
+    def load(self) -> Dict[str, Record]:
+        """Loads the snapshot and replays the journal over it, once. Duplicate
+        IDs and dates left by older versions are fixed in memory, and on disk
+        by the next compaction.
+
+        :raises FileNotFoundError: If neither the snapshot nor the journal exist.
+        :return: The records keyed by ID, in insertion order.
+        :rtype: Dict[str, Record]
+        """
+
+        if self._records is not None:
+            return self._records
+
+        self._signature = tag_index.signature(self.tracked_paths())
+        try:
+            snapshot, snapshot_id = self.read_file()
+        except FileNotFoundError:
+            if not self.journal_path.exists():
+                raise
+            snapshot, snapshot_id = [], 0
+
+        if snapshot_id is not None:
+            self._last_id = max(self._last_id, snapshot_id)
+        else:
+            for record in snapshot:
+                self.track_id(record["id"])
+            # Renumbering is deterministic, so entries appended to the journal
+            # since refer to the same IDs; compaction makes it permanent.
+            self._outdated = self.renumber_duplicates(snapshot)
+            # Dates of older versions are rewritten in memory, and by
+            # compaction on disk.
+            if self.upgrade_dates(snapshot):
+                self._outdated = True
+            if not self._outdated:
+                self.snapshot_file(snapshot)
+        self._records = {record["id"]: record for record in snapshot}
+
+        replayed = set()  # type: Set[str]
+        with trace_utils.span("store.replay"):
+            try:
+                with self.journal_path.open("r") as journal_file:
+                    for line in journal_file:
+                        # A line without its newline is still being appended.
+                        if not line.endswith("\n"):
+                            break
+                        if line.strip():
+                            entry = json.loads(line)
+                            self.apply(entry)
+                            if entry["op"] == "add":
+                                replayed.add(entry["record"]["id"])
+                            elif entry["op"] == "update":
+                                replayed.add(entry["id"])
+                            if entry["op"] != "meta":
+                                self._journal_entries += 1
+            except FileNotFoundError:
+                pass
+
+        # Entries of older versions may hold dates in their format too.
+        if self.upgrade_dates(
+            self._records[record_id]
+            for record_id in replayed
+            if record_id in self._records
+        ):
+            self._outdated = True
+        return self._records
+
+    def apply(self, entry: Dict[str, Any]) -> None:
+        """Applies a journal entry to the loaded records.
+
+        :param entry: The journal entry.
+        :type entry: Dict[str, Any]
+        """
+
+        records = self._records
+        if entry["op"] == "add":
+            records[entry["record"]["id"]] = entry["record"]
+            self.track_id(entry["record"]["id"])
+        elif entry["op"] == "update":
+            if entry["id"] in records:
+                records[entry["id"]] = {**records[entry["id"]], **entry["changes"]}
+        elif entry["op"] == "delete":
+            records.pop(entry["id"], None)
+            self.track_id(entry["id"])
+        elif entry["op"] == "meta":
+            self._last_id = max(self._last_id, entry["last_id"])
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Applies a journal entry and queues it for `save`.
+
+        :param entry: The journal entry.
+        :type entry: Dict[str, Any]
+        """
+
+        record_id = entry["record"]["id"] if entry["op"] == "add" else entry["id"]
+        old = self._records.get(record_id)
+        reindexed = entry["op"] != "update" or self.tag_field in entry["changes"]
+        if reindexed:
+            self.get_tag_index()
+        self.apply(entry)
+        if reindexed:
+            self.reindex(record_id, old, self._records.get(record_id))
+        self._pending.append(entry)
+        self.mutated()
+
+    def reload(self) -> None:
+        """Drops the loaded records and any unsaved entry."""
+
+        self._records = None
+        self._pending = []
+        self._last_id = 0
+        self._journal_entries = 0
+        self._outdated = False
+        self._index = None
+
+    def initialize(self) -> None:
+        """Creates the snapshot, empty, unless it exists. Nothing is
+        written while saves are deferred, e.g. by a batch."""
+
+        if self._deferring:
+            return
+        store_utils.create_json(self.path, [])
+        self._records = None
+
+    def all(self) -> List[Record]:
+        """Returns every record, in insertion order.
+
+        :return: The records.
+        :rtype: List[Record]
+        """
+
+        return list(self.load().values())
+
+    def get(self, record_id: str) -> Optional[Record]:
+        """Returns the record with the given ID.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: The record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+        return self.load().get(record_id)
+
+    @trace_utils.traced("store.mutate")
+    def add(self, record: Record) -> Record:
+        """Adds a record, assigning it a new ID.
+
+        :param record: The record, without an ID.
+        :type record: Record
+        :return: The stored record.
+        :rtype: Record
+        """
+
+        self.load()
+        record = {"id": self.allocate_id(), **record}
+        self.append({"op": "add", "record": record})
+        return record
+
+    @trace_utils.traced("store.mutate")
+    def update(self, record_id: str, changes: Record) -> Optional[Record]:
+        """Updates fields of a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :param changes: Fields to be updated.
+        :type changes: Record
+        :return: The updated record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+        record = self.get(record_id)
+        if record is None:
+            return None
+
+        changes = {
+            field: value
+            for field, value in changes.items()
+            if record.get(field) != value
+        }
+        if changes:
+            self.append({"op": "update", "id": record_id, "changes": changes})
+        return self._records[record_id]
+
+    @trace_utils.traced("store.mutate")
+    def delete(self, record_id: str) -> bool:
+        """Deletes a record, leaving a tombstone in the journal.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: True if the record existed.
+        :rtype: bool
+        """
+
+        if self.get(record_id) is None:
+            return False
+        self.append({"op": "delete", "id": record_id})
+        return True
+
+    def find(
+        self,
+        tag: Optional[str] = None,
+        status: Optional[str] = None,
+        due_before: Optional[str] = None,
+    ) -> List[Record]:
+        """Returns the records matching every given filter, in insertion order
+        (in ID order with a tag, which is looked up in the tag index).
+
+        :param tag: Tag (or group) the records must have.
+        :type tag: Optional[str]
+        :param status: Status the records must have.
+        :type status: Optional[str]
+        :param due_before: Date the records must be due before.
+        :type due_before: Optional[str]
+        :return: The matching records.
+        :rtype: List[Record]
+        """
+
+        records = self.all() if tag is None else self.find_tags([tag])
+        return [
+            record
+            for record in records
+            if self.matches(record, None, status, due_before)
+        ]
+
+    def save(self) -> bool:
+        """Appends the pending entries to the journal, compacting it once it
+        holds more than `journal_max_entries` entries, or if the snapshot was
+        fixed on load.
+
+        :return: True if any entry was appended (while deferring, if any
+            entry was queued).
+        :rtype: bool
+        """
+
+        if self._deferring:
+            return self.report_mutations()
+        if not self._pending:
+            return False
+
+        store_utils.append_lines(
+            self.journal_path, (json.dumps(entry) + "\n" for entry in self._pending)
+        )
+        self._journal_entries += len(self._pending)
+        self._pending = []
+
+        max_entries = settings.get_setting("journal_max_entries")
+        if self._outdated or (max_entries and self._journal_entries > max_entries):
+            self.compact()
+        self.save_index()
+        return True
+
+    def compact(self) -> bool:
+        """Folds the journal into the snapshot. The journal is left with a
+        single entry recording the highest ID used, so IDs stay stable.
+
+        :return: True if the journal had entries to fold.
+        :rtype: bool
+        """
+
+        records = self.load()
+        if not self._journal_entries and not self._outdated:
+            return False
+
+        snapshot = list(records.values())
+        if store_utils.write_json(self.path, snapshot):
+            self.save_snapshot(snapshot)
+        store_utils.write_text(
+            self.journal_path,
+            json.dumps({"op": "meta", "last_id": self._last_id}) + "\n",
+        )
+        self._journal_entries = 0
+        self._outdated = False
+        self.save_index()
+        return True
+
+    def tracked_paths(self) -> List[Path]:
+        """Returns the snapshot and the journal, if they exist.
+
+        :return: Paths of the files.
+        :rtype: List[Path]
+        """
+
+        return [
+            file_path
+            for file_path in (self.path, self.journal_path)
+            if file_path.exists()
+        ]
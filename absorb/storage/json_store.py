@@ -0,0 +1,219 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+from ..config import paths
+from ..utils import store_utils, trace_utils
+from . import tag_index
+from .base import Record, Store
+
+# File in the state directory holding the highest ID used by a store, since
+# the JSON file itself is a bare list of records.
+COUNTER_FILE = "{name}.last-id"
+
+
+class JSONStore(Store):
+    """Store kept in its JSON file, which is loaded whole and rewritten whole
+    on save. Records are indexed by ID once loaded."""
+
+    def __init__(self, name: str) -> None:
+        """Initializes the store.
+
+        :param name: Name of the store (tasks, kanban or ideas).
+        :type name: str
+        """
+
+        super().__init__(name)
+        self._records = None  # type: Optional[Dict[str, Record]]
+        self._saved_last_id = 0
+        self._dirty = False
+
+    @property
+    def counter_path(self) -> Path:
+        """Path of the file holding the highest ID used.
+
+        :return: Path of the counter file.
+        :rtype: Path
+        """
+
+        return paths.STATE_PATH / COUNTER_FILE.format(name=self.name)
+
+    def load(self) -> Dict[str, Record]:
+        """Loads the records from the JSON file, once. Duplicate IDs and dates
+        left by older versions are fixed, and saved with the next change.
+
+        :return: The records keyed by ID, in insertion order.
+        :rtype: Dict[str, Record]
+        """
+
+        if self._records is None:
+            self._signature = tag_index.signature(self.tracked_paths())
+            records, snapshot_id = self.read_file()
+
+            try:
+                self._last_id = int(self.counter_path.read_text())
+            except (OSError, ValueError):
+                self._last_id = 0
+            self._saved_last_id = self._last_id
+            if snapshot_id is not None:
+                self._last_id = max(self._last_id, snapshot_id)
+                self._dirty = False
+            else:
+                for record in records:
+                    self.track_id(record["id"])
+                renumbered = self.renumber_duplicates(records)
+                self._dirty = self.upgrade_dates(records) or renumbered
+                if not self._dirty:
+                    self.snapshot_file(records)
+            self._records = {record["id"]: record for record in records}
+        return self._records
+
+    def reload(self) -> None:
+        """Drops the loaded records and any unsaved mutation."""
+
+        self._records = None
+        self._last_id = 0
+        self._dirty = False
+        self._index = None
+
+    def initialize(self) -> None:
+        """Creates the JSON file, empty, unless it exists. Nothing is
+        written while saves are deferred, e.g. by a batch."""
+
+        if self._deferring:
+            return
+        store_utils.create_json(self.path, [])
+        self._records = None
+
+    def all(self) -> List[Record]:
+        """Returns every record, in insertion order.
+
+        :return: The records.
+        :rtype: List[Record]
+        """
+
+        return list(self.load().values())
+
+    def get(self, record_id: str) -> Optional[Record]:
+        """Returns the record with the given ID.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: The record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+        return self.load().get(record_id)
+
+    @trace_utils.traced("store.mutate")
+    def add(self, record: Record) -> Record:
+        """Adds a record, assigning it a new ID.
+
+        :param record: The record, without an ID.
+        :type record: Record
+        :return: The stored record.
+        :rtype: Record
+        """
+
+        records = self.load()
+        self.get_tag_index()
+        record = {"id": self.allocate_id(), **record}
+        records[record["id"]] = record
+        self._dirty = True
+        self.reindex(record["id"], None, record)
+        self.mutated()
+        return record
+
+    @trace_utils.traced("store.mutate")
+    def update(self, record_id: str, changes: Record) -> Optional[Record]:
+        """Updates fields of a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :param changes: Fields to be updated.
+        :type changes: Record
+        :return: The updated record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+        record = self.get(record_id)
+        if record is not None:
+            if self.tag_field in changes:
+                self.get_tag_index()
+            old = dict(record)
+            record.update(changes)
+            self._dirty = True
+            if self.tag_field in changes:
+                self.reindex(record_id, old, record)
+        self.mutated()
+        return record
+
+    @trace_utils.traced("store.mutate")
+    def delete(self, record_id: str) -> bool:
+        """Deletes a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: True if the record existed.
+        :rtype: bool
+        """
+
+        records = self.load()
+        if record_id not in records:
+            return False
+        self.get_tag_index()
+        record = records.pop(record_id)
+        self._dirty = True
+        self.reindex(record_id, record, None)
+        self.mutated()
+        return True
+
+    def find(
+        self,
+        tag: Optional[str] = None,
+        status: Optional[str] = None,
+        due_before: Optional[str] = None,
+    ) -> List[Record]:
+        """Returns the records matching every given filter, in insertion order
+        (in ID order with a tag, which is looked up in the tag index).
+
+        :param tag: Tag (or group) the records must have.
+        :type tag: Optional[str]
+        :param status: Status the records must have.
+        :type status: Optional[str]
+        :param due_before: Date the records must be due before.
+        :type due_before: Optional[str]
+        :return: The matching records.
+        :rtype: List[Record]
+        """
+
+        records = self.all() if tag is None else self.find_tags([tag])
+        return [
+            record
+            for record in records
+            if self.matches(record, None, status, due_before)
+        ]
+
+    def save(self) -> bool:
+        """Rewrites the JSON file if the records were mutated, and the ID
+        counter if new IDs were allocated.
+
+        :return: True if the file content changed (while deferring, if the
+            records were mutated).
+        :rtype: bool
+        """
+
+        if self._deferring:
+            return self.report_mutations()
+        if not self._dirty:
+            return False
+        self._dirty = False
+        records = self.all()
+        written = store_utils.write_json(self.path, records)
+        if written:
+            self.save_snapshot(records)
+        self.save_index()
+
+        if self._last_id != self._saved_last_id:
+            paths.STATE_PATH.mkdir(parents=True, exist_ok=True)
+            store_utils.write_text(self.counter_path, str(self._last_id))
+            self._saved_last_id = self._last_id
+        return written
@@ -0,0 +1,234 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from ..utils import date_utils
+from .base import Record
+
+
+class Task:
+    """A task. Its dates are kept as stored, and parsed once when first used."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "date",
+        "due_date",
+        "priority",
+        "group",
+        "_added",
+        "_due",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        date: str,
+        due_date: str,
+        priority: str,
+        group: Any,
+        id: Optional[str] = None,
+    ) -> None:
+        """Initializes the task.
+
+        :param name: Name of the task.
+        :type name: str
+        :param date: Date the task was added, in the stored format.
+        :type date: str
+        :param due_date: Due date of the task, in the stored format.
+        :type due_date: str
+        :param priority: Priority of the task.
+        :type priority: str
+        :param group: Groups of the task.
+        :type group: Any
+        :param id: ID of the task, once stored.
+        :type id: Optional[str]
+        """
+
+        self.id = id
+        self.name = name
+        self.date = date
+        self.due_date = due_date
+        self.priority = priority
+        self.group = group
+        self._added = None  # type: Optional[datetime]
+        self._due = None  # type: Optional[datetime]
+
+    @classmethod
+    def from_record(cls, record: Record) -> "Task":
+        """Builds a task from its stored record.
+
+        :param record: The record.
+        :type record: Record
+        :return: The task.
+        :rtype: Task
+        """
+
+        return cls(
+            record["name"],
+            record["date"],
+            record["due_date"],
+            record["priority"],
+            record["group"],
+            record.get("id"),
+        )
+
+    def to_record(self) -> Record:
+        """Returns the stored record of the task, without its ID if it has none.
+
+        :return: The record.
+        :rtype: Record
+        """
+
+        record = {} if self.id is None else {"id": self.id}
+        record["name"] = self.name
+        record["date"] = self.date
+        record["due_date"] = self.due_date
+        record["priority"] = self.priority
+        record["group"] = self.group
+        return record
+
+    @property
+    def added(self) -> datetime:
+        """Date the task was added.
+
+        :return: The parsed date.
+        :rtype: datetime
+        """
+
+        if self._added is None:
+            self._added = date_utils.parse_stored(self.date)
+        return self._added
+
+    @property
+    def due(self) -> datetime:
+        """Due date of the task.
+
+        :return: The parsed date.
+        :rtype: datetime
+        """
+
+        if self._due is None:
+            self._due = date_utils.parse_stored(self.due_date)
+        return self._due
+
+
+class Card:
+    """A card of the kanban board."""
+
+    __slots__ = ("id", "name", "status", "description", "tags")
+
+    def __init__(
+        self,
+        name: str,
+        status: str,
+        description: str,
+        tags: List[str],
+        id: Optional[str] = None,
+    ) -> None:
+        """Initializes the card.
+
+        :param name: Name of the card.
+        :type name: str
+        :param status: Status of the card.
+        :type status: str
+        :param description: Description of the card, or the path of its file.
+        :type description: str
+        :param tags: Tags of the card.
+        :type tags: List[str]
+        :param id: ID of the card, once stored.
+        :type id: Optional[str]
+        """
+
+        self.id = id
+        self.name = name
+        self.status = status
+        self.description = description
+        self.tags = tags
+
+    @classmethod
+    def from_record(cls, record: Record) -> "Card":
+        """Builds a card from its stored record.
+
+        :param record: The record.
+        :type record: Record
+        :return: The card.
+        :rtype: Card
+        """
+
+        return cls(
+            record["name"],
+            record["status"],
+            record["description"],
+            record["tags"],
+            record.get("id"),
+        )
+
+    def to_record(self) -> Record:
+        """Returns the stored record of the card, without its ID if it has none.
+
+        :return: The record.
+        :rtype: Record
+        """
+
+        record = {} if self.id is None else {"id": self.id}
+        record["name"] = self.name
+        record["status"] = self.status
+        record["description"] = self.description
+        record["tags"] = self.tags
+        return record
+
+
+class Idea:
+    """An idea."""
+
+    __slots__ = ("id", "name", "description", "tags")
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        tags: List[str],
+        id: Optional[str] = None,
+    ) -> None:
+        """Initializes the idea.
+
+        :param name: Name of the idea.
+        :type name: str
+        :param description: Description of the idea, or the path of its file.
+        :type description: str
+        :param tags: Tags of the idea.
+        :type tags: List[str]
+        :param id: ID of the idea, once stored.
+        :type id: Optional[str]
+        """
+
+        self.id = id
+        self.name = name
+        self.description = description
+        self.tags = tags
+
+    @classmethod
+    def from_record(cls, record: Record) -> "Idea":
+        """Builds an idea from its stored record.
+
+        :param record: The record.
+        :type record: Record
+        :return: The idea.
+        :rtype: Idea
+        """
+
+        return cls(
+            record["name"], record["description"], record["tags"], record.get("id")
+        )
+
+    def to_record(self) -> Record:
+        """Returns the stored record of the idea, without its ID if it has none.
+
+        :return: The record.
+        :rtype: Record
+        """
+
+        record = {} if self.id is None else {"id": self.id}
+        record["name"] = self.name
+        record["description"] = self.description
+        record["tags"] = self.tags
+        return record
@@ -0,0 +1,150 @@
+import marshal
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ..config import paths
+from ..utils import store_utils
+
+# File in the cache directory holding the snapshot of a store.
+CACHE_FILE = "{name}.snapshot"
+
+# Version of the snapshot files; other versions are rebuilt. The marshal
+# format also depends on the version of Python.
+CACHE_VERSION = 1
+PYTHON_VERSION = list(sys.version_info[:2])
+
+# Length of the header, which precedes the header and then the records.
+HEADER_LENGTH = struct.Struct("<I")
+
+# Size, modification time and inode of a file, None if it is missing.
+FileSignature = Optional[List[int]]
+
+
+def content_digest(content: bytes) -> str:
+    """Hashes the content of a store file.
+
+    :param content: Content of the file.
+    :type content: bytes
+    :return: Hex digest of the content.
+    :rtype: str
+    """
+
+    hasher = store_utils.content_hasher()
+    hasher.update(content)
+    return hasher.hexdigest()
+
+
+class SnapshotCache:
+    """Records of the JSON file of a store, marshalled in the cache directory
+    along with the signature and hash of the file they were read from, and
+    their highest ID number. Only records needing no fix (duplicate IDs,
+    dates of older versions) are snapshotted. The JSON file stays the source
+    of truth: the snapshot is only used while it matches the file, and is
+    never committed."""
+
+    def __init__(self, name: str) -> None:
+        """Initializes the cache.
+
+        :param name: Name of the store (tasks, kanban or ideas).
+        :type name: str
+        """
+
+        self.path = paths.CACHE_PATH / CACHE_FILE.format(name=name)
+
+    def load(
+        self, expected: FileSignature, file_path: Path
+    ) -> Optional[Tuple[List[Any], int]]:
+        """Loads the records from the snapshot, if it was written from the
+        same file: same signature, or same content for a file rewritten
+        since (e.g. by a git checkout).
+
+        :param expected: Signature of the JSON file.
+        :type expected: FileSignature
+        :param file_path: Path of the JSON file.
+        :type file_path: Path
+        :return: The records and their highest ID number, or None if the
+            snapshot is missing or stale.
+        :rtype: Optional[Tuple[List[Any], int]]
+        """
+
+        # Snapshots are only read from the cache directory of the user, which
+        # absorb writes them to.
+        try:
+            content = self.path.read_bytes()
+            (length,) = HEADER_LENGTH.unpack_from(content)
+            start = HEADER_LENGTH.size + length
+            header = marshal.loads(content[HEADER_LENGTH.size : start])  # noqa: S302
+            if (
+                not isinstance(header, dict)
+                or header.get("version") != CACHE_VERSION
+                or header.get("python") != PYTHON_VERSION
+                or not isinstance(header.get("last_id"), int)
+                or expected is None
+            ):
+                return None
+            rewritten = header.get("signature") != expected
+            if rewritten and header.get("digest") != content_digest(
+                file_path.read_bytes()
+            ):
+                return None
+            # Loading from bytes is much faster than from the file object.
+            records = marshal.loads(memoryview(content)[start:])  # noqa: S302
+            if rewritten:
+                # Same content, rewritten: keep the new signature, so that the
+                # next loads don't hash the file again.
+                header["signature"] = expected
+                self.write(header, content[start:])
+            return records, header["last_id"]
+        except (OSError, EOFError, ValueError, TypeError, struct.error):
+            return None
+
+    def save(
+        self, records: List[Any], current: FileSignature, digest: str, last_id: int
+    ) -> None:
+        """Writes the snapshot.
+
+        :param records: Records of the JSON file.
+        :type records: List[Any]
+        :param current: Signature of the JSON file.
+        :type current: FileSignature
+        :param digest: Hash of the content of the JSON file.
+        :type digest: str
+        :param last_id: Highest ID number of the records.
+        :type last_id: int
+        """
+
+        header = {
+            "version": CACHE_VERSION,
+            "python": PYTHON_VERSION,
+            "signature": current,
+            "digest": digest,
+            "last_id": last_id,
+        }
+        try:
+            records_content = marshal.dumps(records)
+        except ValueError:
+            return
+        self.write(header, records_content)
+
+    def write(self, header: Dict[str, Any], records_content: bytes) -> None:
+        """Writes the snapshot file from its header and marshalled records.
+
+        :param header: The header.
+        :type header: Dict[str, Any]
+        :param records_content: The marshalled records.
+        :type records_content: bytes
+        """
+
+        try:
+            paths.CACHE_PATH.mkdir(parents=True, exist_ok=True)
+            header_content = marshal.dumps(header)
+            store_utils.write_text(
+                self.path,
+                HEADER_LENGTH.pack(len(header_content))
+                + header_content
+                + records_content,
+            )
+        except (OSError, ValueError):
+            # The snapshot only speeds up reads; the JSON file is still there.
+            pass
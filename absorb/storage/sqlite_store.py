@@ -0,0 +1,384 @@
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+from ..config import paths
+from ..utils import store_utils, trace_utils
+from . import tag_index
+from .base import STORE_FILES, Record, Store
+
+DATABASE_FILE = "absorb.db"
+
+# Connections by database path. The stores of a process share one
+# connection, so that one store's open transaction doesn't lock the others
+# out of the database.
+_connections = {}  # type: Dict[str, sqlite3.Connection]
+
+# Tables are named after the store, one of STORE_FILES, so the queries below
+# format their names in; values are always bound as parameters.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {name} (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    status TEXT,
+    due_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {name}_status ON {name} (status);
+CREATE INDEX IF NOT EXISTS {name}_due_date ON {name} (due_date);
+CREATE TABLE IF NOT EXISTS {name}_tags (
+    record_id TEXT NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {name}_tags_tag ON {name}_tags (tag, record_id);
+CREATE INDEX IF NOT EXISTS {name}_tags_record ON {name}_tags (record_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SQLiteStore(Store):
+    """Store kept in an SQLite database, with indexes on the ID, status, tags
+    and due date of the records. Lookups and mutations are point operations;
+    the JSON file is only written by `export`, before a commit. The highest
+    ID used is kept in the `meta` table."""
+
+    def __init__(self, name: str) -> None:
+        """Initializes the store, creating its tables if needed and importing
+        the records of its JSON file the first time.
+
+        :param name: Name of the store (tasks, kanban or ideas).
+        :type name: str
+        :raises ValueError: If the name isn't one of a store.
+        """
+
+        if name not in STORE_FILES:
+            raise ValueError(f"Unknown store: {name}")
+        super().__init__(name)
+        paths.ROOT_PATH.mkdir(parents=True, exist_ok=True)
+        database_path = str(paths.ROOT_PATH / DATABASE_FILE)
+        if database_path not in _connections:
+            _connections[database_path] = sqlite3.connect(database_path, timeout=30)
+        self.connection = _connections[database_path]
+        self._changed = False
+
+        with self.transaction():
+            self.connection.executescript(SCHEMA.format(name=name))
+            imported = self.connection.execute(
+                "SELECT value FROM meta WHERE key = ?", (f"imported:{name}",)
+            ).fetchone()
+            if imported is None:
+                self.import_json()
+            upgraded = self.connection.execute(
+                "SELECT value FROM meta WHERE key = ?", (f"dates:{name}",)
+            ).fetchone()
+            if upgraded is None:
+                self.migrate_dates()
+
+    def import_json(self) -> None:
+        """Imports the records of the JSON file, if it exists."""
+
+        try:
+            with self.path.open("r") as store_file:
+                records = json.load(store_file)
+        except FileNotFoundError:
+            records = []
+
+        for record in records:
+            self.track_id(record["id"])
+        self.renumber_duplicates(records)
+        for record in records:
+            self.insert(record)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (f"imported:{self.name}", "1"),
+        )
+        self.write_last_id()
+        self.connection.commit()
+
+    def migrate_dates(self) -> None:
+        """Rewrites in ISO 8601 the dates stored by older versions of absorb,
+        once per database."""
+
+        query = f"SELECT data FROM {self.name}"  # noqa: S608
+        rows = self.connection.execute(query).fetchall()
+        for (data,) in rows:
+            record = json.loads(data)
+            if self.upgrade_dates([record]):
+                self.connection.execute(
+                    f"UPDATE {self.name} SET due_date = ?, data = ? WHERE id = ?",  # noqa: S608
+                    (record.get("due_date"), json.dumps(record), record["id"]),
+                )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (f"dates:{self.name}", "iso"),
+        )
+        self.connection.commit()
+
+    def read_last_id(self) -> None:
+        """Loads the highest ID used from the `meta` table. Databases created
+        before the counter was kept fall back to the highest ID stored."""
+
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (f"last_id:{self.name}",)
+        ).fetchone()
+        if row is not None:
+            self._last_id = int(row[0])
+            return
+
+        self._last_id = 0
+        query = f"SELECT id FROM {self.name}"  # noqa: S608
+        for (record_id,) in self.connection.execute(query):
+            self.track_id(record_id)
+
+    def write_last_id(self) -> None:
+        """Stores the highest ID used in the `meta` table."""
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (f"last_id:{self.name}", str(self._last_id)),
+        )
+
+    def insert(self, record: Record) -> None:
+        """Inserts a record and its tags.
+
+        :param record: The record.
+        :type record: Record
+        """
+
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {self.name} (id, status, due_date, data) VALUES (?, ?, ?, ?)",  # noqa: S608
+            (
+                record["id"],
+                record.get("status"),
+                record.get("due_date"),
+                json.dumps(record),
+            ),
+        )
+        self.insert_tags(record)
+
+    def insert_tags(self, record: Record) -> None:
+        """Replaces the indexed tags of a record.
+
+        :param record: The record.
+        :type record: Record
+        """
+
+        self.connection.execute(
+            f"DELETE FROM {self.name}_tags WHERE record_id = ?",  # noqa: S608
+            (record["id"],),
+        )
+        self.connection.executemany(
+            f"INSERT INTO {self.name}_tags (record_id, tag) VALUES (?, ?)",  # noqa: S608
+            [
+                (record["id"], tag)
+                for tag in tag_index.record_tags(record, self.tag_field)
+            ],
+        )
+
+    def query(self, sql: str, parameters: Any = ()) -> List[Record]:
+        """Runs a query selecting the `data` column of records.
+
+        :param sql: The query.
+        :type sql: str
+        :param parameters: Parameters of the query.
+        :type parameters: Any
+        :return: The selected records.
+        :rtype: List[Record]
+        """
+
+        with trace_utils.span("store.read"):
+            rows = self.connection.execute(sql, parameters).fetchall()
+        with trace_utils.span("store.parse"):
+            return [json.loads(row[0]) for row in rows]
+
+    def reload(self) -> None:
+        """Nothing is loaded: every read queries the database, which already
+        sees the changes of other processes. The uncommitted mutations are
+        kept."""
+
+    def discard(self) -> None:
+        """Rolls back the uncommitted mutations."""
+
+        self.connection.rollback()
+        self._changed = False
+
+    def initialize(self) -> None:
+        """Creates the store, empty. The tables already exist."""
+
+    def all(self) -> List[Record]:
+        """Returns every record, in insertion order.
+
+        :return: The records.
+        :rtype: List[Record]
+        """
+
+        return self.query(f"SELECT data FROM {self.name} ORDER BY seq")  # noqa: S608
+
+    def get(self, record_id: str) -> Optional[Record]:
+        """Returns the record with the given ID.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: The record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+        query = f"SELECT data FROM {self.name} WHERE id = ?"  # noqa: S608
+        records = self.query(query, (record_id,))
+        return records[0] if records else None
+
+    @trace_utils.traced("store.mutate")
+    def add(self, record: Record) -> Record:
+        """Adds a record, assigning it a new ID.
+
+        :param record: The record, without an ID.
+        :type record: Record
+        :return: The stored record.
+        :rtype: Record
+        """
+
+        self.read_last_id()
+        record = {"id": self.allocate_id(), **record}
+        self.insert(record)
+        self.write_last_id()
+        self._changed = True
+        self.mutated()
+        return record
+
+    @trace_utils.traced("store.mutate")
+    def update(self, record_id: str, changes: Record) -> Optional[Record]:
+        """Updates fields of a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :param changes: Fields to be updated.
+        :type changes: Record
+        :return: The updated record, if it exists.
+        :rtype: Optional[Record]
+        """
+
+        record = self.get(record_id)
+        if record is None:
+            return None
+
+        updated = {**record, **changes}
+        if updated != record:
+            self.connection.execute(
+                f"UPDATE {self.name} SET status = ?, due_date = ?, data = ? WHERE id = ?",  # noqa: S608
+                (
+                    updated.get("status"),
+                    updated.get("due_date"),
+                    json.dumps(updated),
+                    record_id,
+                ),
+            )
+            if self.tag_field in changes:
+                self.insert_tags(updated)
+            self._changed = True
+            self.mutated()
+        return updated
+
+    @trace_utils.traced("store.mutate")
+    def delete(self, record_id: str) -> bool:
+        """Deletes a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :return: True if the record existed.
+        :rtype: bool
+        """
+
+        cursor = self.connection.execute(
+            f"DELETE FROM {self.name} WHERE id = ?", (record_id,)  # noqa: S608
+        )
+        if not cursor.rowcount:
+            return False
+        self.connection.execute(
+            f"DELETE FROM {self.name}_tags WHERE record_id = ?",  # noqa: S608
+            (record_id,),
+        )
+        self._changed = True
+        self.mutated()
+        return True
+
+    def find(
+        self,
+        tag: Optional[str] = None,
+        status: Optional[str] = None,
+        due_before: Optional[str] = None,
+    ) -> List[Record]:
+        """Returns the records matching every given filter, in insertion order.
+
+        :param tag: Tag (or group) the records must have.
+        :type tag: Optional[str]
+        :param status: Status the records must have.
+        :type status: Optional[str]
+        :param due_before: Date the records must be due before.
+        :type due_before: Optional[str]
+        :return: The matching records.
+        :rtype: List[Record]
+        """
+
+        conditions = []
+        parameters = []  # type: List[Any]
+        if tag is not None:
+            conditions.append(
+                f"id IN (SELECT record_id FROM {self.name}_tags WHERE tag = ?)"  # noqa: S608
+            )
+            parameters.append(tag)
+        if status is not None:
+            conditions.append("status = ?")
+            parameters.append(status)
+        if due_before is not None:
+            conditions.append("due_date < ?")
+            parameters.append(due_before)
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        query = f"SELECT data FROM {self.name}{where} ORDER BY seq"  # noqa: S608
+        return self.query(query, parameters)
+
+    def find_tags(self, tags: Sequence[str], match_all: bool = True) -> List[Record]:
+        """Returns the records having every given tag (or any of them),
+        through the index of the tags table.
+
+        :param tags: The tags (or groups).
+        :type tags: Sequence[str]
+        :param match_all: Require every tag rather than any of them.
+        :type match_all: bool
+        :return: The matching records, in insertion order.
+        :rtype: List[Record]
+        """
+
+        if not tags:
+            return []
+        placeholders = ", ".join("?" for _ in tags)
+        having = f" HAVING COUNT(DISTINCT tag) = {len(set(tags))}" if match_all else ""
+        return self.query(
+            f"SELECT data FROM {self.name} WHERE id IN "  # noqa: S608
+            f"(SELECT record_id FROM {self.name}_tags WHERE tag IN ({placeholders}) "
+            f"GROUP BY record_id{having}) ORDER BY seq",
+            list(tags),
+        )
+
+    def save(self) -> bool:
+        """Commits the pending mutations to the database.
+
+        :return: True if any record changed (while deferring, since the last
+            call).
+        :rtype: bool
+        """
+
+        if self._deferring:
+            return self.report_mutations()
+        with trace_utils.span("store.write"):
+            self.connection.commit()
+        changed, self._changed = self._changed, False
+        return changed
+
+    def export(self) -> None:
+        """Writes the records to the JSON file versioned in git, in insertion
+        order, in the same format as the JSON backend."""
+
+        store_utils.write_json(self.path, self.all())
@@ -0,0 +1,234 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from ..config import paths
+from ..utils import store_utils
+
+# File in the cache directory holding the tag index of a store.
+INDEX_FILE = "{name}.tags.json"
+
+# Version of the index file; other versions are rebuilt.
+INDEX_VERSION = 1
+
+# Size, modification time and inode of each file of a store, None for a
+# missing file.
+Signature = List[Optional[List[int]]]
+
+
+def stat_signature(stat_result: os.stat_result) -> List[int]:
+    """Returns the signature of a file from its status.
+
+    :param stat_result: Status of the file.
+    :type stat_result: os.stat_result
+    :return: Size, modification time and inode of the file.
+    :rtype: List[int]
+    """
+
+    return [stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino]
+
+
+def signature(file_paths: Sequence[Path]) -> Signature:
+    """Returns the signature of the files of a store.
+
+    :param file_paths: Paths of the files.
+    :type file_paths: Sequence[Path]
+    :return: The signature of each file.
+    :rtype: Signature
+    """
+
+    signatures = []  # type: Signature
+    for file_path in file_paths:
+        try:
+            signatures.append(stat_signature(os.stat(file_path)))
+        except FileNotFoundError:
+            signatures.append(None)
+    return signatures
+
+
+def digest(file_paths: Sequence[Path]) -> str:
+    """Hashes the content of the files of a store.
+
+    :param file_paths: Paths of the files.
+    :type file_paths: Sequence[Path]
+    :return: Hex digest of the files.
+    :rtype: str
+    """
+
+    hasher = store_utils.content_hasher()
+    for file_path in file_paths:
+        try:
+            hasher.update(Path(file_path).read_bytes())
+        except FileNotFoundError:
+            hasher.update(b"\0missing")
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def id_number(record_id: str) -> int:
+    """Returns the number of an ID, which orders records by insertion.
+
+    :param record_id: ID of a record.
+    :type record_id: str
+    :return: Number of the ID, -1 if it has none.
+    :rtype: int
+    """
+
+    number = record_id.lstrip("#")
+    return int(number) if number.isdigit() else -1
+
+
+class TagIndex:
+    """Inverted index from each tag to the IDs of the records having it,
+    persisted in the cache directory along with the signature and hash of the
+    store files it was built from."""
+
+    def __init__(self, name: str) -> None:
+        """Initializes an empty index.
+
+        :param name: Name of the store (tasks, kanban or ideas).
+        :type name: str
+        """
+
+        self.path = paths.CACHE_PATH / INDEX_FILE.format(name=name)
+        self.tags = {}  # type: Dict[str, Dict[str, None]]
+
+    def build(self, records: Iterable[Dict[str, Any]], tag_field: str) -> None:
+        """Indexes records from scratch.
+
+        :param records: The records.
+        :type records: Iterable[Dict[str, Any]]
+        :param tag_field: Field holding the tags of the records.
+        :type tag_field: str
+        """
+
+        self.tags = {}
+        for record in records:
+            self.add(record["id"], record_tags(record, tag_field))
+
+    def add(self, record_id: str, tags: Iterable[str]) -> None:
+        """Indexes tags of a record.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :param tags: The tags.
+        :type tags: Iterable[str]
+        """
+
+        for tag in tags:
+            self.tags.setdefault(tag, {})[record_id] = None
+
+    def remove(self, record_id: str, tags: Iterable[str]) -> None:
+        """Drops tags of a record from the index.
+
+        :param record_id: ID of the record.
+        :type record_id: str
+        :param tags: The tags.
+        :type tags: Iterable[str]
+        """
+
+        for tag in tags:
+            record_ids = self.tags.get(tag)
+            if record_ids is None:
+                continue
+            record_ids.pop(record_id, None)
+            if not record_ids:
+                del self.tags[tag]
+
+    def query(self, tags: Sequence[str], match_all: bool = True) -> List[str]:
+        """Returns the IDs of the records having every tag (or any of them),
+        looking only at the records of those tags.
+
+        :param tags: The tags.
+        :type tags: Sequence[str]
+        :param match_all: Require every tag rather than any of them.
+        :type match_all: bool
+        :return: The IDs, in ID order.
+        :rtype: List[str]
+        """
+
+        if not tags:
+            return []
+        tag_ids = [self.tags.get(tag, {}) for tag in tags]
+        if match_all:
+            smallest = min(tag_ids, key=len)
+            found = [
+                record_id
+                for record_id in smallest
+                if all(record_id in record_ids for record_ids in tag_ids)
+            ]
+        else:
+            found = list(set().union(*tag_ids))
+        return sorted(found, key=id_number)
+
+    def load(self, expected: Signature, file_paths: Sequence[Path]) -> bool:
+        """Loads the index from the cache, if it was built from the same store
+        files: same signature, or same content for an index saved with a hash.
+
+        :param expected: Signature of the store files the records were loaded
+            from.
+        :type expected: Signature
+        :param file_paths: Paths of the store files.
+        :type file_paths: Sequence[Path]
+        :return: True if the index was loaded.
+        :rtype: bool
+        """
+
+        try:
+            with self.path.open("r") as index_file:
+                content = json.load(index_file)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(content, dict) or content.get("version") != INDEX_VERSION:
+            return False
+
+        if content.get("signature") != expected:
+            if content.get("digest") is None or content["digest"] != digest(file_paths):
+                return False
+            # Same content, rewritten (e.g. by a git checkout).
+            content["signature"] = expected
+            store_utils.write_json(self.path, content)
+        elif content.get("digest") is None:
+            # Hashed once validated rather than on each save, so that saves
+            # (e.g. journal appends) don't read the whole store.
+            current_digest = digest(file_paths)
+            if signature(file_paths) == expected:
+                content["digest"] = current_digest
+                store_utils.write_json(self.path, content)
+
+        self.tags = {tag: dict.fromkeys(ids) for tag, ids in content["tags"].items()}
+        return True
+
+    def save(self, current: Signature) -> None:
+        """Writes the index to the cache. The hash of the store files is only
+        added by the first `load` validating it.
+
+        :param current: Signature of the store files the index matches.
+        :type current: Signature
+        """
+
+        paths.CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        store_utils.write_json(
+            self.path,
+            {
+                "version": INDEX_VERSION,
+                "signature": current,
+                "digest": None,
+                "tags": {tag: list(ids) for tag, ids in self.tags.items()},
+            },
+        )
+
+
+def record_tags(record: Dict[str, Any], tag_field: str) -> List[str]:
+    """Returns the tags of a record.
+
+    :param record: The record.
+    :type record: Dict[str, Any]
+    :param tag_field: Field holding the tags.
+    :type tag_field: str
+    :return: The tags.
+    :rtype: List[str]
+    """
+
+    tags = record.get(tag_field) or []
+    return [tags] if isinstance(tags, str) else list(tags)
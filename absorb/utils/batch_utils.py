@@ -0,0 +1,153 @@
+import json
+import shlex
+import sys
+from contextlib import ExitStack
+from typing import List, Optional
+import click
+from rich.console import Console
+from .. import storage
+from . import git_utils
+
+# Command groups which can be run in a batch.
+BATCHABLE = ("tasks", "kanban", "idea")
+
+console = Console()
+
+# Whether a batch is running its operations.
+_running = False
+
+
+def parse_operations(text: str) -> List[List[str]]:
+    """Parses the operations of a batch: either one absorb command per line
+    (blank lines and lines starting with `#` are skipped), or a JSON array whose items
+    are command lines or lists of arguments. The leading `absorb` of a
+    command is optional.
+
+    :param text: The batch.
+    :type text: str
+    :raises ValueError: If the batch can't be parsed or runs a command which
+        can't be batched.
+    :return: The arguments of each operation.
+    :rtype: List[List[str]]
+    """
+
+    if text.lstrip().startswith("["):
+        items = json.loads(text)
+    else:
+        items = [
+            line
+            for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+    operations = []
+    for number, item in enumerate(items, start=1):
+        if isinstance(item, str):
+            arguments = shlex.split(item)
+        elif isinstance(item, list) and all(isinstance(arg, str) for arg in item):
+            arguments = list(item)
+        else:
+            raise ValueError(f"Operation {number} should be a string or a list.")
+
+        if arguments[:1] == ["absorb"]:
+            arguments = arguments[1:]
+        if not arguments:
+            continue
+        if arguments[0] not in BATCHABLE:
+            raise ValueError(
+                f'Operation {number}: "{arguments[0]}" can\'t be batched, only '
+                + ", ".join(BATCHABLE)
+                + " commands can."
+            )
+        operations.append(arguments)
+    return operations
+
+
+def fail(message: Optional[str] = None) -> None:
+    """Fails the running operation of a batch, so that the batch is rolled
+    back. Commands call it when they couldn't do what was asked, e.g. for an
+    unknown ID; run on their own, they return normally as they always have.
+
+    :param message: Why the operation failed, unless the command said so.
+    :type message: Optional[str]
+    :rtype: None
+    """
+
+    if not _running:
+        return
+    if message is not None:
+        console.print(f":cross_mark: {message}")
+    sys.exit(-1)
+
+
+def run_operation(cli: click.Group, arguments: List[str]) -> bool:
+    """Runs one operation of a batch.
+
+    :param cli: The absorb command group.
+    :type cli: click.Group
+    :param arguments: Arguments of the operation.
+    :type arguments: List[str]
+    :return: True if the operation succeeded.
+    :rtype: bool
+    """
+
+    try:
+        cli.main(args=arguments, prog_name="absorb", standalone_mode=False)
+    except click.ClickException as e:
+        e.show()
+        return False
+    except click.Abort:
+        return False
+    except SystemExit as e:
+        return e.code in (0, None)
+    return True
+
+
+def run_batch(cli: click.Group, operations: List[List[str]]) -> Optional[int]:
+    """Runs the operations of a batch as one change. Every store is locked
+    and loaded once, the operations share the loaded records, and the
+    touched stores are saved and recorded once at the end. If an operation
+    fails, nothing is saved.
+
+    :param cli: The absorb command group.
+    :type cli: click.Group
+    :param operations: The arguments of each operation.
+    :type operations: List[List[str]]
+    :raises BaseException: Whatever an operation raised, once the stores
+        are rolled back.
+    :return: The number of the failed operation, or None if every operation
+        succeeded.
+    :rtype: Optional[int]
+    """
+
+    global _running
+    stores = {name: storage.get_store(name) for name in storage.STORE_FILES}
+    with ExitStack() as locks:
+        # Always lock in the same order, so batches can't deadlock.
+        for name in sorted(stores):
+            locks.enter_context(stores[name].transaction())
+
+        with storage.shared(stores), git_utils.deferred() as changes:
+            for store in stores.values():
+                store.defer()
+            _running = True
+            try:
+                for number, arguments in enumerate(operations, start=1):
+                    if not run_operation(cli, arguments):
+                        for store in stores.values():
+                            store.discard()
+                        return number
+            except BaseException:
+                for store in stores.values():
+                    store.discard()
+                raise
+            finally:
+                _running = False
+                for store in stores.values():
+                    store.defer(False)
+
+            for store in stores.values():
+                store.save()
+
+        git_utils.record_changes(changes)
+    return None
@@ -0,0 +1,22 @@
+"""Background worker for the `async` commit strategy.
+
+Started by `git_utils.spawn_worker` as a detached process; it commits every
+queued change in order and exits.
+"""
+
+import sys
+from .git_utils import drain_queue
+
+
+def main() -> int:
+    """Drains the commit queue.
+
+    :return: Exit code of the worker.
+    :rtype: int
+    """
+
+    return 0 if drain_queue() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Any, Dict
+
+# Fields of the records holding dates.
+DATE_FIELDS = ("date", "due_date")
+
+# Length of a date in the stored format, e.g. `2024-01-31T18:30:00.000000`.
+STORED_LENGTH = 26
+
+
+def format_date(date: datetime) -> str:
+    """Returns a date in the stored format: ISO 8601, always with
+    microseconds, so that stored dates have a fixed width and compare
+    chronologically as strings.
+
+    :param date: The date.
+    :type date: datetime
+    :return: The stored date.
+    :rtype: str
+    """
+
+    return date.isoformat(timespec="microseconds")
+
+
+def parse_stored(value: str) -> datetime:
+    """Parses a stored date. Dates stored by older versions of absorb
+    (`2024-01-31 18:30:00.000000`) are accepted too. A value which isn't an
+    ISO 8601 date raises a ValueError.
+
+    :param value: The stored date.
+    :type value: str
+    :return: The date.
+    :rtype: datetime
+    """
+
+    return datetime.fromisoformat(value)
+
+
+def is_stored(value: Any) -> bool:
+    """Checks whether a value is a date in the stored format, without parsing
+    it.
+
+    :param value: The value.
+    :type value: Any
+    :return: True if the value is in the stored format.
+    :rtype: bool
+    """
+
+    return isinstance(value, str) and len(value) == STORED_LENGTH and value[10] == "T"
+
+
+def upgrade_record(record: Dict[str, Any]) -> bool:
+    """Rewrites the dates of a record which aren't in the stored format. Values
+    which aren't dates at all are left as they are.
+
+    :param record: The record.
+    :type record: Dict[str, Any]
+    :return: True if any date was rewritten.
+    :rtype: bool
+    """
+
+    upgraded = False
+    for field in DATE_FIELDS:
+        value = record.get(field)
+        if value is None or is_stored(value):
+            continue
+        try:
+            record[field] = format_date(parse_stored(value))
+        except (TypeError, ValueError):
+            continue
+        upgraded = True
+    return upgraded
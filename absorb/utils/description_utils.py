@@ -0,0 +1,266 @@
+import json
+import mmap
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from rich.console import Console
+from . import log_utils, store_utils, trace_utils
+from ..config import paths
+
+# File in the cache directory holding the description cache.
+CACHE_FILE = "descriptions.json"
+
+# Version of the cache file; other versions are discarded.
+CACHE_VERSION = 2
+
+# Threads checking and reading description files.
+WORKERS = 8
+
+# Size from which previews are read through a memory map, without reading
+# the rest of the file.
+MMAP_THRESHOLD = 1 << 20
+
+# Texts longer than this are read again each time rather than cached.
+MAX_CACHED_LENGTH = 1 << 12
+
+# Total length of the cached texts; the least recently used are evicted
+# beyond it.
+MAX_CACHE_SIZE = 1 << 20
+
+# Line ending a truncated preview.
+TRUNCATED = "…"
+
+console = Console()
+
+
+class Lookup(NamedTuple):
+    """Outcome of resolving a description: its text, and the cache entry to
+    store under its key (None if the text isn't cached)."""
+
+    text: str
+    key: Optional[str]
+    entry: Optional[List]
+    error: Optional[OSError]
+
+
+def description_path(description: Optional[str]) -> Optional[Path]:
+    """Returns the file a description names, if it names an existing file.
+
+    :param description: The description of a card or an idea.
+    :type description: Optional[str]
+    :return: Path of the file.
+    :rtype: Optional[Path]
+    """
+
+    if not description or description == ".":
+        return None
+    path = Path(description)
+    return path if path.is_file() else None
+
+
+def read_head(path: Path, lines: int) -> str:
+    """Reads the first lines of a large file through a memory map.
+
+    :param path: Path of the file.
+    :type path: Path
+    :param lines: Number of lines.
+    :type lines: int
+    :return: The lines, followed by a truncation mark if the file has more.
+    :rtype: str
+    """
+
+    with path.open("rb") as description_file:
+        with mmap.mmap(description_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = 0
+            for _ in range(lines):
+                end = mapped.find(b"\n", end) + 1
+                if not end:
+                    end = len(mapped)
+                    break
+            head = mapped[:end].decode(errors="replace")
+            return head + TRUNCATED if end < len(mapped) else head
+
+
+def read_text(path: Path, size: int, lines: Optional[int] = None) -> str:
+    """Reads a description file, or its first lines.
+
+    :param path: Path of the file.
+    :type path: Path
+    :param size: Size of the file.
+    :type size: int
+    :param lines: Number of lines to read, all by default.
+    :type lines: Optional[int]
+    :return: The content of the file, followed by a truncation mark if only
+        its first lines were read.
+    :rtype: str
+    """
+
+    if lines is None:
+        with path.open("r") as description_file:
+            return description_file.read()
+    if size >= MMAP_THRESHOLD:
+        return read_head(path, lines)
+    with path.open("r") as description_file:
+        head = "".join(islice(description_file, lines))
+        return head + TRUNCATED if description_file.read(1) else head
+
+
+class DescriptionCache:
+    """Texts of description files, persisted in the cache directory and keyed
+    by path and number of lines. An entry is used while the size and
+    modification time of its file are unchanged. Entries are kept from the
+    least to the most recently used, and the least recently used are evicted
+    once the cached texts exceed MAX_CACHE_SIZE."""
+
+    def __init__(self) -> None:
+        """Initializes an empty cache."""
+
+        self.path = paths.CACHE_PATH / CACHE_FILE
+        self.entries = {}  # type: Dict[str, List]
+        self.size = 0
+        self.changed = False
+
+    def load(self) -> None:
+        """Loads the cache, if it exists and is readable."""
+
+        try:
+            with self.path.open("r") as cache_file:
+                content = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        if isinstance(content, dict) and content.get("version") == CACHE_VERSION:
+            self.entries = content["entries"]
+            self.size = sum(len(entry[2]) for entry in self.entries.values())
+
+    def save(self) -> None:
+        """Writes the cache, if it changed."""
+
+        if not self.changed:
+            return
+        paths.CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        store_utils.write_json(
+            self.path, {"version": CACHE_VERSION, "entries": self.entries}
+        )
+        self.changed = False
+
+    def lookup(self, description: str, lines: Optional[int]) -> Lookup:
+        """Resolves a description, reading its file unless the cache holds it.
+        Safe to call from several threads.
+
+        :param description: The description.
+        :type description: str
+        :param lines: Number of lines to read, all by default.
+        :type lines: Optional[int]
+        :return: The text to display, and the cache entry to store.
+        :rtype: Lookup
+        """
+
+        key = f"{lines}:{os.path.abspath(description)}"
+        try:
+            stat_result = os.stat(description)
+        except OSError:
+            return Lookup(description, key, None, None)
+        if not stat.S_ISREG(stat_result.st_mode):
+            return Lookup(description, key, None, None)
+
+        signature = [stat_result.st_size, stat_result.st_mtime_ns]
+        entry = self.entries.get(key)
+        if entry is not None and entry[:2] == signature:
+            return Lookup(entry[2], key, entry, None)
+
+        try:
+            text = read_text(Path(description), stat_result.st_size, lines)
+        except OSError as e:
+            return Lookup(description, key, None, e)
+        if len(text) > MAX_CACHED_LENGTH:
+            return Lookup(text, key, None, None)
+        return Lookup(text, key, signature + [text], None)
+
+    def store(self, key: str, entry: Optional[List]) -> None:
+        """Stores an entry as the most recently used, or removes it, and evicts
+        the least recently used entries beyond MAX_CACHE_SIZE.
+
+        :param key: Key of the entry.
+        :type key: str
+        :param entry: The entry, None to remove it.
+        :type entry: Optional[List]
+        """
+
+        current = self.entries.pop(key, None)
+        if current is not None:
+            self.size -= len(current[2])
+        if entry is None:
+            self.changed = self.changed or current is not None
+            return
+        self.entries[key] = entry
+        self.size += len(entry[2])
+        self.changed = self.changed or current is not entry
+        while self.size > MAX_CACHE_SIZE:
+            evicted = self.entries.pop(next(iter(self.entries)))
+            self.size -= len(evicted[2])
+            self.changed = True
+
+    def resolve(
+        self, descriptions: Iterable[str], lines: Optional[int] = None
+    ) -> Dict[str, str]:
+        """Resolves descriptions, checking and reading their files concurrently.
+
+        :param descriptions: The descriptions.
+        :type descriptions: Iterable[str]
+        :param lines: Number of lines to read from each file, all by default.
+        :type lines: Optional[int]
+        :return: The text to display for each description: the content of its
+            file, or the description itself if it doesn't name a file.
+        :rtype: Dict[str, str]
+        """
+
+        texts = {description: description for description in descriptions}
+        unique = [
+            description for description in texts if description and description != "."
+        ]
+        if len(unique) > 1:
+            with ThreadPoolExecutor(min(WORKERS, len(unique))) as executor:
+                lookups = list(
+                    executor.map(lambda item: self.lookup(item, lines), unique)
+                )
+        else:
+            lookups = [self.lookup(description, lines) for description in unique]
+
+        order = list(self.entries)
+        for description, lookup in zip(unique, lookups):
+            texts[description] = lookup.text
+            if lookup.error is not None:
+                log_utils.get_logger().error(lookup.error)
+                console.print(
+                    ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
+                )
+                continue
+            if lookup.key is not None:
+                self.store(lookup.key, lookup.entry)
+        # Only saves the cache for hits if they changed the order of use.
+        self.changed = self.changed or list(self.entries) != order
+        return texts
+
+
+@trace_utils.traced("descriptions.read")
+def read_descriptions(
+    descriptions: Iterable[str], lines: Optional[int] = None
+) -> Dict[str, str]:
+    """Resolves descriptions through the description cache.
+
+    :param descriptions: The descriptions.
+    :type descriptions: Iterable[str]
+    :param lines: Number of lines to read from each file, all by default.
+    :type lines: Optional[int]
+    :return: The text to display for each description.
+    :rtype: Dict[str, str]
+    """
+
+    cache = DescriptionCache()
+    cache.load()
+    texts = cache.resolve(descriptions, lines)
+    cache.save()
+    return texts
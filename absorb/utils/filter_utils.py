@@ -0,0 +1,105 @@
+from typing import Any, Dict, Iterable, List, Optional
+import click
+from rich.console import Console
+from . import batch_utils
+
+console = Console()
+
+
+def selection_filters(record_id: str, **filters: Optional[str]) -> Dict[str, Any]:
+    """Checks the selection of a command acting on records: either an ID, or
+    the ID `.` with at least one filter. Tags may be given with their `@`.
+
+    :param record_id: ID given to the command.
+    :type record_id: str
+    :param filters: Filters given to the command; unset filters are None.
+    :type filters: Optional[str]
+    :raises UsageError: If the selection is ambiguous or empty.
+    :return: The filters, ready for `Store.select`.
+    :rtype: Dict[str, Any]
+    """
+
+    given = {name: value for name, value in filters.items() if value is not None}
+    if record_id != "." and given:
+        raise click.UsageError('Filters can only be used with the ID ".".')
+    if record_id == "." and not given:
+        raise click.UsageError('Give an ID, or the ID "." with at least one filter.')
+
+    if "tag" in given:
+        given["tag"] = given["tag"].lstrip("@")
+    return given
+
+
+def tag_list(values: Iterable[str]) -> List[str]:
+    """Returns the tags given to a tag query, each value holding one or more
+    tags separated by spaces or commas, with or without their `@`.
+
+    :param values: Values given to the command.
+    :type values: Iterable[str]
+    :return: The tags.
+    :rtype: List[str]
+    """
+
+    words = " ".join(values).replace(",", " ").split()
+    return [word.lstrip("@") for word in words if word.lstrip("@")]
+
+
+def describe(record_id: str, records: List[Any], singular: str, plural: str) -> str:
+    """Names the records a command acted on, for its messages.
+
+    :param record_id: ID given to the command.
+    :type record_id: str
+    :param records: The selected records.
+    :type records: List[Any]
+    :param singular: Name of one record, e.g. `Task`.
+    :type singular: str
+    :param plural: Name of several records, e.g. `tasks`.
+    :type plural: str
+    :return: e.g. `Task #1`, `1 task` or `3 tasks`.
+    :rtype: str
+    """
+
+    if record_id != ".":
+        return f"{singular} {record_id}"
+    if len(records) == 1:
+        return f"1 {singular.lower()}"
+    return f"{len(records)} {plural}"
+
+
+def report_matches(records: List[Any], plural: str) -> None:
+    """Prints how many records matched, for a dry run.
+
+    :param records: The selected records.
+    :type records: List[Any]
+    :param plural: Name of several records, e.g. `tasks`.
+    :type plural: str
+    :rtype: None
+    """
+
+    ids = ", ".join(record["id"] for record in records)
+    console.print(f":mag: {len(records)} {plural} match{': ' + ids if ids else '.'}")
+
+
+def require_matches(
+    record_id: str, records: List[Any], singular: str, plural: str
+) -> None:
+    """Fails the operation of a running batch if the command selected no
+    record, so that an unknown ID or filters matching nothing roll it back.
+
+    :param record_id: ID given to the command.
+    :type record_id: str
+    :param records: The selected records.
+    :type records: List[Any]
+    :param singular: Name of one record, e.g. `Task`.
+    :type singular: str
+    :param plural: Name of several records, e.g. `tasks`.
+    :type plural: str
+    :rtype: None
+    """
+
+    if records:
+        return
+    if record_id != ".":
+        batch_utils.fail(f"{singular} {record_id} doesn't exist.")
+    else:
+        batch_utils.fail(f"No {plural} match.")
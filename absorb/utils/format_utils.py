@@ -0,0 +1,249 @@
+import csv
+import json
+import sys
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+import click
+from . import date_utils, description_utils, render_utils, trace_utils
+
+# Output formats of the show and open commands. `table` is rendered by rich;
+# the others are written directly, a chunk of records at a time.
+FORMATS = ("table", "json", "ndjson", "csv")
+
+# Fields of the stored records, by store, in output order.
+STORED_FIELDS = {
+    "tasks": ("id", "name", "date", "due_date", "priority", "group"),
+    "kanban": ("id", "name", "status", "description", "tags"),
+    "ideas": ("id", "name", "description", "tags"),
+}
+
+# Fields computed from the records, by store. They are only computed when
+# they are output.
+COMPUTED_FIELDS = {
+    "tasks": ("due_in_seconds", "overdue"),
+    "kanban": ("description_text",),
+    "ideas": ("description_text",),
+}
+
+Record = Dict[str, Any]
+
+
+def split_fields(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[Tuple[str, ...]]:
+    """Parses the `--fields` option: field names separated by commas.
+
+    :param ctx: Context of the command.
+    :type ctx: click.Context
+    :param param: The option.
+    :type param: click.Parameter
+    :param value: Value given to the option.
+    :type value: Optional[str]
+    :raises BadParameter: If the option names no field.
+    :return: The field names, or None if the option wasn't given.
+    :rtype: Optional[Tuple[str, ...]]
+    """
+
+    if value is None:
+        return None
+    fields = tuple(field.strip() for field in value.split(",") if field.strip())
+    if not fields:
+        raise click.BadParameter("Give at least one field.", ctx, param)
+    return fields
+
+
+def formatted(
+    store: str, computed: Sequence[str] = ()
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Adds the `--format` and `--fields` options to a command showing the
+    records of a store.
+
+    :param store: Name of the store (tasks, kanban or ideas).
+    :type store: str
+    :param computed: Computed fields output by default, after the stored
+        fields.
+    :type computed: Sequence[str]
+    :return: The decorator.
+    :rtype: Callable[[Callable[..., Any]], Callable[..., Any]]
+    """
+
+    known = STORED_FIELDS[store] + COMPUTED_FIELDS[store]
+    defaults = STORED_FIELDS[store] + tuple(computed)
+
+    def resolve_fields(
+        ctx: click.Context, param: click.Parameter, value: Optional[str]
+    ) -> Tuple[str, ...]:
+        fields = split_fields(ctx, param, value)
+        if fields is None:
+            return defaults
+        unknown = [field for field in fields if field not in known]
+        if unknown:
+            raise click.BadParameter(
+                f"Unknown field {', '.join(unknown)}; the fields are "
+                f"{', '.join(known)}.",
+                ctx,
+                param,
+            )
+        return fields
+
+    def decorator(command: Callable[..., Any]) -> Callable[..., Any]:
+        command = click.option(
+            "--fields",
+            callback=resolve_fields,
+            help="Fields output by the json, ndjson and csv formats, separated "
+            f"by commas: {', '.join(known)}. Defaults to {', '.join(defaults)}.",
+        )(command)
+        return click.option(
+            "--format",
+            "output_format",
+            type=click.Choice(FORMATS),
+            default="table",
+            show_default=True,
+            help="Output format: a table, or records as JSON, JSON Lines "
+            "(ndjson) or CSV.",
+        )(command)
+
+    return decorator
+
+
+class Projection:
+    """Builds the output of records: their fields, stored or computed. The
+    current time is taken once, and description files are read through the
+    description cache, a chunk of records at a time."""
+
+    def __init__(self, fields: Sequence[str], lines: Optional[int] = None) -> None:
+        """Initializes the projection.
+
+        :param fields: Fields to output.
+        :type fields: Sequence[str]
+        :param lines: Number of lines read from each description file, all by
+            default.
+        :type lines: Optional[int]
+        """
+
+        self.fields = fields
+        self.lines = lines
+        self.now = datetime.now()
+        self.cache = None  # type: Optional[description_utils.DescriptionCache]
+        if "description_text" in fields:
+            self.cache = description_utils.DescriptionCache()
+            self.cache.load()
+
+    def project(self, records: List[Record]) -> List[Record]:
+        """Builds the output of a chunk of records.
+
+        :param records: The records.
+        :type records: List[Record]
+        :return: The fields of each record, in order.
+        :rtype: List[Record]
+        """
+
+        texts = {}  # type: Dict[str, str]
+        if self.cache is not None:
+            texts = self.cache.resolve(
+                (record.get("description") or "" for record in records), self.lines
+            )
+        projected = []
+        for record in records:
+            due_in = None
+            if "due_in_seconds" in self.fields or "overdue" in self.fields:
+                due = date_utils.parse_stored(record["due_date"])
+                due_in = int((due - self.now).total_seconds())
+            computed = {
+                "due_in_seconds": due_in,
+                "overdue": due_in is not None and due_in < 0,
+                "description_text": texts.get(record.get("description") or ""),
+            }
+            projected.append(
+                {
+                    field: computed[field] if field in computed else record.get(field)
+                    for field in self.fields
+                }
+            )
+        return projected
+
+    def close(self) -> None:
+        """Saves the description cache, if descriptions were read."""
+
+        if self.cache is not None:
+            self.cache.save()
+
+
+def csv_value(value: Any) -> Any:
+    """Returns the CSV cell of a value: lists (e.g. tags) are separated by
+    spaces, as `import` reads them, and booleans are written as in JSON.
+
+    :param value: The value.
+    :type value: Any
+    :return: The cell.
+    :rtype: Any
+    """
+
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+@trace_utils.traced("render")
+def write_records(
+    records: Iterable[Record],
+    output_format: str,
+    fields: Sequence[str],
+    lines: Optional[int] = None,
+    stream: Optional[TextIO] = None,
+) -> None:
+    """Writes records as JSON, JSON Lines (ndjson) or CSV, a chunk at a time,
+    without rendering a table.
+
+    :param records: The records, in output order.
+    :type records: Iterable[Record]
+    :param output_format: `json`, `ndjson` or `csv`.
+    :type output_format: str
+    :param fields: Fields to output, stored or computed.
+    :type fields: Sequence[str]
+    :param lines: Number of lines read from each description file, for the
+        description_text field; all by default.
+    :type lines: Optional[int]
+    :param stream: Stream written to, standard output by default.
+    :type stream: Optional[TextIO]
+    :rtype: None
+    """
+
+    if stream is None:
+        stream = sys.stdout
+    projection = Projection(fields, lines)
+    encode = json.JSONEncoder().encode
+    writer = None
+    if output_format == "csv":
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(fields)
+    elif output_format == "json":
+        stream.write("[")
+
+    separator = "\n"
+    for chunk in render_utils.chunked(records):
+        projected = projection.project(chunk)
+        if writer is not None:
+            writer.writerows(
+                [csv_value(output[field]) for field in fields] for output in projected
+            )
+        elif output_format == "json":
+            stream.write(separator + ",\n".join(map(encode, projected)))
+            separator = ",\n"
+        else:
+            stream.write("".join(encode(output) + "\n" for output in projected))
+    if output_format == "json":
+        stream.write("\n]\n" if separator != "\n" else "]\n")
+    projection.close()
@@ -0,0 +1,472 @@
+import atexit
+import json
+import os
+import shutil
+import subprocess  # noqa: S404
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from ..config import paths, settings
+from . import lock_utils, log_utils, store_utils, trace_utils
+
+STRATEGIES = ("per-op", "batch", "on-exit", "async", "off")
+PENDING_FILE = "pending-commits.json"
+QUEUE_FILE = "commit-queue.jsonl"
+QUEUE_LOCK = "commit-queue.lock"
+WORKER_LOCK = "commit-worker.lock"
+GIT_LOCK = "git.lock"
+STATUS_FILE = "commit-status.json"
+SPOOL_DIR = "spool"
+
+# Shared repository handle, opened on the first commit.
+_repo = None  # type: Optional[Any]
+
+# Changes waiting for the end of the process (on-exit strategy).
+_exit_changes = []  # type: List[Dict[str, Any]]
+_exit_hook_registered = False
+
+# Changes held back by `deferred`, to be recorded as one.
+_deferred_changes = None  # type: Optional[List[Dict[str, Any]]]
+
+
+def get_repo() -> Any:
+    """Returns the git repository for the absorb directory, opening (or
+    initializing) it on first use.
+
+    :return: The git repository, a `git.Repo`.
+    :rtype: Any
+    """
+
+    global _repo
+    if _repo is None:
+        import git
+
+        try:
+            _repo = git.Repo(str(paths.REPO_PATH))
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+            _repo = git.Repo.init(str(paths.REPO_PATH))
+    return _repo
+
+
+def commit(file_paths: Iterable[Any], message: str) -> bool:
+    """Adds the files to the index and commits them. Nothing is committed if
+    the files are unchanged since the last commit.
+
+    :param file_paths: Paths of the files to be committed.
+    :type file_paths: Iterable[Any]
+    :param message: Commit message.
+    :type message: str
+    :return: True if a commit was created.
+    :rtype: bool
+    """
+
+    from .. import storage
+
+    file_paths = [str(file_path) for file_path in file_paths]
+    with lock_utils.file_lock(paths.STATE_PATH / GIT_LOCK):
+        storage.export(file_paths)
+        with trace_utils.span("git.add"):
+            repo = get_repo()
+            repo.index.add(file_paths)
+        with trace_utils.span("git.commit"):
+            if repo.head.is_valid() and not repo.index.diff("HEAD"):
+                return False
+            repo.index.commit(message)
+    return True
+
+
+def commit_changes(changes: List[Dict[str, Any]]) -> bool:
+    """Commits a list of recorded changes as a single commit.
+
+    :param changes: Changes, each with the `paths` it touched and a `message`.
+    :type changes: List[Dict[str, Any]]
+    :return: True if a commit was created.
+    :rtype: bool
+    """
+
+    if not changes:
+        return False
+
+    return commit(changes_paths(changes), changes_message(changes))
+
+
+def changes_paths(changes: List[Dict[str, Any]]) -> List[str]:
+    """Returns every file touched by a list of changes.
+
+    :param changes: Changes, each with the `paths` it touched and a `message`.
+    :type changes: List[Dict[str, Any]]
+    :return: Paths of the files, sorted.
+    :rtype: List[str]
+    """
+
+    return sorted({path for change in changes for path in change["paths"]})
+
+
+def changes_message(changes: List[Dict[str, Any]]) -> str:
+    """Returns the commit message for a list of changes.
+
+    :param changes: Changes, each with the `paths` it touched and a `message`.
+    :type changes: List[Dict[str, Any]]
+    :return: The message of the change, or a summary listing every message.
+    :rtype: str
+    """
+
+    if len(changes) == 1:
+        return changes[0]["message"]
+    return f"Batched {len(changes)} changes.\n\n" + "\n".join(
+        f"- {change['message']}" for change in changes
+    )
+
+
+@contextmanager
+def deferred():
+    # type: () -> Iterator[List[Dict[str, Any]]]
+    """Holds back the changes recorded in the block instead of committing
+    them, so that the caller can record them as one with `record_changes`.
+
+    :yield: The changes recorded so far.
+    :rtype: Iterator[List[Dict[str, Any]]]
+    """
+
+    global _deferred_changes
+    _deferred_changes = []
+    try:
+        yield _deferred_changes
+    finally:
+        _deferred_changes = None
+
+
+def record_changes(changes: List[Dict[str, Any]]) -> None:
+    """Records a list of changes as a single change.
+
+    :param changes: Changes, each with the `paths` it touched and a `message`.
+    :type changes: List[Dict[str, Any]]
+    :rtype: None
+    """
+
+    if changes:
+        record(changes_paths(changes), changes_message(changes))
+
+
+def read_pending() -> Dict[str, Any]:
+    """Reads the changes waiting for a batched commit.
+
+    :return: Pending changes and the time the oldest one was recorded.
+    :rtype: Dict[str, Any]
+    """
+
+    try:
+        with (paths.STATE_PATH / PENDING_FILE).open("r") as pending_file:
+            return json.load(pending_file)
+    except (OSError, ValueError):
+        return {"created": time.time(), "changes": []}
+
+
+def flush_pending() -> bool:
+    """Commits every change waiting for a batched commit.
+
+    :return: True if a commit was created.
+    :rtype: bool
+    """
+
+    with lock_utils.file_lock(paths.STATE_PATH / GIT_LOCK):
+        pending = read_pending()
+        committed = commit_changes(pending["changes"])
+        try:
+            (paths.STATE_PATH / PENDING_FILE).unlink()
+        except FileNotFoundError:
+            pass
+    return committed
+
+
+def flush_overdue() -> bool:
+    """Commits the changes waiting for a batched commit if the oldest is
+    `commit_batch_interval` seconds old. Every absorb command runs it, so that
+    a batch below `commit_batch_size` doesn't wait for the next change.
+
+    :return: True if a commit was created.
+    :rtype: bool
+    """
+
+    # Most commands only pay for this check.
+    if not (paths.STATE_PATH / PENDING_FILE).exists():
+        return False
+    pending = read_pending()
+    batch_age = time.time() - pending["created"]
+    if not pending["changes"] or batch_age < settings.get_setting(
+        "commit_batch_interval"
+    ):
+        return False
+    return flush_pending()
+
+
+def flush_exit_changes() -> None:
+    """Commits the changes recorded with the on-exit strategy."""
+
+    changes = list(_exit_changes)
+    _exit_changes.clear()
+    commit_changes(changes)
+
+
+def record(file_paths: Iterable[Any], message: str) -> None:
+    """Records a change to the files, committing it according to the
+    `commit_strategy` setting:
+
+    - `per-op` commits every change immediately.
+    - `batch` coalesces changes into one commit once `commit_batch_size`
+      changes are pending or the oldest is `commit_batch_interval` seconds old.
+    - `on-exit` commits every change of the process once, when it exits.
+    - `async` snapshots the files and leaves the commit to a background worker.
+    - `off` doesn't commit at all.
+
+    :param file_paths: Paths of the files which have changed.
+    :type file_paths: Iterable[Any]
+    :param message: Commit message for the change.
+    :type message: str
+    :rtype: None
+    """
+
+    global _exit_hook_registered
+
+    if _deferred_changes is not None:
+        _deferred_changes.append(
+            {"paths": [str(file_path) for file_path in file_paths], "message": message}
+        )
+        return
+
+    strategy = settings.get_setting("commit_strategy")
+    if strategy not in STRATEGIES:
+        log_utils.get_logger().warning(
+            f'Unknown commit strategy "{strategy}", committing per operation.'
+        )
+    change = {"paths": [str(file_path) for file_path in file_paths], "message": message}
+
+    if strategy == "off":
+        return
+
+    if strategy == "on-exit":
+        if not _exit_hook_registered:
+            atexit.register(flush_exit_changes)
+            _exit_hook_registered = True
+        _exit_changes.append(change)
+        return
+
+    if strategy == "async":
+        enqueue(change)
+        spawn_worker()
+        return
+
+    if strategy == "batch":
+        with lock_utils.file_lock(paths.STATE_PATH / GIT_LOCK):
+            pending = read_pending()
+            pending["changes"].append(change)
+            store_utils.write_json(paths.STATE_PATH / PENDING_FILE, pending)
+
+            batch_age = time.time() - pending["created"]
+            if len(pending["changes"]) >= settings.get_setting(
+                "commit_batch_size"
+            ) or batch_age >= settings.get_setting("commit_batch_interval"):
+                flush_pending()
+        return
+
+    commit_changes([change])
+
+
+def enqueue(change: Dict[str, Any]) -> None:
+    """Snapshots the changed files into the spool directory and appends the
+    change to the commit queue, to be committed by the background worker.
+
+    :param change: Change with the `paths` it touched and a `message`.
+    :type change: Dict[str, Any]
+    :rtype: None
+    """
+
+    from .. import storage
+
+    storage.export(change["paths"])
+    spool_path = paths.STATE_PATH / SPOOL_DIR
+    spool_path.mkdir(parents=True, exist_ok=True)
+
+    files = []
+    for file_path in change["paths"]:
+        snapshot = spool_path / f"{time.time_ns()}-{os.getpid()}-{Path(file_path).name}"
+        shutil.copyfile(file_path, snapshot)
+        files.append({"path": file_path, "snapshot": str(snapshot)})
+
+    entry = {"message": change["message"], "files": files}
+    with lock_utils.file_lock(paths.STATE_PATH / QUEUE_LOCK):
+        with (paths.STATE_PATH / QUEUE_FILE).open("a") as queue_file:
+            queue_file.write(json.dumps(entry) + "\n")
+
+
+def read_queue() -> List[Dict[str, Any]]:
+    """Reads the commits waiting for the background worker, oldest first.
+
+    :return: Queued changes.
+    :rtype: List[Dict[str, Any]]
+    """
+
+    try:
+        with (paths.STATE_PATH / QUEUE_FILE).open("r") as queue_file:
+            return [json.loads(line) for line in queue_file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def read_status() -> Dict[str, Any]:
+    """Reads the status of the background worker.
+
+    :return: The last failure (if any) and the time of the last commit.
+    :rtype: Dict[str, Any]
+    """
+
+    try:
+        with (paths.STATE_PATH / STATUS_FILE).open("r") as status_file:
+            return json.load(status_file)
+    except (OSError, ValueError):
+        return {"failure": None, "last_commit": None}
+
+
+def write_status(status: Dict[str, Any]) -> None:
+    """Writes the status of the background worker.
+
+    :param status: The last failure (if any) and the time of the last commit.
+    :type status: Dict[str, Any]
+    :rtype: None
+    """
+
+    paths.STATE_PATH.mkdir(parents=True, exist_ok=True)
+    store_utils.write_json(paths.STATE_PATH / STATUS_FILE, status)
+
+
+def commit_snapshot(entry: Dict[str, Any]) -> bool:
+    """Commits a queued change from its snapshots, without touching the files
+    in the working tree (which may already hold newer changes).
+
+    :param entry: Queued change.
+    :type entry: Dict[str, Any]
+    :return: True if a commit was created.
+    :rtype: bool
+    """
+
+    from io import BytesIO
+    from git import BaseIndexEntry, Blob
+    from gitdb.base import IStream
+
+    repo = get_repo()
+    working_tree = Path(repo.working_tree_dir).resolve()
+    index_entries = []
+    for queued_file in entry["files"]:
+        data = Path(queued_file["snapshot"]).read_bytes()
+        blob = repo.odb.store(IStream(Blob.type, len(data), BytesIO(data)))
+        relative_path = Path(queued_file["path"]).resolve().relative_to(working_tree)
+        index_entries.append(
+            BaseIndexEntry((0o100644, blob.binsha, 0, relative_path.as_posix()))
+        )
+
+    with lock_utils.file_lock(paths.STATE_PATH / GIT_LOCK):
+        index = repo.index
+        index.add(index_entries)
+        if repo.head.is_valid() and not index.diff("HEAD"):
+            return False
+        index.commit(entry["message"])
+    return True
+
+
+def drain_queue() -> bool:
+    """Commits every queued change in order. Draining stops at the first
+    failure, which is recorded for `absorb status`; the failed change stays
+    at the head of the queue so that ordering is kept.
+
+    :return: True if the queue was fully drained.
+    :rtype: bool
+    """
+
+    while True:
+        with lock_utils.file_lock(paths.STATE_PATH / WORKER_LOCK):
+            entries = read_queue()
+            while entries:
+                if not commit_entries(entries):
+                    return False
+                entries = read_queue()
+
+        # A change queued just before the lock was released didn't start a
+        # worker of its own, so check the queue once more.
+        if not read_queue():
+            return True
+
+
+def commit_entries(entries: List[Dict[str, Any]]) -> bool:
+    """Commits queued changes in order and removes the committed ones from the
+    queue. Must be called with the worker lock held.
+
+    :param entries: Queued changes, oldest first.
+    :type entries: List[Dict[str, Any]]
+    :return: True if every change was committed.
+    :rtype: bool
+    """
+
+    committed = 0
+    failure = None
+    for entry in entries:
+        try:
+            commit_snapshot(entry)
+        except Exception as e:
+            log_utils.get_logger().error(e)
+            failure = {
+                "message": entry["message"],
+                "error": f"{type(e).__name__}: {e}",
+                "time": time.time(),
+            }
+            break
+        committed += 1
+
+    with lock_utils.file_lock(paths.STATE_PATH / QUEUE_LOCK):
+        # Changes may have been queued while committing.
+        remaining = read_queue()[committed:]
+        store_utils.write_text(
+            paths.STATE_PATH / QUEUE_FILE,
+            "".join(json.dumps(entry) + "\n" for entry in remaining),
+        )
+
+    for entry in entries[:committed]:
+        for queued_file in entry["files"]:
+            try:
+                os.remove(queued_file["snapshot"])
+            except FileNotFoundError:
+                pass
+
+    status = read_status()
+    status["failure"] = failure
+    if committed:
+        status["last_commit"] = time.time()
+    write_status(status)
+    return failure is None
+
+
+def spawn_worker() -> None:
+    """Starts a detached background process draining the commit queue, unless
+    a worker is already draining it."""
+
+    with lock_utils.file_lock(paths.STATE_PATH / WORKER_LOCK, blocking=False) as free:
+        if not free:
+            return
+
+    kwargs = {}  # type: Dict[str, Any]
+    if os.name == "nt":  # pragma: no cover - Windows
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+
+    env = dict(os.environ, ABSORB_HOME=str(paths.ROOT_PATH))
+    # The argument list is fixed, nothing in it comes from the user.
+    subprocess.Popen(  # noqa: S603
+        [sys.executable, "-m", "absorb.utils.commit_worker"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        **kwargs,
+    )
@@ -1,71 +1,63 @@
-from rich.table import Table
 from rich.console import Console
-from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Optional
+from . import description_utils, render_utils, trace_utils
+from ..storage.models import Idea
 
 console = Console()
 
 
-def parse_ideas(file_content: Any) -> None:
-    """Prints the ideas table.
+def parse_ideas(file_content: Iterable[Any]) -> None:
+    """Prints the ideas table, rendering the rows as they are printed.
 
     :param file_content: File content containing ideas.
-    :type file_content: Any
+    :type file_content: Iterable[Any]
     :rtype: None
     """
 
-    ideas_table = Table(show_header=True, header_style="bold")
-    ideas_table.add_column("ID")
-    ideas_table.add_column("Idea Name")
-    ideas_table.add_column("Tags")
-    for idea in file_content:
-        idea_entry = idea
-        tags = idea_entry["tags"]
-        ideas_table.add_row(
-            idea_entry["id"],
-            idea_entry["name"],
-            f"[bold yellow]{tags}[/bold yellow]",
-        )
-
-    console.print(ideas_table)
+    rows = (
+        (idea.id, idea.name, f"[bold yellow]{idea.tags}[/bold yellow]")
+        for idea in map(Idea.from_record, file_content)
+    )
+    render_utils.stream_table(("ID", "Idea Name", "Tags"), rows)
 
 
-def parse_idea(idea: Any) -> str:
+def parse_idea(idea: Idea, description: Optional[str] = None) -> str:
     """Returns a string containing the idea.
 
-    :param idea: JSON object containing data for the idea.
-    :type idea: Any
+    :param idea: The idea.
+    :type idea: Idea
+    :param description: Text of the description of the idea, read from its
+        file if not given.
+    :type description: Optional[str]
     :return: Formatted string with the idea.
     :rtype: str
     """
 
-    idea_id = idea["id"]
-    idea_name = idea["name"]
-    idea_tags = idea["tags"]
-    idea_description_path = Path(idea["description"])
-
-    idea_description = idea["description"]
-
-    if idea_description != ".":
-        try:
-            if idea_description_path.is_file():
-                with idea_description_path.open("r") as idea_description_file:
-                    idea_description = "".join(idea_description_file.readlines())
-        except FileNotFoundError:
-            console.print(
-                ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
+    if idea.description != ".":
+        if description is None:
+            description = description_utils.read_descriptions([idea.description]).get(
+                idea.description, idea.description
             )
-        return f"\n[bold red]Idea ID: {idea_id}[/bold red]\n[bold magenta]{idea_name}[/bold magenta]\n\n[bold green]Idea Description:[/bold green]\n\n{idea_description}\n\n[bold yellow]Tags: {idea_tags}[/bold yellow]\n"
-    return f"\n[bold red]Idea ID: {idea_id}[/bold red]\n[bold magenta]{idea_name}[/bold magenta]\n[bold yellow]Tags: {idea_tags}[/bold yellow]\n"
+        return f"\n[bold red]Idea ID: {idea.id}[/bold red]\n[bold magenta]{idea.name}[/bold magenta]\n\n[bold green]Idea Description:[/bold green]\n\n{description}\n\n[bold yellow]Tags: {idea.tags}[/bold yellow]\n"
+    return f"\n[bold red]Idea ID: {idea.id}[/bold red]\n[bold magenta]{idea.name}[/bold magenta]\n[bold yellow]Tags: {idea.tags}[/bold yellow]\n"
 
 
-def open_idea(file_content: Any) -> None:
-    """Prints the parsed idea.
+def open_idea(file_content: Any, lines: Optional[int] = None) -> None:
+    """Prints the parsed ideas, reading their description files together,
+    through the description cache.
 
-    :param file_content: File content containing the idea.
+    :param file_content: File content containing the ideas.
     :type file_content: Any
+    :param lines: Number of lines shown from each description file, all by
+        default.
+    :type lines: Optional[int]
     :rtype: None
     """
 
-    for idea in file_content:
-        console.print(parse_idea(idea))
+    ideas = [Idea.from_record(record) for record in file_content]
+    descriptions = description_utils.read_descriptions(
+        (idea.description for idea in ideas), lines
+    )
+    with trace_utils.span("render"):
+        for idea in ideas:
+            console.print(parse_idea(idea, descriptions[idea.description]))
@@ -0,0 +1,152 @@
+import csv
+import json
+import time
+from typing import Any, Callable, Dict, Iterator, List, TextIO, Tuple
+from rich.console import Console
+from . import git_utils
+from .. import storage
+
+FORMATS = ("csv", "jsonl")
+
+console = Console()
+
+Row = Dict[str, Any]
+
+
+def guess_format(file_name: str) -> str:
+    """Guesses the format of an import from its file name. Standard input is
+    read as JSON Lines.
+
+    :param file_name: Name of the file (`-` for standard input).
+    :type file_name: str
+    :return: `csv` or `jsonl`.
+    :rtype: str
+    """
+
+    return "csv" if file_name.lower().endswith(".csv") else "jsonl"
+
+
+def read_rows(source: TextIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """Streams the rows of a CSV (with a header) or JSON Lines source. A JSON
+    line which can't be decoded is yielded as its error, so that the rows
+    after it can still be imported.
+
+    :param source: The open source.
+    :type source: TextIO
+    :param file_format: `csv` or `jsonl`.
+    :type file_format: str
+    :yield: Line numbers and rows.
+    :rtype: Iterator[Tuple[int, Any]]
+    """
+
+    if file_format == "csv":
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+def required(row: Row, field: str) -> str:
+    """Returns a field which must be present and non-empty.
+
+    :param row: The row.
+    :type row: Row
+    :param field: Name of the field.
+    :type field: str
+    :raises ValueError: If the field is missing or empty.
+    :return: Value of the field.
+    :rtype: str
+    """
+
+    value = row.get(field)
+    if value is None or not str(value).strip():
+        raise ValueError(f'missing "{field}"')
+    return str(value)
+
+
+def split_tags(value: Any) -> List[str]:
+    """Returns the tags of a row, given either as a list or as a string of
+    tags separated by spaces or commas, with or without their `@`.
+
+    :param value: Value of the tags field.
+    :type value: Any
+    :raises ValueError: If the value is neither a list nor a string.
+    :return: The tags.
+    :rtype: List[str]
+    """
+
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    if not isinstance(value, list):
+        raise ValueError("tags should be a list or a string")
+    return [str(tag).lstrip("@") for tag in value if str(tag).lstrip("@")]
+
+
+def import_rows(
+    store: storage.Store,
+    rows: Iterator[Tuple[int, Any]],
+    build: Callable[[Row], Row],
+    noun: str,
+) -> int:
+    """Adds the records built from the rows to the store, then saves and
+    records the store once. Rows which fail validation are reported and
+    skipped.
+
+    :param store: The store to import into.
+    :type store: Store
+    :param rows: Line numbers and rows, as yielded by `read_rows`.
+    :type rows: Iterator[Tuple[int, Any]]
+    :param build: Builds the record for a row, raising `ValueError` (or
+        `TypeError`, for a field of the wrong type) if the row is invalid.
+    :type build: Callable[[Row], Row]
+    :param noun: Plural name of the records, for messages.
+    :type noun: str
+    :return: Number of imported records.
+    :rtype: int
+    """
+
+    start = time.perf_counter()
+    imported = 0
+    rejected = 0
+
+    with store.transaction():
+        try:
+            store.load()
+        except FileNotFoundError:
+            store.initialize()
+
+        for line_number, row in rows:
+            if isinstance(row, Exception):
+                error = f"invalid JSON ({row})"
+            elif not isinstance(row, dict):
+                error = "expected an object"
+            else:
+                try:
+                    store.add(build(row))
+                    imported += 1
+                    continue
+                except (TypeError, ValueError) as e:
+                    error = str(e)
+            rejected += 1
+            console.print(f":cross_mark: Line {line_number} rejected: {error}")
+
+        if store.save():
+            git_utils.record(store.tracked_paths(), f"Imported {imported} {noun}.")
+
+    elapsed = time.perf_counter() - start
+    throughput = imported / elapsed if elapsed else 0.0
+    console.print(
+        f":white_check_mark: Imported {imported} {noun} in {elapsed:.2f}s "
+        f"({throughput:.0f} {noun}/s), {rejected} rejected."
+    )
+    return imported
@@ -1,67 +1,130 @@
-from typing import Any
-from rich.table import Table
+from itertools import zip_longest
+from typing import Any, Dict, Iterable, List, Optional
 from rich.console import Console
-from pathlib import Path
-
-kanban_board = Table(show_header=True, header_style="bold")
-kanban_board.add_column("Completed")
-kanban_board.add_column("Doing")
-kanban_board.add_column("Planned")
+from . import description_utils, render_utils
+from ..config import settings
+from ..storage.models import Card
 
 console = Console()
 
 
-def parse_card(card: Any) -> str:
+def parse_card(card: Card, description: Optional[str] = None) -> str:
     """Returns a string containing the card content.
 
-    :param card: JSON object containing data for the card.
-    :type card: Any
+    :param card: The card.
+    :type card: Card
+    :param description: Text of the description of the card, read from its
+        file if not given.
+    :type description: Optional[str]
     :return: Formatted string with the card.
     :rtype: str
     """
 
-    card_id = card["id"]
-    card_name = card["name"]
-    card_tags = card["tags"]
-    card_description_path = Path(card["description"])
-
-    card_description = card["description"]
-
-    if card_description != ".":
-        try:
-            if card_description_path.is_file():
-                with card_description_path.open("r") as card_description_file:
-                    card_description = "".join(card_description_file.readlines())
-        except FileNotFoundError:
-            console.print(
-                ":cross_mark: Failed to read from the file! Please check the logs in the home directory."
+    if card.description != ".":
+        if description is None:
+            description = description_utils.read_descriptions([card.description]).get(
+                card.description, card.description
             )
-        return f"[bold red]{card_id}[/bold red]\n{card_name}\n[bold yellow]\ndescription:\n{card_description}\ntags: {card_tags}[/bold yellow]\n"
-    return f"[bold red]{card_id}[/bold red]\n{card_name}\n[bold yellow]tags: {card_tags}[/bold yellow]\n"
+        return f"[bold red]{card.id}[/bold red]\n{card.name}\n[bold yellow]\ndescription:\n{description}\ntags: {card.tags}[/bold yellow]\n"
+    return f"[bold red]{card.id}[/bold red]\n{card.name}\n[bold yellow]tags: {card.tags}[/bold yellow]\n"
+
+
+def bucket_cards(content: Iterable[Any]) -> Dict[str, List[Card]]:
+    """Groups cards by status in a single pass, in the configured column order.
+    Statuses without a column get one after the configured columns, in the
+    order they first appear.
+
+    :param content: File content containing cards.
+    :type content: Iterable[Any]
+    :return: The cards of each column.
+    :rtype: Dict[str, List[Card]]
+    """
+
+    columns = {
+        str(status).lower(): [] for status in settings.get_setting("kanban_columns")
+    }  # type: Dict[str, List[Card]]
+    for record in content:
+        card = Card.from_record(record)
+        bucket = columns.get(card.status)
+        if bucket is None:
+            bucket = columns[card.status] = []
+        bucket.append(card)
+    return columns
+
 
+def column_header(status: str, count: int) -> str:
+    """Returns the header of a column: its status and number of cards, against
+    its WIP limit if it has one.
+
+    :param status: Status of the column.
+    :type status: str
+    :param count: Number of cards in the column.
+    :type count: int
+    :return: The header.
+    :rtype: str
+    """
+
+    wip_limit = settings.get_setting("kanban_wip_limits").get(status)
+    if wip_limit is None:
+        return f"{status.capitalize()} ({count})"
+    if count > wip_limit:
+        return f"{status.capitalize()} [bold red]({count}/{wip_limit})[/bold red]"
+    return f"{status.capitalize()} ({count}/{wip_limit})"
 
-def parse_kanban(content: Any) -> None:
-    """Prints the kanban board.
+
+def parse_kanban(
+    content: Iterable[Any],
+    limit: Optional[int] = None,
+    offset: int = 0,
+    page: Optional[int] = None,
+    lines: Optional[int] = None,
+    max_cards: Optional[int] = None,
+) -> None:
+    """Prints the kanban board, one card per column on each row. The page is
+    taken in each column, and the description files of its cards are read
+    together, through the description cache.
 
     :param content: File content containing cards.
-    :type content: Any
+    :type content: Iterable[Any]
+    :param limit: Maximum number of cards shown in each column.
+    :type limit: Optional[int]
+    :param offset: Number of cards skipped in each column.
+    :type offset: int
+    :param page: Page shown, of `limit` cards in each column.
+    :type page: Optional[int]
+    :param lines: Number of lines shown from each description file, all by
+        default.
+    :type lines: Optional[int]
+    :param max_cards: Maximum number of cards shown in each column, followed
+        by the number of cards left out.
+    :type max_cards: Optional[int]
     :rtype: None
     """
 
-    cards = {"completed": [], "doing": [], "planned": []}
-
-    for task in content:
-        card = task
-        # print(task)
-        if card["status"] == "completed":
-            cards["completed"].append(card)
-        elif card["status"] == "doing":
-            cards["doing"].append(card)
-        elif card["status"] == "planned":
-            cards["planned"].append(card)
-
-    completed_cards = "\n".join([parse_card(card) for card in cards["completed"]])
-    doing_cards = "\n".join([parse_card(card) for card in cards["doing"]])
-    planned_cards = "\n".join([parse_card(card) for card in cards["planned"]])
-    kanban_board.add_row(completed_cards, doing_cards, planned_cards)
-    console.print(kanban_board)
+    buckets = bucket_cards(content)
+    # Counted once, for the headers and the summaries.
+    counts = {status: len(cards) for status, cards in buckets.items()}
+
+    columns = {}  # type: Dict[str, List[Card]]
+    for status, cards in buckets.items():
+        shown = list(render_utils.window(cards, limit, offset, page))
+        if max_cards is not None:
+            shown = shown[:max_cards]
+        columns[status] = shown
+
+    descriptions = description_utils.read_descriptions(
+        (card.description for shown in columns.values() for card in shown), lines
+    )
+    cells = []  # type: List[List[str]]
+    for status, shown in columns.items():
+        column_cells = [
+            parse_card(card, descriptions[card.description]) for card in shown
+        ]
+        if max_cards is not None and counts[status] > len(shown):
+            column_cells.append(f"[dim]+{counts[status] - len(shown)} more[/dim]")
+        cells.append(column_cells)
+
+    render_utils.stream_table(
+        [column_header(status, counts[status]) for status in columns],
+        zip_longest(*cells, fillvalue=""),
+    )
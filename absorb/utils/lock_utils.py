@@ -0,0 +1,97 @@
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+    import msvcrt
+
+# Locks held by this process, with how many blocks hold them. The locks are
+# tied to the open lock file, so taking one a second time from the same
+# process would wait on itself.
+_held = {}  # type: Dict[str, int]
+
+
+def acquire(lock_file: IO, blocking: bool) -> bool:
+    """Takes an exclusive advisory lock on an open file.
+
+    :param lock_file: The open lock file.
+    :type lock_file: IO
+    :param blocking: Wait for the lock instead of giving up.
+    :type blocking: bool
+    :return: True if the lock was taken.
+    :rtype: bool
+    """
+
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file.fileno(), flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    while True:  # pragma: no cover - Windows
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.01)
+
+
+def release(lock_file: IO) -> None:
+    """Releases the lock taken with `acquire`.
+
+    :param lock_file: The open lock file.
+    :type lock_file: IO
+    :rtype: None
+    """
+
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(lock_path, blocking=True):
+    # type: (Path, bool) -> Iterator[bool]
+    """Holds an exclusive, cross-process lock on `lock_path` for the duration
+    of the block. The lock is reentrant: nested blocks of the same process
+    share it.
+
+    :param lock_path: Path of the lock file. It is created if it doesn't exist.
+    :type lock_path: Path
+    :param blocking: Wait for the lock instead of giving up.
+    :type blocking: bool
+    :yield: True if the lock is held, False if it was busy (non-blocking only).
+    :rtype: Iterator[bool]
+    """
+
+    key = os.path.abspath(os.fspath(lock_path))
+    if key in _held:
+        _held[key] += 1
+        try:
+            yield True
+        finally:
+            _held[key] -= 1
+        return
+
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(os.fspath(lock_path), "a") as lock_file:
+        acquired = acquire(lock_file, blocking)
+        if acquired:
+            _held[key] = 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                del _held[key]
+                release(lock_file)
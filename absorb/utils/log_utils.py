@@ -1,16 +1,131 @@
+import atexit
+import gzip
 import logging
-from ..config.paths import LOGS_PATH
+import logging.handlers
+import os
+import queue
+import shutil
+from ..config import paths, settings
 from pathlib import Path
-from pythonjsonlogger import jsonlogger
+from typing import IO, Optional
+
+# Logger shared by every command group, built on first use.
+_logger = None
+
+# Thread writing the queued records to the log file.
+_listener = None  # type: Optional[logging.handlers.QueueListener]
+
+LOG_FILE = "absorb-logs.log"
+
+
+def gzip_namer(name: str) -> str:
+    """Names a rotated log file.
+
+    :param name: Default name of the rotated file.
+    :type name: str
+    :return: The name, with the extension of its compression.
+    :rtype: str
+    """
+
+    return name + ".gz"
+
+
+def gzip_rotator(source: str, dest: str) -> None:
+    """Rotates a log file by compressing it.
+
+    :param source: Path of the log file.
+    :type source: str
+    :param dest: Path of the rotated file.
+    :type dest: str
+    :rtype: None
+    """
+
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+class LazyDirectoryMixin:
+    """Creates the directory of the log file when the file is first opened,
+    which rotating handlers built with `delay` only do on the first record."""
+
+    baseFilename: str
+
+    def _open(self) -> IO[str]:
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()  # type: ignore
+
+
+class RotatingFileHandler(LazyDirectoryMixin, logging.handlers.RotatingFileHandler):
+    """Log file rotated by size."""
+
+
+class TimedRotatingFileHandler(
+    LazyDirectoryMixin, logging.handlers.TimedRotatingFileHandler
+):
+    """Log file rotated by time."""
+
+
+def file_handler() -> logging.Handler:
+    """Builds the handler of the log file, rotated by time if the
+    log_rotate_when setting is set, by size otherwise, and compressed when
+    rotated. The file is only opened when the first record is written.
+
+    :return: The handler.
+    :rtype: logging.Handler
+    """
+
+    log_path = str(paths.LOGS_PATH / LOG_FILE)
+    backup_count = settings.get_setting("log_backup_count")
+    when = settings.get_setting("log_rotate_when")
+    if when:
+        handler = TimedRotatingFileHandler(
+            log_path, when=when, backupCount=backup_count, delay=True
+        )  # type: logging.handlers.BaseRotatingHandler
+    else:
+        handler = RotatingFileHandler(
+            log_path,
+            maxBytes=settings.get_setting("log_max_bytes"),
+            backupCount=backup_count,
+            delay=True,
+        )
+    handler.namer = gzip_namer
+    handler.rotator = gzip_rotator
+    return handler
+
+
+def stop_listener() -> None:
+    """Writes the queued records and stops the thread writing them. Records
+    logged afterwards (e.g. by other exit handlers) are written directly."""
+
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    if _logger is not None:
+        for handler in list(_logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                _logger.removeHandler(handler)
+        for handler in _listener.handlers:
+            _logger.addHandler(handler)
+    _listener = None
 
 
 def get_logger() -> logging.getLogger:
-    """Initializes a logger which is utilized by the click commands.
+    """Initializes a logger which is utilized by the click commands. The logger
+    is built once and shared across calls. Records for the log file are queued
+    and written by a background thread.
 
     :return: Returns a logger.
     :rtype: logging.getLogger
     """
 
+    global _logger, _listener
+    if _logger is not None:
+        return _logger
+
+    from pythonjsonlogger import jsonlogger
+
     # Initialize loggers
     logger = logging.getLogger(__name__)
 
@@ -20,23 +135,27 @@ def get_logger() -> logging.getLogger:
     console_format = logging.Formatter("%(name)s - %(levelname)s - %(message)s")
     console_handler.setFormatter(console_format)
 
-    # File handler
-    try:
-        file_handler = logging.FileHandler(str(LOGS_PATH / "absorb-logs.log"))
-    except FileNotFoundError:
-        Path(str(LOGS_PATH)).mkdir()
-        Path(str(LOGS_PATH / "absorb-logs.log")).touch()
-        file_handler = logging.FileHandler(str(LOGS_PATH / "absorb-logs.log"))
-
-    file_handler.setLevel(logging.ERROR)
+    # File handler, fed through a queue
+    log_handler = file_handler()
+    log_handler.setLevel(logging.ERROR)
 
     JSON_formatter = jsonlogger.JsonFormatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
-    file_handler.setFormatter(JSON_formatter)
+    log_handler.setFormatter(JSON_formatter)
+
+    log_queue = queue.Queue(-1)  # type: queue.Queue
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(logging.ERROR)
+    _listener = logging.handlers.QueueListener(
+        log_queue, log_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_listener)
 
     # Add handlers to logger
     logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
 
+    _logger = logger
     return logger
@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Optional
+from ..config import paths
+
+PLUGINS_GROUP = "absorb.plugins"
+PLUGINS_INDEX = "plugins.json"
+
+# Plugins discovered in this process, keyed by command name.
+_plugins = None  # type: Optional[Dict[str, Dict[str, str]]]
+
+
+def environment_key() -> Dict[str, int]:
+    """Returns the modification times of every directory on `sys.path`.
+    Installing or removing a distribution changes the mtime of its
+    site-packages directory, which invalidates the plugin index.
+
+    :return: Modification times keyed by path.
+    :rtype: Dict[str, int]
+    """
+
+    key = {}
+    for entry in sys.path:
+        try:
+            key[entry] = os.stat(entry or ".").st_mtime_ns
+        except OSError:
+            continue
+    return key
+
+
+def scan_entry_points() -> Dict[str, str]:
+    """Scans the installed distributions for `absorb.plugins` entry points.
+
+    :return: Entry point values (`module:attribute`) keyed by command name.
+    :rtype: Dict[str, str]
+    """
+
+    try:
+        from importlib.metadata import entry_points  # type: ignore
+    except ImportError:
+        from importlib_metadata import entry_points  # type: ignore
+
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, "select"):
+        plugin_entry_points = all_entry_points.select(group=PLUGINS_GROUP)
+    else:
+        plugin_entry_points = all_entry_points.get(PLUGINS_GROUP, [])
+
+    return {entry_point.name: entry_point.value for entry_point in plugin_entry_points}
+
+
+def read_index() -> Dict[str, Any]:
+    """Reads the on-disk plugin index.
+
+    :return: The plugin index, or an empty dict if it is missing or unreadable.
+    :rtype: Dict[str, Any]
+    """
+
+    try:
+        with (paths.CACHE_PATH / PLUGINS_INDEX).open("r") as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_index(plugins: Dict[str, Dict[str, str]]) -> None:
+    """Writes the plugin index, keyed by the current environment.
+
+    :param plugins: Plugins keyed by command name.
+    :type plugins: Dict[str, Dict[str, str]]
+    :rtype: None
+    """
+
+    try:
+        paths.CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        with (paths.CACHE_PATH / PLUGINS_INDEX).open("w") as index_file:
+            json.dump({"key": environment_key(), "plugins": plugins}, index_file)
+    except OSError:
+        # The index is only a cache; discovery still works without it.
+        pass
+
+
+def discover_plugins(refresh: bool = False) -> Dict[str, Dict[str, str]]:
+    """Returns the installed plugins, using the on-disk index when the
+    environment hasn't changed since it was written.
+
+    :param refresh: Rescan the environment even if the index is fresh.
+    :type refresh: bool
+    :return: Plugins keyed by command name. Each plugin has the entry point
+        `value` and the cached short `help` of its command.
+    :rtype: Dict[str, Dict[str, str]]
+    """
+
+    global _plugins
+    if _plugins is not None and not refresh:
+        return _plugins
+
+    index = {} if refresh else read_index()
+    if index and index.get("key") == environment_key():
+        _plugins = index["plugins"]
+        return _plugins
+
+    cached = index.get("plugins", {})
+    _plugins = {}
+    for name, value in scan_entry_points().items():
+        previous = cached.get(name, {})
+        _plugins[name] = {
+            "value": value,
+            "help": previous.get("help", "") if previous.get("value") == value else "",
+        }
+    write_index(_plugins)
+    return _plugins
+
+
+def load_plugin(name: str) -> Any:
+    """Imports a plugin's command and records its short help in the index.
+
+    :param name: Command name of the plugin.
+    :type name: str
+    :return: The plugin's click command.
+    :rtype: Any
+    """
+
+    try:
+        from importlib.metadata import EntryPoint  # type: ignore
+    except ImportError:
+        from importlib_metadata import EntryPoint  # type: ignore
+
+    plugins = discover_plugins()
+    plugin = plugins[name]
+    command = EntryPoint(name, plugin["value"], PLUGINS_GROUP).load()
+
+    short_help = command.get_short_help_str()
+    if plugin.get("help") != short_help:
+        plugin["help"] = short_help
+        write_index(plugins)
+    return command
+
+
+def time_plugins() -> Dict[str, float]:
+    """Imports every plugin and measures how long each one takes to load.
+    Plugins which fail to load are reported with a negative time.
+
+    :return: Load times in milliseconds keyed by command name.
+    :rtype: Dict[str, float]
+    """
+
+    timings = {}
+    for name in discover_plugins():
+        start = time.perf_counter()
+        try:
+            load_plugin(name)
+        except Exception:
+            timings[name] = -1.0
+            continue
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
@@ -0,0 +1,274 @@
+import cProfile
+import os
+import pstats
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+from rich.console import Console
+from . import trace_utils
+from ..config import paths
+
+# Stacks shallower than this are written to collapsed-stack files.
+MAX_STACK_DEPTH = 64
+
+# Stacks holding less than this time (in seconds) are left out of
+# collapsed-stack files, which keeps them small on large call graphs.
+MIN_STACK_TIME = 1e-5
+
+# Number of spans of each phase compared with memory snapshots, which are
+# slow to compare on large workspaces.
+SNAPSHOTS_PER_PHASE = 3
+
+# Spans allocating less than this (in bytes) aren't broken down by allocation
+# site, which saves comparing snapshots for phases using little memory.
+MIN_SITE_ALLOCATION = 1 << 20
+
+# Number of allocation sites reported for each phase.
+TOP_SITES = 5
+
+# Whether the peak of each phase can be measured: tracemalloc only resets its
+# peak from Python 3.9 on; before, the peak is the process-wide one so far.
+PHASE_PEAKS = hasattr(tracemalloc, "reset_peak")
+
+# Profiling reports are printed to stderr, away from the command's output.
+console = Console(stderr=True)
+
+# Key of a function in pstats: file, line and name.
+Function = Tuple[str, int, str]
+
+
+def output_path(kind: str, extension: str) -> Path:
+    """Returns a new path for a profiling output, in the logs directory.
+
+    :param kind: Kind of output, e.g. `profile`.
+    :type kind: str
+    :param extension: Extension of the file.
+    :type extension: str
+    :return: The path.
+    :rtype: Path
+    """
+
+    paths.LOGS_PATH.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return paths.LOGS_PATH / f"{kind}-{stamp}-{os.getpid()}.{extension}"
+
+
+def function_label(function: Function) -> str:
+    """Returns the label of a function in a collapsed stack.
+
+    :param function: File, line and name of the function.
+    :type function: Function
+    :return: The label.
+    :rtype: str
+    """
+
+    file_name, line, name = function
+    if file_name == "~":
+        return name
+    return f"{name} ({os.path.basename(file_name)}:{line})".replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """Rebuilds collapsed stacks, as read by flamegraph tools, from a profile.
+    cProfile only records callers and callees, so the time of a function is
+    shared between its stacks in proportion to the time each caller spent in
+    it.
+
+    :param stats: The profile.
+    :type stats: pstats.Stats
+    :return: Inline time in microseconds of each stack, frames separated by
+        `;`.
+    :rtype: Dict[str, int]
+    """
+
+    entries = stats.stats  # type: ignore
+    callees = {}  # type: Dict[Function, Dict[Function, Any]]
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[function] = edge
+
+    stacks = Counter()  # type: Counter
+
+    def walk(
+        function: Function, stack: List[str], on_stack: Set[Function], share: float
+    ) -> None:
+        inline_time = entries[function][2]
+        stack = stack + [function_label(function)]
+        stacks[";".join(stack)] += inline_time * share * 1e6
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        on_stack = on_stack | {function}
+        for callee, (_, _, _, edge_time) in callees.get(function, {}).items():
+            callee_time = entries[callee][3]
+            if callee in on_stack or callee_time <= 0:
+                continue
+            callee_share = share * edge_time / callee_time
+            if callee_time * callee_share >= MIN_STACK_TIME:
+                walk(callee, stack, on_stack, callee_share)
+
+    # Roots: functions called by nothing profiled but themselves, e.g. those
+    # running when the profiler started.
+    for function, entry in entries.items():
+        if all(caller == function or caller not in entries for caller in entry[4]):
+            walk(function, [], set(), 1.0)
+    return {stack: round(time) for stack, time in stacks.items() if round(time) > 0}
+
+
+@contextmanager
+def cpu_profile(profile_format="pstats"):
+    # type: (str) -> Iterator[None]
+    """Profiles the block with cProfile, and writes the profile to the logs
+    directory.
+
+    :param profile_format: `pstats`, read by `python -m pstats` or snakeviz,
+        or `collapsed`, read by flamegraph tools.
+    :type profile_format: str
+    :yield: Nothing.
+    :rtype: Iterator[None]
+    """
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if profile_format == "collapsed":
+            profile_path = output_path("profile", "collapsed")
+            stacks = collapsed_stacks(pstats.Stats(profiler))
+            with profile_path.open("w") as profile_file:
+                for stack, time in sorted(stacks.items()):
+                    profile_file.write(f"{stack} {time}\n")
+        else:
+            profile_path = output_path("profile", "pstats")
+            profiler.dump_stats(str(profile_path))
+        console.print(f":bar_chart: Profile written to {profile_path}")
+
+
+class PhaseMemory:
+    """Memory used by the spans of a phase."""
+
+    __slots__ = ("calls", "growth", "peak", "snapshots", "sites")
+
+    def __init__(self) -> None:
+        """Initializes the measures."""
+
+        self.calls = 0
+        self.growth = 0
+        self.peak = 0
+        self.snapshots = 0
+        self.sites = Counter()  # type: Counter
+
+
+class MemoryProfiler:
+    """Measures the memory of each phase with tracemalloc, through the span
+    hook: the peak and the growth of the traced memory during each span, and
+    the sites allocating it during its first spans."""
+
+    def __init__(self) -> None:
+        """Initializes the profiler."""
+
+        self.phases = {}  # type: Dict[str, PhaseMemory]
+        self.depth = 0
+        self.peak = 0
+
+    @contextmanager
+    def phase(self, name):
+        # type: (str) -> Iterator[None]
+        """Measures a span. Nested spans are counted in their outer span too;
+        only outer spans are compared with snapshots.
+
+        :param name: Phase of the span.
+        :type name: str
+        :yield: Nothing.
+        :rtype: Iterator[None]
+        """
+
+        measure = self.phases.setdefault(name, PhaseMemory())
+        outer = self.depth == 0
+        before = None
+        if outer and measure.snapshots < SNAPSHOTS_PER_PHASE:
+            before = tracemalloc.take_snapshot()
+        start, peak = tracemalloc.get_traced_memory()
+        if outer and PHASE_PEAKS:
+            self.peak = max(self.peak, peak)
+            tracemalloc.reset_peak()
+
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            end, peak = tracemalloc.get_traced_memory()
+            measure.calls += 1
+            measure.growth += end - start
+            measure.peak = max(measure.peak, peak)
+            if before is not None and max(end, peak) - start >= MIN_SITE_ALLOCATION:
+                measure.snapshots += 1
+                for stat in tracemalloc.take_snapshot().compare_to(before, "lineno"):
+                    # Leave out the snapshots themselves.
+                    if stat.size_diff > 0 and stat.traceback[0].filename != __file__:
+                        measure.sites[str(stat.traceback)] += stat.size_diff
+
+    def report(self, command: str) -> str:
+        """Formats the measures.
+
+        :param command: Name of the profiled command.
+        :type command: str
+        :return: The report.
+        :rtype: str
+        """
+
+        lines = [
+            f"absorb {command}",
+            f"Peak memory: {self.peak / 2 ** 20:.1f} MiB",
+            "",
+            f"{'Phase':<20} {'Calls':>8} {'Peak (KiB)':>12} {'Growth (KiB)':>14}",
+        ]
+        for name, measure in self.phases.items():
+            peak = f"{measure.peak / 1024:.1f}" if PHASE_PEAKS else "n/a"
+            lines.append(
+                f"{name:<20} {measure.calls:>8} {peak:>12} "
+                f"{measure.growth / 1024:>14.1f}"
+            )
+        if not PHASE_PEAKS:
+            lines.append("Peaks of the phases need Python 3.9 or later.")
+        for name, measure in self.phases.items():
+            if not measure.sites:
+                continue
+            lines += ["", f"Top allocation sites of {name}:"]
+            for site, size in measure.sites.most_common(TOP_SITES):
+                lines.append(f"  {size / 1024:>10.1f} KiB  {site}")
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def memory_profile(command):
+    # type: (str) -> Iterator[None]
+    """Profiles the memory of the block with tracemalloc, and writes a report
+    of its peak and of each phase to the logs directory.
+
+    :param command: Name of the profiled command, for the report.
+    :type command: str
+    :yield: Nothing.
+    :rtype: Iterator[None]
+    """
+
+    profiler = MemoryProfiler()
+    tracemalloc.start()
+    trace_utils.set_span_hook(profiler.phase)
+    try:
+        yield
+    finally:
+        trace_utils.set_span_hook(None)
+        profiler.peak = max(profiler.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        report_path = output_path("memprofile", "txt")
+        report_path.write_text(profiler.report(command))
+        console.print(
+            f":bar_chart: Peak memory {profiler.peak / 2 ** 20:.1f} MiB, "
+            f"report written to {report_path}"
+        )
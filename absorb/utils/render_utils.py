@@ -0,0 +1,163 @@
+import itertools
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from . import trace_utils
+
+# Rows rendered (and printed) at a time by `stream_table`. Column widths are
+# measured on the first chunk only.
+CHUNK_SIZE = 200
+
+# Page size used by `--page` when no `--limit` is given.
+PAGE_SIZE = 50
+
+console = Console()
+
+T = TypeVar("T")
+
+
+def window(
+    records: Iterable[T],
+    limit: Optional[int] = None,
+    offset: int = 0,
+    page: Optional[int] = None,
+) -> Iterator[T]:
+    """Returns the records of a page, without copying the others.
+
+    :param records: The records, in display order.
+    :type records: Iterable[T]
+    :param limit: Maximum number of records (the page size with `page`).
+    :type limit: Optional[int]
+    :param offset: Number of records to skip (before the page with `page`).
+    :type offset: int
+    :param page: Number of the page, starting at 1.
+    :type page: Optional[int]
+    :return: The records of the page.
+    :rtype: Iterator[T]
+    """
+
+    if page is not None:
+        if limit is None:
+            limit = PAGE_SIZE
+        offset += (page - 1) * limit
+    stop = None if limit is None else offset + limit
+    return itertools.islice(records, offset, stop)
+
+
+def chunked(records: Iterable[T], size: int = CHUNK_SIZE) -> Iterator[List[T]]:
+    """Groups records into lists of `size` records, the last one possibly
+    shorter.
+
+    :param records: The records.
+    :type records: Iterable[T]
+    :param size: Number of records in each list.
+    :type size: int
+    :yield: The lists of records.
+    :rtype: Iterator[List[T]]
+    """
+
+    records = iter(records)
+    chunk = list(itertools.islice(records, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(records, size))
+
+
+def paginated(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Adds the `--limit`, `--offset` and `--page` options to a command.
+
+    :param command: The command function.
+    :type command: Callable[..., Any]
+    :return: The command function, with the options.
+    :rtype: Callable[..., Any]
+    """
+
+    options = [
+        click.option(
+            "--limit", type=click.IntRange(min=0), help="Shows at most this many."
+        ),
+        click.option(
+            "--offset", type=click.IntRange(min=0), default=0, help="Skips this many."
+        ),
+        click.option(
+            "--page",
+            type=click.IntRange(min=1),
+            help=f"Shows this page, of --limit entries ({PAGE_SIZE} by default).",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def measure(rows: List[Sequence[str]], columns: int) -> List[int]:
+    """Measures the widest line of each column of the rows.
+
+    :param rows: Rows of markup strings.
+    :type rows: List[Sequence[str]]
+    :param columns: Number of columns.
+    :type columns: int
+    :return: Width of each column, in terminal cells.
+    :rtype: List[int]
+    """
+
+    widths = [0] * columns
+    for row in rows:
+        for index, cell in enumerate(row):
+            for line in Text.from_markup(cell).split():
+                widths[index] = max(widths[index], line.cell_len)
+    return widths
+
+
+@trace_utils.traced("render")
+def stream_table(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[str]],
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """Prints a table from rows produced lazily. A table fitting in a single
+    chunk is printed as one rich table; larger tables are printed chunk by
+    chunk as the rows are produced, with column widths measured on the first
+    chunk so that the chunks line up; wider cells in later chunks wrap.
+
+    :param headers: Column headers.
+    :type headers: Sequence[str]
+    :param rows: Rows of markup strings; a row may have fewer cells than
+        there are columns.
+    :type rows: Iterable[Sequence[str]]
+    :param chunk_size: Number of rows printed at a time.
+    :type chunk_size: int
+    :rtype: None
+    """
+
+    rows = iter(rows)
+    chunk = list(itertools.islice(rows, chunk_size + 1))
+    if len(chunk) <= chunk_size:
+        table = Table(show_header=True, header_style="bold")
+        for header in headers:
+            table.add_column(header)
+        for row in chunk:
+            table.add_row(*row)
+        console.print(table)
+        return
+
+    widths = measure([list(headers)] + chunk, len(headers))
+    first = True
+    while chunk:
+        table = Table(
+            show_header=first,
+            header_style="bold",
+            box=box.SIMPLE_HEAD,
+            show_edge=False,
+            pad_edge=False,
+        )
+        for header, width in zip(headers, widths):
+            table.add_column(header, width=width, overflow="fold")
+        for row in chunk:
+            table.add_row(*row)
+        console.print(table)
+        first = False
+        chunk = list(itertools.islice(rows, chunk_size))
@@ -0,0 +1,328 @@
+import json
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from . import description_utils
+from .. import storage
+from ..config import paths
+
+# Database in the cache directory holding the search index.
+INDEX_FILE = "search.db"
+
+# Stores searched, by name.
+SEARCHED_STORES = ("tasks", "kanban", "ideas")
+
+# Times a term of the name of a record counts, compared to the description.
+NAME_WEIGHT = 3
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    terms TEXT NOT NULL,
+    UNIQUE (store, record_id)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+"""
+
+# Postings buffered before being written, in key order, during a refresh.
+BATCH_SIZE = 100000
+
+TOKEN = re.compile(r"\w+")
+
+# Store name, record ID, record name and score of a search result.
+Result = Tuple[str, str, str, float]
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase search terms.
+
+    :param text: The text.
+    :type text: str
+    :return: The terms, in order.
+    :rtype: List[str]
+    """
+
+    return TOKEN.findall(text.lower())
+
+
+def fingerprint(record: Dict[str, Any]) -> str:
+    """Returns what the indexed text of a record depends on: its name, its
+    description and the size and modification time of its description file.
+
+    :param record: The record.
+    :type record: Dict[str, Any]
+    :return: The fingerprint.
+    :rtype: str
+    """
+
+    source = None  # type: Optional[List[Any]]
+    description_path = description_utils.description_path(record.get("description"))
+    if description_path is not None:
+        try:
+            stat_result = description_path.stat()
+            source = [
+                os.fspath(description_path.resolve()),
+                stat_result.st_size,
+                stat_result.st_mtime_ns,
+            ]
+        except OSError:
+            pass
+    return json.dumps([record.get("name"), record.get("description"), source])
+
+
+def document_terms(record: Dict[str, Any]) -> Counter:
+    """Counts the terms of a record: its name, weighted, and its description
+    or the content of its description file.
+
+    :param record: The record.
+    :type record: Dict[str, Any]
+    :return: Number of occurrences of each term.
+    :rtype: Counter
+    """
+
+    terms = Counter()  # type: Counter
+    for term in tokenize(record.get("name", "")):
+        terms[term] += NAME_WEIGHT
+
+    description = record.get("description") or "."
+    description_path = description_utils.description_path(record.get("description"))
+    if description_path is not None:
+        try:
+            with description_path.open("r", errors="replace") as source_file:
+                for line in source_file:
+                    terms.update(tokenize(line))
+        except OSError:
+            pass
+    elif description != ".":
+        terms.update(tokenize(description))
+    return terms
+
+
+class SearchIndex:
+    """Inverted index from terms to the records of every store, kept in an
+    SQLite database in the cache directory. Queries only read the postings of
+    their terms; `refresh` only re-reads records whose fingerprint changed."""
+
+    def __init__(self) -> None:
+        """Opens the index, creating it if needed."""
+
+        paths.CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(
+            str(paths.CACHE_PATH / INDEX_FILE), timeout=30
+        )
+        # The index is a cache, rebuilt if lost: trade durability for speed,
+        # and keep the postings B-trees in memory while (re)building.
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("PRAGMA cache_size = -65536")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Closes the index."""
+
+        self.connection.close()
+
+    def refresh(self, store_names: Sequence[str] = SEARCHED_STORES) -> int:
+        """Brings the index up to date with the stores and description files.
+
+        :param store_names: Names of the stores to index.
+        :type store_names: Sequence[str]
+        :return: Number of records (re)indexed.
+        :rtype: int
+        """
+
+        reindexed = 0
+        postings = []  # type: List[Tuple[str, int, int]]
+        with self.connection:
+            for store_name in store_names:
+                indexed = {
+                    record_id: (doc, known)
+                    for doc, record_id, known in self.connection.execute(
+                        "SELECT doc, record_id, fingerprint FROM documents WHERE store = ?",
+                        (store_name,),
+                    )
+                }
+                try:
+                    records = storage.get_store(store_name).all()
+                except FileNotFoundError:
+                    records = []
+
+                for record in records:
+                    doc, known = indexed.pop(record["id"], (None, None))
+                    current = fingerprint(record)
+                    if current == known:
+                        continue
+                    if doc is not None:
+                        self.remove(doc)
+                    postings.extend(self.add(store_name, record, current))
+                    reindexed += 1
+                    if len(postings) >= BATCH_SIZE:
+                        self.write_postings(postings)
+                        postings = []
+
+                for doc, _ in indexed.values():
+                    self.remove(doc)
+            self.write_postings(postings)
+        return reindexed
+
+    def add(
+        self, store_name: str, record: Dict[str, Any], current: str
+    ) -> List[Tuple[str, int, int]]:
+        """Indexes a record, leaving its postings to be written with
+        `write_postings`.
+
+        :param store_name: Name of the store of the record.
+        :type store_name: str
+        :param record: The record.
+        :type record: Dict[str, Any]
+        :param current: Fingerprint of the record.
+        :type current: str
+        :return: The postings of the record: term, record number and count.
+        :rtype: List[Tuple[str, int, int]]
+        """
+
+        terms = document_terms(record)
+        cursor = self.connection.execute(
+            "INSERT INTO documents (store, record_id, name, fingerprint, length, terms) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                store_name,
+                record["id"],
+                record.get("name", ""),
+                current,
+                sum(terms.values()),
+                " ".join(terms),
+            ),
+        )
+        return [(term, cursor.lastrowid, tf) for term, tf in terms.items()]
+
+    def write_postings(self, postings: List[Tuple[str, int, int]]) -> None:
+        """Writes postings in key order, which keeps the insertions local in
+        the postings table.
+
+        :param postings: The postings.
+        :type postings: List[Tuple[str, int, int]]
+        """
+
+        postings.sort()
+        self.connection.executemany(
+            "INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)", postings
+        )
+
+    def remove(self, doc: int) -> None:
+        """Drops a record from the index.
+
+        :param doc: Number of the record in the index.
+        :type doc: int
+        """
+
+        # Postings are keyed by term: look them up through the terms of the
+        # record rather than keeping a second index by record.
+        (terms,) = self.connection.execute(
+            "SELECT terms FROM documents WHERE doc = ?", (doc,)
+        ).fetchone()
+        self.connection.executemany(
+            "DELETE FROM postings WHERE term = ? AND doc = ?",
+            [(term, doc) for term in terms.split()],
+        )
+        self.connection.execute("DELETE FROM documents WHERE doc = ?", (doc,))
+
+    def search(
+        self, query: str, store_names: Sequence[str] = SEARCHED_STORES
+    ) -> List[Result]:
+        """Returns the records containing every term of the query, ranked with
+        BM25.
+
+        :param query: The query.
+        :type query: str
+        :param store_names: Names of the stores to search.
+        :type store_names: Sequence[str]
+        :return: The results, best first.
+        :rtype: List[Result]
+        """
+
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        count, total = self.connection.execute(
+            "SELECT COUNT(*), SUM(length) FROM documents"
+        ).fetchone()
+        if not count:
+            return []
+        average_length = total / count
+
+        scores = None  # type: Optional[Dict[int, float]]
+        for term in terms:
+            postings = self.connection.execute(
+                "SELECT postings.doc, postings.tf, documents.length FROM postings "
+                "JOIN documents ON documents.doc = postings.doc WHERE term = ?",
+                (term,),
+            ).fetchall()
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            term_scores = {
+                doc: idf
+                * tf
+                * (K1 + 1)
+                / (tf + K1 * (1 - B + B * length / average_length))
+                for doc, tf, length in postings
+            }
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    doc: score + term_scores[doc]
+                    for doc, score in scores.items()
+                    if doc in term_scores
+                }
+            if not scores:
+                return []
+
+        return self.rank(scores, store_names)
+
+    def rank(
+        self, scores: Dict[int, float], store_names: Iterable[str]
+    ) -> List[Result]:
+        """Looks up the matching records and sorts them by score.
+
+        :param scores: Score of each matching record, by number in the index.
+        :type scores: Dict[int, float]
+        :param store_names: Names of the stores to keep.
+        :type store_names: Iterable[str]
+        :return: The results, best first.
+        :rtype: List[Result]
+        """
+
+        wanted = set(store_names)
+        results = []  # type: List[Result]
+        docs = list(scores)
+        # SQLite limits the number of parameters of a query.
+        for start in range(0, len(docs), 500):
+            chunk = docs[start : start + 500]
+            # Only placeholders are formatted into the query.
+            placeholders = ", ".join("?" for _ in chunk)
+            query = f"SELECT doc, store, record_id, name FROM documents WHERE doc IN ({placeholders})"  # noqa: S608
+            rows = self.connection.execute(query, chunk)
+            for doc, store_name, record_id, name in rows:
+                if store_name in wanted:
+                    results.append((store_name, record_id, name, scores[doc]))
+
+        results.sort(key=lambda result: (-result[3], result[0], result[1]))
+        return results
@@ -0,0 +1,196 @@
+import gc
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Union
+from . import trace_utils
+
+
+def fsync_directory(directory: Path) -> None:
+    """Flushes a directory entry to disk, so that a rename into it survives a
+    crash. Not supported (nor needed) on Windows.
+
+    :param directory: Path of the directory.
+    :type directory: Path
+    :rtype: None
+    """
+
+    if os.name == "nt":  # pragma: no cover - Windows
+        return
+    directory_fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+def content_hasher() -> Any:
+    """Returns a SHA-1 hasher, used to tell whether the content of a store
+    file changed, not for security.
+
+    :return: The hasher.
+    :rtype: Any
+    """
+
+    try:
+        return hashlib.sha1(usedforsecurity=False)  # noqa: S303,S324
+    except TypeError:  # Python < 3.9
+        return hashlib.sha1()  # noqa: S303,S324
+
+
+def file_mode(file_path: Path) -> int:
+    """Returns the permissions a file written in place of `file_path` should
+    have: those of the existing file, or the default of a new file under the
+    umask of the process.
+
+    :param file_path: Path of the file.
+    :type file_path: Path
+    :return: The permission bits.
+    :rtype: int
+    """
+
+    try:
+        return stat.S_IMODE(os.stat(str(file_path)).st_mode)
+    except FileNotFoundError:
+        # The umask can only be read by setting it.
+        umask = os.umask(0o022)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_temporary(file_path: Path, serialized: Union[str, bytes]) -> str:
+    """Writes content to a temporary file next to `file_path` and flushes it
+    to disk. The temporary file gets the permissions of `file_path` (see
+    `file_mode`), which it keeps once renamed over it.
+
+    :param file_path: Path of the file the content is meant for.
+    :type file_path: Path
+    :param serialized: Content of the file, text or binary.
+    :type serialized: Union[str, bytes]
+    :raises BaseException: Whatever writing raised, once the temporary file is
+        removed.
+    :return: Path of the temporary file.
+    :rtype: str
+    """
+
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=str(file_path.parent), prefix=f".{file_path.name}.", suffix=".tmp"
+    )
+    mode = "wb" if isinstance(serialized, bytes) else "w"
+    try:
+        with os.fdopen(file_descriptor, mode) as temporary_file:
+            # mkstemp creates the file readable by its owner only.
+            os.chmod(temporary_path, file_mode(file_path))
+            temporary_file.write(serialized)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return temporary_path
+
+
+def write_text(file_path: Path, serialized: Union[str, bytes]) -> None:
+    """Atomically replaces the content of a file. The content is written to a
+    temporary file, flushed to disk and renamed over the file, so readers (and
+    crashes) only ever see the old or the new content.
+
+    :param file_path: Path of the file.
+    :type file_path: Path
+    :param serialized: New content of the file, text or binary.
+    :type serialized: Union[str, bytes]
+    :rtype: None
+    """
+
+    temporary_path = write_temporary(file_path, serialized)
+    os.replace(temporary_path, str(file_path))
+    fsync_directory(file_path.parent)
+
+
+@contextmanager
+def gc_paused():
+    # type: () -> Iterator[None]
+    """Pauses the cyclic garbage collector for the duration of the block.
+    Parsing a store creates millions of containers, none of them garbage,
+    which would otherwise trigger collections scanning all of them again and
+    again: on large stores, most of the parse time.
+
+    :yield: Nothing.
+    :rtype: Iterator[None]
+    """
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def write_json(file_path: Path, content: Any) -> bool:
+    """Atomically writes JSON content to a file, unless the file already holds
+    exactly the same content.
+
+    :param file_path: Path of the JSON file.
+    :type file_path: Path
+    :param content: JSON serializable content.
+    :type content: Any
+    :return: True if the file was written, False if it was left untouched.
+    :rtype: bool
+    """
+
+    with trace_utils.span("store.serialize"):
+        serialized = json.dumps(content)
+    try:
+        with file_path.open("r") as json_file:
+            if json_file.read() == serialized:
+                return False
+    except FileNotFoundError:
+        pass
+
+    with trace_utils.span("store.write"):
+        write_text(file_path, serialized)
+    return True
+
+
+def create_json(file_path: Path, content: Any) -> bool:
+    """Atomically creates a JSON file, unless it already exists.
+
+    :param file_path: Path of the JSON file.
+    :type file_path: Path
+    :param content: JSON serializable content.
+    :type content: Any
+    :return: True if the file was created.
+    :rtype: bool
+    """
+
+    temporary_path = write_temporary(file_path, json.dumps(content))
+    try:
+        os.link(temporary_path, str(file_path))
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(temporary_path)
+    fsync_directory(file_path.parent)
+    return True
+
+
+def append_lines(file_path: Path, lines: Iterable[str]) -> None:
+    """Appends lines to a file and flushes them to disk.
+
+    :param file_path: Path of the file.
+    :type file_path: Path
+    :param lines: Lines to be appended, each ending with a newline.
+    :type lines: Iterable[str]
+    :rtype: None
+    """
+
+    with trace_utils.span("store.write"), file_path.open("a") as appended_file:
+        appended_file.writelines(lines)
+        appended_file.flush()
+        os.fsync(appended_file.fileno())
@@ -1,11 +1,14 @@
-from typing import Any
-from rich.table import Table
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
 from rich.console import Console
 from datetime import datetime, timedelta
 from collections import namedtuple
+from . import render_utils
+from ..storage.models import Task
 
 console = Console()
 
+ExtractedDate = namedtuple("ExtractedDate", ["days", "hours", "minutes", "seconds"])
+
 
 def convert_timedelta(duration: timedelta) -> namedtuple:
     """Converts a timedelta object into the custom ExtractedDate namedtuple.
@@ -16,76 +19,95 @@ def convert_timedelta(duration: timedelta) -> namedtuple:
     :rtype: namedtuple
     """
 
-    date_tuple = namedtuple(
-        "ExtractedDate",
-        ["days", "hours", "minutes", "seconds"],
-    )
     days, seconds = duration.days, duration.seconds
     hours = days * 24 + seconds // 3600
     minutes = (seconds % 3600) // 60
     seconds = seconds % 60
-    return date_tuple(days, hours, minutes, seconds)
+    return ExtractedDate(days, hours, minutes, seconds)
+
+
+TASK_HEADERS = ("Task ID", "Task Name", "Date Added", "Due Date", "Priority", "Group")
 
+# Format of the dates shown in the tasks table.
+DISPLAY_FORMAT = "%b %d, %Y at %I:%M%p"
 
-def parse_tasks(file_content: Any) -> None:
-    """Prints the tasks table.
+
+def due_displays(due_dates: Sequence[datetime], now: datetime) -> List[str]:
+    """Returns how far each due date is, counted in days from the same
+    current time.
+
+    :param due_dates: The due dates.
+    :type due_dates: Sequence[datetime]
+    :param now: The current time.
+    :type now: datetime
+    :return: e.g. `Due today.` or `3 days overdue.`, for each due date.
+    :rtype: List[str]
+    """
+
+    displays = []
+    for days in [(due_date - now).days for due_date in due_dates]:
+        if days == 0:
+            displays.append("Due today.")
+        elif days < 0:
+            displays.append(str(-days) + " days overdue.")
+        else:
+            displays.append(str(days) + " days to due date.")
+    return displays
+
+
+def task_row(task: Task, due_display: str) -> Tuple[str, ...]:
+    """Returns the cells of a task in the tasks table.
+
+    :param task: The task.
+    :type task: Task
+    :param due_display: How far the due date is, from `due_displays`.
+    :type due_display: str
+    :return: The cells of the row.
+    :rtype: Tuple[str, ...]
+    """
+
+    row = (
+        task.id,
+        task.name,
+        task.added.strftime(DISPLAY_FORMAT),
+        task.due.strftime(DISPLAY_FORMAT) + f"\n({due_display})",
+        task.priority,
+    )
+    if task.group == "":
+        return row
+
+    return row + (f"[bold yellow]tags: {task.group}[/bold yellow]",)
+
+
+def task_rows(
+    file_content: Iterable[Any], now: Optional[datetime] = None
+) -> Iterator[Tuple[str, ...]]:
+    """Renders the rows of the tasks table, a chunk at a time. Due dates are
+    all compared to the same current time.
+
+    :param file_content: File content containing tasks.
+    :type file_content: Iterable[Any]
+    :param now: The current time, taken once by default.
+    :type now: Optional[datetime]
+    :yield: The rows.
+    :rtype: Iterator[Tuple[str, ...]]
+    """
+
+    if now is None:
+        now = datetime.now()
+    for chunk in render_utils.chunked(file_content):
+        tasks = [Task.from_record(record) for record in chunk]
+        displays = due_displays([task.due for task in tasks], now)
+        for task, due_display in zip(tasks, displays):
+            yield task_row(task, due_display)
+
+
+def parse_tasks(file_content: Iterable[Any]) -> None:
+    """Prints the tasks table, rendering the rows as they are printed.
 
     :param file_content: File content containing tasks.
-    :type file_content: Any
+    :type file_content: Iterable[Any]
     :rtype: None
     """
 
-    tasks_table = Table(show_header=True, header_style="bold")
-    tasks_table.add_column("Task ID")
-    tasks_table.add_column("Task Name")
-    tasks_table.add_column("Date Added")
-    tasks_table.add_column("Due Date")
-    tasks_table.add_column("Priority")
-    tasks_table.add_column("Group")
-
-    for task in file_content:
-        task_entry = task
-
-        task_date = datetime.strptime(task_entry["date"], "%Y-%m-%d %H:%M:%S.%f")
-
-        task_due_date = datetime.strptime(
-            task_entry["due_date"], "%Y-%m-%d %H:%M:%S.%f"
-        )
-        curr_date = datetime.now()
-
-        diff = task_due_date - curr_date
-        diff_date = convert_timedelta(diff)
-
-        due_display = ""
-        if (diff_date.days == 0) and (diff_date.hours < 24):
-            due_display = "Due today."
-        elif diff_date.days < 0:
-            due_display = str(abs(diff_date.days)) + " days overdue."
-        elif diff_date.days > 0:
-            due_display = str(diff_date.days) + " days to due date."
-
-        due_date = (
-            datetime.strftime(task_due_date, "%b %d, %Y at %I:%M%p")
-            + f"\n({due_display})"
-        )
-
-        if task_entry["group"] == "":
-            tasks_table.add_row(
-                task_entry["id"],
-                task_entry["name"],
-                datetime.strftime(task_date, "%b %d, %Y at %I:%M%p"),
-                due_date,
-                task_entry["priority"],
-            )
-        else:
-            tags = task_entry["group"]
-            tasks_table.add_row(
-                task_entry["id"],
-                task_entry["name"],
-                datetime.strftime(task_date, "%b %d, %Y at %I:%M%p"),
-                due_date,
-                task_entry["priority"],
-                f"[bold yellow]tags: {tags}[/bold yellow]",
-            )
-
-    console.print(tasks_table)
+    render_utils.stream_table(TASK_HEADERS, task_rows(file_content))
@@ -0,0 +1,247 @@
+import functools
+import json
+import os
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+from ..config import paths, settings
+
+# File in the logs directory the traces are appended to.
+TRACE_FILE = "traces.jsonl"
+
+# Size from which the trace file is moved to `traces.jsonl.1`, replacing the
+# previous one.
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+
+# Time this module was imported, which absorb.main does first: the start of
+# the "startup" span.
+IMPORTED = time.perf_counter()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Trace:
+    """Spans of a command, timed in milliseconds from the start of absorb."""
+
+    __slots__ = ("started", "time", "spans")
+
+    def __init__(self) -> None:
+        """Starts the trace."""
+
+        self.started = IMPORTED
+        self.time = datetime.now().isoformat(timespec="seconds")
+        self.spans = []  # type: List[Dict[str, Any]]
+
+    def add(self, phase: str, start: float, end: float) -> None:
+        """Records a span.
+
+        :param phase: Name of the phase.
+        :type phase: str
+        :param start: Start of the span, from `time.perf_counter`.
+        :type start: float
+        :param end: End of the span, from `time.perf_counter`.
+        :type end: float
+        """
+
+        self.spans.append(
+            {
+                "phase": phase,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+            }
+        )
+
+
+# Trace of the running command, if it is sampled.
+_trace = None  # type: Optional[Trace]
+
+# Wraps every span while set, whether or not the command is traced, e.g. to
+# measure the memory of each phase.
+_span_hook = None  # type: Optional[Callable[[str], ContextManager[None]]]
+
+
+def set_span_hook(hook: Optional[Callable[[str], ContextManager[None]]]) -> None:
+    """Sets (or removes, with None) the context manager wrapping every span.
+
+    :param hook: Called with the phase of each span.
+    :type hook: Optional[Callable[[str], ContextManager[None]]]
+    :rtype: None
+    """
+
+    global _span_hook
+    _span_hook = hook
+
+
+def start_trace() -> bool:
+    """Starts tracing the running command, if it is sampled according to the
+    trace_sample_rate setting. Commands run by a traced command (e.g. by
+    `absorb batch`) are part of its trace.
+
+    :return: True if a trace was started.
+    :rtype: bool
+    """
+
+    global _trace
+    if _trace is not None:
+        return False
+    sample_rate = settings.get_setting("trace_sample_rate")
+    # Sampling only, not security sensitive.
+    if sample_rate <= 0 or random.random() >= sample_rate:  # noqa: S311
+        return False
+    _trace = Trace()
+    _trace.add("startup", IMPORTED, time.perf_counter())
+    return True
+
+
+def finish_trace(command: str) -> None:
+    """Appends the trace of the running command to the trace file.
+
+    :param command: Name of the command, e.g. `tasks add`.
+    :type command: str
+    :rtype: None
+    """
+
+    global _trace
+    trace, _trace = _trace, None
+    if trace is None:
+        return
+    entry = {
+        "time": trace.time,
+        "command": command,
+        "pid": os.getpid(),
+        "duration_ms": round((time.perf_counter() - trace.started) * 1000, 3),
+        "spans": trace.spans,
+    }
+    trace_path = paths.LOGS_PATH / TRACE_FILE
+    try:
+        paths.LOGS_PATH.mkdir(parents=True, exist_ok=True)
+        if trace_path.exists() and trace_path.stat().st_size > TRACE_MAX_BYTES:
+            os.replace(str(trace_path), str(trace_path) + ".1")
+        with trace_path.open("a") as trace_file:
+            trace_file.write(json.dumps(entry) + "\n")
+    except OSError:
+        # Tracing must never fail a command.
+        pass
+
+
+@contextmanager
+def span(phase):
+    # type: (str) -> Iterator[None]
+    """Times the block as a span of the running trace, within the span hook.
+    Does nothing if the command isn't traced and there is no hook.
+
+    :param phase: Name of the phase, e.g. `store.read`.
+    :type phase: str
+    :yield: Nothing.
+    :rtype: Iterator[None]
+    """
+
+    trace = _trace
+    hook = _span_hook
+    if trace is None and hook is None:
+        yield
+        return
+    with hook(phase) if hook is not None else nullcontext():
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if trace is not None:
+                trace.add(phase, start, time.perf_counter())
+
+
+def traced(phase: str) -> Callable[[F], F]:
+    """Decorator timing each call of a function as a span.
+
+    :param phase: Name of the phase.
+    :type phase: str
+    :return: The decorator.
+    :rtype: Callable[[F], F]
+    """
+
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _trace is None and _span_hook is None:
+                return function(*args, **kwargs)
+            with span(phase):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return cast(Callable[[F], F], decorator)
+
+
+def read_traces() -> Iterator[Dict[str, Any]]:
+    """Reads the traces of the trace file, skipping lines which can't be
+    parsed (e.g. one still being written).
+
+    :yield: The traces, oldest first.
+    :rtype: Iterator[Dict[str, Any]]
+    """
+
+    try:
+        trace_file = (paths.LOGS_PATH / TRACE_FILE).open("r")
+    except FileNotFoundError:
+        return
+    with trace_file:
+        for line in trace_file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """Returns a percentile of sorted values, by the nearest-rank method.
+
+    :param values: The values, sorted.
+    :type values: List[float]
+    :param rank: The percentile, e.g. 95.
+    :type rank: float
+    :return: The value at that percentile.
+    :rtype: float
+    """
+
+    index = max(0, -(-len(values) * rank // 100) - 1)
+    return values[int(index)]
+
+
+def phase_durations(
+    traces: Iterator[Dict[str, Any]],
+) -> Dict[Tuple[str, str], List[float]]:
+    """Groups the durations of the traces by command and phase. Spans of the
+    same phase in a trace are added up; the phase `total` is the duration of
+    the whole command.
+
+    :param traces: The traces.
+    :type traces: Iterator[Dict[str, Any]]
+    :return: Sorted durations in milliseconds, by command and phase.
+    :rtype: Dict[Tuple[str, str], List[float]]
+    """
+
+    durations = {}  # type: Dict[Tuple[str, str], List[float]]
+    for trace in traces:
+        command = trace.get("command", "?")
+        totals = {"total": trace.get("duration_ms", 0.0)}  # type: Dict[str, float]
+        for trace_span in trace.get("spans", []):
+            phase = trace_span["phase"]
+            totals[phase] = totals.get(phase, 0.0) + trace_span["duration_ms"]
+        for phase, duration in totals.items():
+            durations.setdefault((command, phase), []).append(duration)
+    for values in durations.values():
+        values.sort()
+    return durations
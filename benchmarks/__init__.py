@@ -0,0 +1 @@
+"""Benchmarks of absorb commands on synthetic workspaces."""
@@ -0,0 +1,197 @@
+"""Times absorb commands on synthetic workspaces, and fails if a scenario
+regressed against the baseline.
+
+    python -m benchmarks --sizes 1k,10k --threshold 0.25
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+import click
+from absorb import storage
+from rich.console import Console
+from rich.table import Table
+from . import results, scenarios, workspace
+
+console = Console()
+
+BENCHMARKS_PATH = Path(".benchmarks")
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    default="1k,10k,100k",
+    show_default=True,
+    help=f"Workspace sizes, separated by commas: {', '.join(workspace.SIZES)}.",
+)
+@click.option(
+    "--scenario",
+    "scenario_names",
+    multiple=True,
+    type=click.Choice([scenario.name for scenario in scenarios.SCENARIOS]),
+    help="Only runs this scenario. It can be repeated.",
+)
+@click.option(
+    "--mode",
+    "modes",
+    multiple=True,
+    type=click.Choice(scenarios.MODES),
+    help="Only runs the scenarios in this mode. It can be repeated.",
+)
+@click.option(
+    "--loads/--no-loads",
+    default=True,
+    show_default=True,
+    help="Also times loading each store from its JSON file and from its "
+    "snapshot (json and journal backends).",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=scenarios.REPEAT,
+    show_default=True,
+    help="Timed runs of each scenario; the median is compared.",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["json", "journal", "sqlite"]),
+    default="json",
+    show_default=True,
+    help="Storage backend of the workspaces.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Results file, .benchmarks/results-<backend>.json by default.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Baseline file, .benchmarks/baseline-<backend>.json by default.",
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    help="Writes the results as the baseline: to create it, or to replace it "
+    "after an accepted slowdown.",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=0.25,
+    show_default=True,
+    help="Relative slowdown from the baseline which fails a scenario.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=BENCHMARKS_PATH / "workspaces",
+    show_default=True,
+    help="Directory keeping the built workspaces between runs.",
+)
+def main(
+    sizes: str,
+    scenario_names: tuple,
+    modes: tuple,
+    loads: bool,
+    repeat: int,
+    backend: str,
+    output: Optional[Path],
+    baseline: Optional[Path],
+    update_baseline: bool,
+    threshold: float,
+    cache_dir: Path,
+) -> None:
+    """Runs the benchmarks."""
+
+    size_names = [size.strip().lower() for size in sizes.split(",") if size.strip()]
+    for size_name in size_names:
+        if size_name not in workspace.SIZES:
+            raise click.BadParameter(
+                f'Unknown size "{size_name}".', param_hint="--sizes"
+            )
+    selected = [
+        scenario
+        for scenario in scenarios.SCENARIOS
+        if not scenario_names or scenario.name in scenario_names
+    ]
+    modes = modes or scenarios.MODES
+    output = output or BENCHMARKS_PATH / f"results-{backend}.json"
+    baseline = baseline or BENCHMARKS_PATH / f"baseline-{backend}.json"
+
+    # Commands run by the benchmarks, in this process or not, use the backend.
+    os.environ["ABSORB_STORAGE_BACKEND"] = backend
+    measured = results.new_results(backend)
+    with tempfile.TemporaryDirectory(prefix="absorb-bench-") as run_dir:
+        for size_name in size_names:
+            with console.status(f"Building the {size_name} workspace..."):
+                source = workspace.cached_workspace(cache_dir, size_name)
+                root = workspace.copy_workspace(source, Path(run_dir) / size_name)
+            for scenario in selected:
+                for mode_number, mode in enumerate(modes):
+                    key = results.result_key(scenario.name, size_name, mode)
+                    with console.status(f"Timing {key}..."):
+                        try:
+                            timing = scenarios.time_scenario(
+                                scenario,
+                                root,
+                                workspace.SIZES[size_name],
+                                mode,
+                                repeat,
+                                mode_number * (repeat + 1),
+                            )
+                        except scenarios.BenchmarkError as e:
+                            console.print(f":cross_mark: {key} failed: {e}")
+                            sys.exit(-1)
+                    measured["timings"][key] = timing
+            if loads and backend != "sqlite":
+                for name in storage.STORE_FILES:
+                    for load in scenarios.LOADS:
+                        key = results.result_key(f"{name} load", size_name, load)
+                        with console.status(f"Timing {key}..."):
+                            timing = scenarios.time_load(root, name, load, repeat)
+                        measured["timings"][key] = timing
+    results.save_results(measured, output)
+
+    if update_baseline:
+        results.save_results(measured, baseline)
+        console.print(f":white_check_mark: Baseline written to {baseline}.")
+    baseline_results = results.load_results(baseline)
+    if baseline_results is None:
+        # Comparing the results with themselves would always pass.
+        console.print(
+            f":cross_mark: No baseline at {baseline}. Results written to "
+            f"{output}; run with --update-baseline to make them the baseline."
+        )
+        sys.exit(-1)
+
+    comparisons = results.compare(measured, baseline_results, threshold)
+    table = Table()
+    for header in ("Scenario", "Median (ms)", "Baseline (ms)", "Change"):
+        table.add_column(header, justify="left" if header == "Scenario" else "right")
+    for comparison in comparisons:
+        change = comparison.change
+        table.add_row(
+            comparison.key,
+            f"{comparison.median_ms:.1f}",
+            "-" if comparison.baseline_ms is None else f"{comparison.baseline_ms:.1f}",
+            "-" if change is None else f"{change:+.0%}",
+            style="bold red" if comparison.regressed else None,
+        )
+    console.print(table)
+    console.print(f"Results written to {output}.")
+
+    regressions = [comparison for comparison in comparisons if comparison.regressed]
+    if regressions:
+        console.print(
+            f":cross_mark: {len(regressions)} scenario(s) regressed by more than "
+            f"{threshold:.0%} against {baseline}."
+        )
+        sys.exit(-1)
+
+
+if __name__ == "__main__":
+    main()
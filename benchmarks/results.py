@@ -0,0 +1,126 @@
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Slowdowns smaller than this (in milliseconds) are noise, however large they
+# are relative to the baseline.
+NOISE_FLOOR_MS = 5.0
+
+Results = Dict[str, Any]
+
+
+class Comparison(NamedTuple):
+    """Median of a scenario, against its baseline."""
+
+    key: str
+    median_ms: float
+    baseline_ms: Optional[float]
+    regressed: bool
+
+    @property
+    def change(self) -> Optional[float]:
+        """Relative change from the baseline, e.g. 0.1 for 10% slower."""
+
+        if not self.baseline_ms:
+            return None
+        return self.median_ms / self.baseline_ms - 1
+
+
+def result_key(scenario: str, size_name: str, mode: str) -> str:
+    """Returns the key of a timing in the results.
+
+    :param scenario: Name of the scenario, e.g. `tasks add`.
+    :type scenario: str
+    :param size_name: Size of the workspace, e.g. `10k`.
+    :type size_name: str
+    :param mode: `in-process` or `end-to-end`.
+    :type mode: str
+    :return: The key, e.g. `tasks add/10k/in-process`.
+    :rtype: str
+    """
+
+    return f"{scenario}/{size_name}/{mode}"
+
+
+def new_results(backend: str) -> Results:
+    """Returns empty results, describing the machine they are measured on.
+
+    :param backend: Storage backend of the workspaces.
+    :type backend: str
+    :return: The results.
+    :rtype: Results
+    """
+
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.node(),
+        "storage_backend": backend,
+        "argv": sys.argv[1:],
+        "timings": {},
+    }
+
+
+def load_results(results_path: Path) -> Optional[Results]:
+    """Reads results, e.g. the baseline.
+
+    :param results_path: Path of the results.
+    :type results_path: Path
+    :return: The results, or None if there are none.
+    :rtype: Optional[Results]
+    """
+
+    try:
+        with results_path.open("r") as results_file:
+            return json.load(results_file)
+    except FileNotFoundError:
+        return None
+
+
+def save_results(results: Results, results_path: Path) -> None:
+    """Writes results.
+
+    :param results: The results.
+    :type results: Results
+    :param results_path: Path of the results, whose directory is created if
+        needed.
+    :type results_path: Path
+    """
+
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    results_path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> List[Comparison]:
+    """Compares the median of each scenario with the baseline. A scenario
+    regressed if its median is more than `threshold` slower, and slower by
+    more than NOISE_FLOOR_MS.
+
+    :param results: The results.
+    :type results: Results
+    :param baseline: The baseline.
+    :type baseline: Results
+    :param threshold: Relative slowdown allowed, e.g. 0.25 for 25%.
+    :type threshold: float
+    :return: Comparison of each scenario of the results.
+    :rtype: List[Comparison]
+    """
+
+    comparisons = []
+    for key, timing in results["timings"].items():
+        median = timing["median_ms"]
+        baseline_timing = baseline["timings"].get(key)
+        if baseline_timing is None:
+            comparisons.append(Comparison(key, median, None, False))
+            continue
+        baseline_median = baseline_timing["median_ms"]
+        regressed = (
+            median > baseline_median * (1 + threshold)
+            and median - baseline_median > NOISE_FLOOR_MS
+        )
+        comparisons.append(Comparison(key, median, baseline_median, regressed))
+    return comparisons
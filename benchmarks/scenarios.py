@@ -0,0 +1,243 @@
+import os
+import statistics
+import subprocess  # noqa: S404
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Union
+from click.testing import CliRunner
+from absorb import storage
+from absorb.main import cli
+from .workspace import isolated
+
+# Runs each scenario is timed over, in each mode.
+REPEAT = 5
+
+# Modes a scenario is run in: within the benchmark process, with absorb
+# already imported (`in-process`), or as a new absorb process
+# (`end-to-end`), which includes the startup of Python and the imports.
+MODES = ("in-process", "end-to-end")
+
+# Ways the store load benchmarks read a store: by parsing its JSON file, or
+# from its snapshot (the snapshot_cache setting).
+LOADS = ("json", "snapshot")
+
+# Runs absorb in a new process.
+ABSORB = [sys.executable, "-c", "from absorb.main import cli; cli()"]
+
+Number = Union[int, float]
+
+
+class Scenario(NamedTuple):
+    """A command timed on each workspace. Its arguments are built from the
+    workspace size and the number of the run, so that runs edit, move and
+    delete different records. Commands showing records show a page of them:
+    rendering every record would take minutes on the larger workspaces, and
+    grows with the size like reading them does."""
+
+    name: str
+    args: Callable[[int, int], List[str]]
+
+
+SCENARIOS = (
+    Scenario(
+        "tasks add",
+        lambda size, run: [
+            "tasks",
+            "add",
+            f"Bench task {run}",
+            "+1d",
+            "high",
+            "@bench",
+        ],
+    ),
+    Scenario(
+        "tasks edit",
+        lambda size, run: [
+            "tasks",
+            "edit",
+            f"#{run + 1}",
+            f"Edited task {run}",
+            "+2d",
+            "low",
+            "@bench",
+        ],
+    ),
+    Scenario("tasks delete", lambda size, run: ["tasks", "delete", f"#{size - run}"]),
+    Scenario("tasks show", lambda size, run: ["tasks", "show", "--page", "2"]),
+    Scenario(
+        "tasks show-group",
+        lambda size, run: ["tasks", "show-group", "tag7", "--page", "2"],
+    ),
+    Scenario(
+        "kanban move-card",
+        lambda size, run: [
+            "kanban",
+            "move-card",
+            f"#{run + 1}",
+            ("doing", "completed")[run % 2],
+        ],
+    ),
+    Scenario(
+        "kanban show",
+        lambda size, run: ["kanban", "show", "--page", "2", "--lines", "5"],
+    ),
+    Scenario(
+        "idea open",
+        lambda size, run: ["idea", "open", f"#{2 * run + 2}", "--lines", "5"],
+    ),
+)
+
+
+class BenchmarkError(Exception):
+    """A scenario failed, so its timing means nothing."""
+
+
+def run_in_process(root: Path, args: List[str]) -> float:
+    """Runs a command within the benchmark process.
+
+    :param root: Directory of the workspace.
+    :type root: Path
+    :param args: Arguments of the command.
+    :type args: List[str]
+    :raises BenchmarkError: If the command failed.
+    :return: Duration in seconds.
+    :rtype: float
+    """
+
+    runner = CliRunner()
+    with isolated(root):
+        start = time.perf_counter()
+        result = runner.invoke(cli, args)
+        duration = time.perf_counter() - start
+    if result.exit_code != 0:
+        raise BenchmarkError(
+            f"absorb {' '.join(args)} exited with {result.exit_code}: "
+            f"{result.output[-500:]}{result.exception or ''}"
+        )
+    return duration
+
+
+def run_end_to_end(root: Path, args: List[str]) -> float:
+    """Runs a command as a new absorb process.
+
+    :param root: Directory of the workspace.
+    :type root: Path
+    :param args: Arguments of the command.
+    :type args: List[str]
+    :raises BenchmarkError: If the command failed.
+    :return: Duration in seconds.
+    :rtype: float
+    """
+
+    env = dict(os.environ, ABSORB_HOME=str(root))
+    start = time.perf_counter()
+    # ABSORB runs absorb with this interpreter; args come from the scenarios.
+    result = subprocess.run(  # noqa: S603
+        ABSORB + args,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    duration = time.perf_counter() - start
+    if result.returncode != 0:
+        raise BenchmarkError(
+            f"absorb {' '.join(args)} exited with {result.returncode}: "
+            f"{result.stderr.decode(errors='replace')[-500:]}"
+        )
+    return duration
+
+
+RUNNERS = {
+    "in-process": run_in_process,
+    "end-to-end": run_end_to_end,
+}  # type: Dict[str, Callable[[Path, List[str]], float]]
+
+
+def time_scenario(
+    scenario: Scenario, root: Path, size: int, mode: str, repeat: int, first_run: int
+) -> Dict[str, Number]:
+    """Times a scenario on a workspace.
+
+    :param scenario: The scenario.
+    :type scenario: Scenario
+    :param root: Directory of the workspace.
+    :type root: Path
+    :param size: Number of records of the workspace.
+    :type size: int
+    :param mode: `in-process` or `end-to-end`.
+    :type mode: str
+    :param repeat: Number of timed runs.
+    :type repeat: int
+    :param first_run: Number of the first run, so that runs in each mode act
+        on different records.
+    :type first_run: int
+    :return: Median, minimum and maximum durations in milliseconds, and the
+        number of runs.
+    :rtype: Dict[str, Number]
+    """
+
+    run_command = RUNNERS[mode]
+    if mode == "in-process":
+        # Leave the lazy imports of the command out of the timings.
+        run_command(root, scenario.args(size, first_run))
+        first_run += 1
+    durations = [
+        run_command(root, scenario.args(size, run)) * 1000
+        for run in range(first_run, first_run + repeat)
+    ]
+    return summarize(durations)
+
+
+def time_load(root: Path, name: str, load: str, repeat: int) -> Dict[str, Number]:
+    """Times loading a store within the benchmark process, as commands do
+    before reading or changing it.
+
+    :param root: Directory of the workspace.
+    :type root: Path
+    :param name: Name of the store (tasks, kanban or ideas).
+    :type name: str
+    :param load: `json` or `snapshot`.
+    :type load: str
+    :param repeat: Number of timed loads.
+    :type repeat: int
+    :return: Median, minimum and maximum durations in milliseconds, and the
+        number of loads.
+    :rtype: Dict[str, Number]
+    """
+
+    previous = os.environ.get("ABSORB_SNAPSHOT_CACHE")
+    os.environ["ABSORB_SNAPSHOT_CACHE"] = "1" if load == "snapshot" else "0"
+    try:
+        with isolated(root):
+            # Writes the snapshot, if it is missing or stale.
+            storage.get_store(name).load()
+            durations = []
+            for _ in range(repeat):
+                store = storage.get_store(name)
+                start = time.perf_counter()
+                store.load()
+                durations.append((time.perf_counter() - start) * 1000)
+    finally:
+        if previous is None:
+            del os.environ["ABSORB_SNAPSHOT_CACHE"]
+        else:
+            os.environ["ABSORB_SNAPSHOT_CACHE"] = previous
+    return summarize(durations)
+
+
+def summarize(durations: List[float]) -> Dict[str, Number]:
+    """Summarizes the durations of the runs of a benchmark.
+
+    :param durations: Durations in milliseconds.
+    :type durations: List[float]
+    :return: Median, minimum and maximum durations, and the number of runs.
+    :rtype: Dict[str, Number]
+    """
+
+    return {
+        "median_ms": round(statistics.median(durations), 3),
+        "min_ms": round(min(durations), 3),
+        "max_ms": round(max(durations), 3),
+        "runs": len(durations),
+    }
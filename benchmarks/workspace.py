@@ -0,0 +1,217 @@
+import json
+import random
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+from absorb import storage
+from absorb.config import paths, settings
+from absorb.utils import date_utils, git_utils
+
+# Number of tasks, cards and ideas of each workspace size.
+SIZES = {
+    "1k": 1000,
+    "10k": 10000,
+    "100k": 100000,
+    "1m": 1000000,
+}
+
+# Tags (and task groups) the records are spread over.
+TAGS = 50
+
+# Description files shared by the cards and ideas; every other card and idea
+# names one, the others have a plain description.
+DESCRIPTION_FILES = 50
+
+# Lines of each description file.
+DESCRIPTION_LINES = 40
+
+# Commits the records are added in, each adding the next share of them.
+HISTORY_COMMITS = 3
+
+# Version of the generated workspaces; cached workspaces of other versions
+# are built again.
+WORKSPACE_VERSION = 1
+
+# File marking a complete cached workspace.
+MARKER_FILE = ".benchmark.json"
+
+# Seed of the generated records, so that workspaces of a size are the same.
+SEED = 0
+
+PRIORITIES = ("low", "medium", "high")
+
+STATUSES = ("planned", "doing", "completed")
+
+
+@contextmanager
+def isolated(root: Path) -> Iterator[Path]:
+    """Points absorb at a workspace for the duration of the block, like the
+    `ABSORB_HOME` environment variable does for a new process.
+
+    :param root: Directory of the workspace.
+    :type root: Path
+    :yield: The directory.
+    :rtype: Iterator[Path]
+    """
+
+    saved = {
+        name: getattr(paths, name)
+        for name in ("ROOT_PATH", "REPO_PATH", "LOGS_PATH", "CACHE_PATH", "STATE_PATH")
+    }
+    paths.ROOT_PATH = root
+    paths.REPO_PATH = root
+    paths.LOGS_PATH = root / "logs"
+    paths.CACHE_PATH = root / ".cache"
+    paths.STATE_PATH = root / ".state"
+    settings._config = None
+    git_utils._repo = None
+    try:
+        yield root
+    finally:
+        for name, value in saved.items():
+            setattr(paths, name, value)
+        settings._config = None
+        git_utils._repo = None
+
+
+def write_descriptions(root: Path) -> List[str]:
+    """Writes the description files of a workspace.
+
+    :param root: Directory of the workspace.
+    :type root: Path
+    :return: Absolute paths of the files, as given to cards and ideas.
+    :rtype: List[str]
+    """
+
+    notes_path = root / "notes"
+    notes_path.mkdir(parents=True, exist_ok=True)
+    descriptions = []
+    for number in range(DESCRIPTION_FILES):
+        note_path = notes_path / f"note-{number}.md"
+        note_path.write_text(
+            "".join(
+                f"Line {line} of note {number}, about tag{line % TAGS}.\n"
+                for line in range(DESCRIPTION_LINES)
+            )
+        )
+        descriptions.append(str(note_path.resolve()))
+    return descriptions
+
+
+def generate_records(size: int, descriptions: List[str]) -> Dict[str, List[Dict]]:
+    """Generates the records of a workspace, without IDs.
+
+    :param size: Number of tasks, cards and ideas.
+    :type size: int
+    :param descriptions: Paths of the description files.
+    :type descriptions: List[str]
+    :return: Records of each store.
+    :rtype: Dict[str, List[Dict]]
+    """
+
+    # Seeded so that workspaces are reproducible, not security sensitive.
+    rng = random.Random(SEED)  # noqa: S311
+    now = datetime.now()
+    records = {"tasks": [], "kanban": [], "ideas": []}  # type: Dict[str, List[Dict]]
+    for number in range(size):
+        tags = [f"tag{rng.randrange(TAGS)}" for _ in range(rng.randint(1, 3))]
+        description = (
+            descriptions[number % len(descriptions)]
+            if number % 2
+            else f"Plain description {number}"
+        )
+        records["tasks"].append(
+            storage.Task(
+                f"Task {number}",
+                date_utils.format_date(now - timedelta(minutes=number)),
+                date_utils.format_date(now + timedelta(hours=rng.randint(-240, 240))),
+                rng.choice(PRIORITIES),
+                tags,
+            ).to_record()
+        )
+        records["kanban"].append(
+            storage.Card(
+                f"Card {number}", rng.choice(STATUSES), description, tags
+            ).to_record()
+        )
+        records["ideas"].append(
+            storage.Idea(f"Idea {number}", description, tags).to_record()
+        )
+    return records
+
+
+def build_workspace(root: Path, size: int) -> Path:
+    """Builds a synthetic workspace: tasks, cards and ideas spread over tags,
+    description files, and a git history adding the records in several
+    commits. Records are stored with the `storage_backend` setting.
+
+    :param root: Directory of the workspace, created if needed.
+    :type root: Path
+    :param size: Number of tasks, cards and ideas.
+    :type size: int
+    :return: The directory.
+    :rtype: Path
+    """
+
+    root.mkdir(parents=True, exist_ok=True)
+    with isolated(root):
+        records = generate_records(size, write_descriptions(root))
+        for name in storage.STORE_FILES:
+            storage.get_store(name).initialize()
+        chunk = -(-size // HISTORY_COMMITS)
+        for commit in range(HISTORY_COMMITS):
+            tracked = []
+            for name in storage.STORE_FILES:
+                store = storage.get_store(name)
+                with store.transaction():
+                    for record in records[name][commit * chunk : (commit + 1) * chunk]:
+                        store.add(record)
+                    store.save()
+                tracked += store.tracked_paths()
+            git_utils.commit(tracked, f"Added records {commit + 1}/{HISTORY_COMMITS}.")
+    return root
+
+
+def cached_workspace(cache_path: Path, size_name: str) -> Path:
+    """Returns a pristine workspace of a size, built in the cache directory
+    unless a complete one of the same version and storage backend is there.
+
+    :param cache_path: Directory of the cached workspaces.
+    :type cache_path: Path
+    :param size_name: Size of the workspace, a key of SIZES.
+    :type size_name: str
+    :return: Directory of the workspace, which benchmarks shouldn't change.
+    :rtype: Path
+    """
+
+    with isolated(cache_path):
+        # Read from the environment, not from the config of ~/absorb.
+        backend = settings.get_setting("storage_backend")
+    spec = {"version": WORKSPACE_VERSION, "size": SIZES[size_name], "backend": backend}
+    root = cache_path / f"{backend}-{size_name}"
+    try:
+        if json.loads((root / MARKER_FILE).read_text()) == spec:
+            return root
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(str(root), ignore_errors=True)
+    build_workspace(root, SIZES[size_name])
+    (root / MARKER_FILE).write_text(json.dumps(spec))
+    return root
+
+
+def copy_workspace(source: Path, root: Path) -> Path:
+    """Copies a cached workspace, for benchmarks to change.
+
+    :param source: Directory of the cached workspace.
+    :type source: Path
+    :param root: Directory of the copy, which mustn't exist.
+    :type root: Path
+    :return: Directory of the copy.
+    :rtype: Path
+    """
+
+    shutil.copytree(str(source), str(root), ignore=shutil.ignore_patterns(MARKER_FILE))
+    return root
@@ -40,6 +40,7 @@ def tests(session: Session) -> None:
 
 lint_locations = (
     "absorb",
+    "benchmarks",
     "tests",
     "noxfile.py",
     "docs/conf.py",
@@ -134,6 +135,14 @@ def typeguard(session: Session) -> None:
     session.run("pytest", f"--typeguard-packages={package}")
 
 
+@nox.session(python=["3.7"])
+def bench(session: Session) -> None:
+    """Run the benchmarks, failing if a scenario regressed."""
+    args = session.posargs or ["--sizes", "1k,10k,100k"]
+    session.run("poetry", "install", "--no-dev", external=True)
+    session.run("python", "-m", "benchmarks", *args)
+
+
 @nox.session(python=["3.7"])
 def coverage(session: Session) -> None:
     """Upload coverage data."""
@@ -0,0 +1,28 @@
+import atexit
+import os
+import pytest
+import shutil
+import tempfile
+from pathlib import Path
+
+# Tests which don't use the workspace fixture share a temporary absorb
+# directory, in place of ~/absorb. Set before absorb is imported.
+os.environ["ABSORB_HOME"] = tempfile.mkdtemp(prefix="absorb-tests-")
+atexit.register(shutil.rmtree, os.environ["ABSORB_HOME"], True)
+
+
+@pytest.fixture
+def workspace(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Points absorb at an empty directory in place of ~/absorb."""
+    # Imported here so that typeguard can instrument absorb when it starts.
+    from absorb.config import paths, settings
+    from absorb.utils import git_utils
+
+    monkeypatch.setattr(paths, "ROOT_PATH", tmp_path)
+    monkeypatch.setattr(paths, "REPO_PATH", tmp_path)
+    monkeypatch.setattr(paths, "LOGS_PATH", tmp_path / "logs")
+    monkeypatch.setattr(paths, "CACHE_PATH", tmp_path / ".cache")
+    monkeypatch.setattr(paths, "STATE_PATH", tmp_path / ".state")
+    monkeypatch.setattr(settings, "_config", None)
+    monkeypatch.setattr(git_utils, "_repo", None)
+    return tmp_path
@@ -0,0 +1,113 @@
+import click.testing
+import json
+import os
+import pytest
+from pathlib import Path
+from click.testing import CliRunner
+from absorb.core.batch.commands import batch
+from absorb.utils import batch_utils, git_utils
+
+
+@pytest.fixture
+def runner() -> CliRunner:
+    return click.testing.CliRunner()
+
+
+@pytest.fixture(params=["json", "journal", "sqlite"])
+def stores(
+    request: pytest.FixtureRequest, workspace: Path, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Empty stores, with every storage backend."""
+    monkeypatch.setenv("ABSORB_STORAGE_BACKEND", request.param)
+    for file_name in ("tasks.json", "kanban.json", "ideas.json"):
+        (workspace / file_name).write_text("[]")
+    return workspace
+
+
+def read(runner: CliRunner, workspace: Path, file_name: str) -> list:
+    from absorb.core.compact.commands import compact
+
+    runner.invoke(compact)
+    return json.loads((workspace / file_name).read_text())
+
+
+def test_parse_operations() -> None:
+    """Command lines and JSON arrays should both be parsed."""
+    lines = 'absorb tasks add "A task." +1d low @a\n\n# comment\nkanban show\n'
+    assert batch_utils.parse_operations(lines) == [
+        ["tasks", "add", "A task.", "+1d", "low", "@a"],
+        ["kanban", "show"],
+    ]
+    array = '[["idea", "show"], "tasks show"]'
+    assert batch_utils.parse_operations(array) == [["idea", "show"], ["tasks", "show"]]
+    with pytest.raises(ValueError):
+        batch_utils.parse_operations("compact")
+    with pytest.raises(ValueError):
+        batch_utils.parse_operations("[1]")
+
+
+def test_batch(runner: CliRunner, stores: Path) -> None:
+    """A batch should apply every operation with a single commit."""
+    operations = [
+        'tasks add "First." +1d low @a',
+        'tasks add "Second." +2d low @a',
+        "tasks delete #1",
+        'kanban add "Card." doing "." @b',
+        "kanban move-card #1 completed",
+        'idea new "Idea." "." @c',
+    ]
+    result = runner.invoke(batch, input="\n".join(operations))
+    assert result.exit_code == 0
+    assert "Ran 6 operations" in result.output
+
+    commits = list(git_utils.get_repo().iter_commits())
+    assert len(commits) == 1
+    assert commits[0].message.startswith("Batched 6 changes.")
+    assert [task["id"] for task in read(runner, stores, "tasks.json")] == ["#2"]
+    assert read(runner, stores, "kanban.json")[0]["status"] == "completed"
+    assert read(runner, stores, "ideas.json")[0]["name"] == "Idea."
+
+
+def test_batch_is_atomic(runner: CliRunner, stores: Path) -> None:
+    """A failing operation should leave every store untouched."""
+    operations = [
+        ["tasks", "add", "First.", "+1d", "low", "@a"],
+        ["kanban", "add", "Card.", "doing", ".", "@b"],
+        ["tasks", "delete", "#1", "--group", "@a"],
+    ]
+    result = runner.invoke(batch, input=json.dumps(operations))
+    assert result.exit_code == -1
+    assert "Operation 3" in result.output
+
+    assert read(runner, stores, "tasks.json") == []
+    assert read(runner, stores, "kanban.json") == []
+    assert not git_utils.get_repo().head.is_valid()
+
+
+def test_batch_fails_on_no_match(runner: CliRunner, stores: Path) -> None:
+    """An operation selecting no record, or reading a missing store, should
+    abort the batch. Run on its own, the command still exits normally."""
+    from absorb.core.tasks.commands import tasks
+
+    result = runner.invoke(tasks, ["edit", "#42", ".", ".", ".", "."])
+    assert result.exit_code == 0
+    assert result.output == ""
+
+    operations = [
+        'tasks add "First." +1d low @a',
+        "tasks edit #42 . . . .",
+        'tasks add "Second." +1d low @a',
+    ]
+    result = runner.invoke(batch, input="\n".join(operations))
+    assert result.exit_code == -1
+    assert "Operation 2" in result.output
+    assert read(runner, stores, "tasks.json") == []
+    assert not git_utils.get_repo().head.is_valid()
+
+    if os.environ["ABSORB_STORAGE_BACKEND"] == "sqlite":
+        return  # Records are kept in absorb.db.
+    (stores / "kanban.json").unlink()
+    result = runner.invoke(batch, input='tasks add "First." +1d low @a\nkanban show')
+    assert result.exit_code == -1
+    assert not (stores / "kanban.json").exists()
+    assert read(runner, stores, "tasks.json") == []
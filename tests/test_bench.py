@@ -0,0 +1,44 @@
+import json
+import pytest
+from pathlib import Path
+from absorb.config import paths
+from benchmarks import results, scenarios, workspace
+
+
+def test_benchmark_scenarios(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Every scenario should run on a built workspace, which should leave
+    absorb pointed at its own directory."""
+    monkeypatch.setattr(workspace, "SIZES", {"tiny": 200})
+    root_path = paths.ROOT_PATH
+    source = workspace.cached_workspace(tmp_path / "cache", "tiny")
+    assert workspace.cached_workspace(tmp_path / "cache", "tiny") == source
+    root = workspace.copy_workspace(source, tmp_path / "run")
+    assert paths.ROOT_PATH == root_path
+
+    tasks = json.loads((root / "tasks.json").read_text())
+    assert len(tasks) == 200 and tasks[-1]["id"] == "#200"
+    notes = sorted((root / "notes").glob("*.md"))
+    assert len(notes) == workspace.DESCRIPTION_FILES
+
+    for scenario in scenarios.SCENARIOS:
+        timing = scenarios.time_scenario(scenario, root, 200, "in-process", 1, 0)
+        assert timing["runs"] == 1 and timing["median_ms"] > 0
+    with pytest.raises(scenarios.BenchmarkError):
+        scenarios.run_in_process(root, ["tasks", "show-group", "nothing"])
+
+
+def test_compare_results() -> None:
+    """Scenarios should only regress past the threshold and the noise floor."""
+    baseline = {"timings": {"a": {"median_ms": 100.0}, "b": {"median_ms": 1.0}}}
+    measured = {
+        "timings": {
+            "a": {"median_ms": 130.0},
+            "b": {"median_ms": 3.0},
+            "c": {"median_ms": 5.0},
+        }
+    }
+    comparisons = {c.key: c for c in results.compare(measured, baseline, 0.25)}
+    assert comparisons["a"].regressed and comparisons["a"].change == pytest.approx(0.3)
+    assert not comparisons["b"].regressed
+    assert comparisons["c"].baseline_ms is None and not comparisons["c"].regressed
+    assert not results.compare(measured, baseline, 0.5)[0].regressed
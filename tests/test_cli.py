@@ -1,15 +1,88 @@
 import click.testing
 import pytest
+import subprocess  # noqa: S404
+import sys
 from click.testing import CliRunner
 from absorb.main import cli
 
+# Generous ceiling for `import absorb.main` in a fresh interpreter; the lazy
+# group should only cost the click import.
+IMPORT_BUDGET = 0.25
+
 
 @pytest.fixture
 def runner() -> CliRunner:
     return click.testing.CliRunner()
 
 
+def run_python(code: str) -> str:
+    # Runs the test's own code in a fresh interpreter.
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
 def test_app(runner: CliRunner) -> None:
     """The main group should return 0."""
     result = runner.invoke(cli)
     assert result.exit_code == 0
+
+
+def test_app_lists_lazy_commands(runner: CliRunner) -> None:
+    """The help output should list the built-in groups."""
+    result = runner.invoke(cli, ["--help"])
+    assert result.exit_code == 0
+    for name in ("tasks", "kanban", "idea"):
+        assert name in result.output
+
+
+def test_app_unknown_command(runner: CliRunner) -> None:
+    """Unknown commands should fail with a usage error."""
+    result = runner.invoke(cli, ["not-a-command"])
+    assert result.exit_code == 2
+
+
+def test_import_budget() -> None:
+    """Importing the CLI shouldn't import any command group, git or rich, and
+    should stay within the import budget."""
+    output = run_python(
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import absorb.main\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = [m for m in ('git', 'rich', 'absorb.core.tasks.commands') if m in sys.modules]\n"
+        "print(elapsed, len(heavy))"
+    )
+    elapsed, heavy = output.split()
+    assert heavy == "0"
+    assert float(elapsed) < IMPORT_BUDGET
+
+
+def test_help_does_not_import_groups() -> None:
+    """`absorb --help` should not import the command groups or
+    pkg_resources."""
+    output = run_python(
+        "import sys\n"
+        "from absorb.main import cli\n"
+        "try:\n"
+        "    cli(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sum(m.startswith('absorb.core') for m in sys.modules), 'pkg_resources' in sys.modules)"
+    )
+    assert output == "0 False"
+
+
+def test_dispatch_imports_only_one_group() -> None:
+    """Dispatching a group should import that group only."""
+    output = run_python(
+        "import sys\n"
+        "from absorb.main import cli\n"
+        "try:\n"
+        "    cli(['tasks', '--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('absorb.core.tasks.commands' in sys.modules, 'absorb.core.kanban.commands' in sys.modules)"
+    )
+    assert output == "True False"
@@ -0,0 +1,78 @@
+import json
+import os
+import click.testing
+import pytest
+from pathlib import Path
+from click.testing import CliRunner
+from absorb.core.find.commands import find
+from absorb.utils import search_utils
+
+
+@pytest.fixture
+def runner() -> CliRunner:
+    return click.testing.CliRunner()
+
+
+def write_store(workspace: Path, file_name: str, records: list) -> None:
+    (workspace / file_name).write_text(json.dumps(records))
+
+
+def test_find_ranks_names_and_description_files(
+    runner: CliRunner, workspace: Path
+) -> None:
+    """Matches in names and description files should be found, every term
+    required, names ranking first."""
+    notes = workspace / "notes.md"
+    notes.write_text("# Notes\n\nA compiler written in rust, with a parser.\n")
+    write_store(
+        workspace,
+        "ideas.json",
+        [
+            {"id": "#1", "name": "Side project", "description": str(notes), "tags": []},
+            {"id": "#2", "name": "Rust parser", "description": ".", "tags": []},
+            {"id": "#3", "name": "Garden", "description": "rust on tools", "tags": []},
+        ],
+    )
+    write_store(
+        workspace,
+        "tasks.json",
+        [
+            {
+                "id": "#1",
+                "name": "Fix the parser",
+                "date": "2030-01-01T10:00:00.000000",
+                "due_date": "2030-01-02T10:00:00.000000",
+                "priority": "low",
+                "group": [],
+            }
+        ],
+    )
+
+    index = search_utils.SearchIndex()
+    assert index.refresh() == 4
+    results = index.search("Rust parser")
+    assert [(store, record_id) for store, record_id, _, _ in results] == [
+        ("ideas", "#2"),
+        ("ideas", "#1"),
+    ]
+    assert index.search("parser", ["tasks"])[0][:2] == ("tasks", "#1")
+    assert index.refresh() == 0
+
+    # A changed description file is reindexed, a deleted record dropped.
+    notes.write_text("Now about gardening only.\n")
+    os.utime(notes, ns=(0, 1))
+    write_store(
+        workspace,
+        "ideas.json",
+        [{"id": "#1", "name": "Side project", "description": str(notes), "tags": []}],
+    )
+    assert index.refresh() == 1
+    assert index.search("rust") == []
+    assert index.search("gardening")[0][:2] == ("ideas", "#1")
+    index.close()
+
+    result = runner.invoke(find, ["gardening", "--store", "ideas"])
+    assert result.exit_code == 0
+    assert "Side project" in result.output
+    result = runner.invoke(find, ["nothing"])
+    assert "No matches" in result.output
@@ -1,4 +1,5 @@
 import click.testing
+import json
 import pytest
 import os
 from pathlib import Path
@@ -226,3 +227,72 @@ def test_idea_show_FileNotFoundError(
     assert result.exit_code == 0
     os.remove(ROOT_PATH / "ideas.json")
     os.rename(ROOT_PATH / "_ideas.json", ROOT_PATH / "ideas.json")
+
+
+def test_idea_import(runner: CliRunner, workspace: Path) -> None:
+    """Importing ideas from a CSV file should add them in a single commit."""
+    source = workspace / "ideas.csv"
+    source.write_text("name,description,tags\nFirst,Some text.,@a\nSecond,,\n")
+    result = runner.invoke(idea, ["import", str(source)])
+    assert result.exit_code == 0
+    assert "Imported 2 ideas" in result.output
+
+    imported = json.loads((workspace / "ideas.json").read_text())
+    assert [(entry["name"], entry["tags"]) for entry in imported] == [
+        ("First", ["a"]),
+        ("Second", []),
+    ]
+
+
+def test_idea_show_tag(runner: CliRunner, workspace: Path) -> None:
+    """Ideas should be filtered by any of the tags with --any."""
+    source = workspace / "ideas.csv"
+    source.write_text("name,description,tags\nFirst,.,@a\nSecond,.,@b\nThird,.,@c\n")
+    runner.invoke(idea, ["import", str(source)])
+
+    result = runner.invoke(idea, ["show", "--tag", "a b", "--any"])
+    assert result.exit_code == 0
+    assert "First" in result.output and "Second" in result.output
+    assert "Third" not in result.output
+
+
+def test_idea_open_cached_descriptions(runner: CliRunner, workspace: Path) -> None:
+    """Description files should be previewed, cached, and read again once
+    they change."""
+    (workspace / "ideas.json").write_text("[]")
+    notes = workspace / "notes.md"
+    notes.write_text("first line\nsecond line\nthird line\n")
+    rows = [
+        json.dumps({"name": "With notes", "description": os.fspath(notes)}),
+        json.dumps({"name": "Inline", "description": "Inline description"}),
+    ]
+    runner.invoke(idea, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(idea, ["open", "#1", "#2", "--lines", "2"])
+    assert result.exit_code == 0
+    assert "second line" in result.output and "third line" not in result.output
+    assert "…" in result.output and "Inline description" in result.output
+    assert (workspace / ".cache" / "descriptions.json").exists()
+
+    notes.write_text("rewritten notes\n")
+    result = runner.invoke(idea, ["open", "#1"])
+    assert "rewritten notes" in result.output and "first line" not in result.output
+
+
+def test_idea_open_json(runner: CliRunner, workspace: Path) -> None:
+    """Opened ideas should be output as JSON with the text of their
+    descriptions."""
+    (workspace / "ideas.json").write_text("[]")
+    notes = workspace / "notes.md"
+    notes.write_text("first line\nsecond line\n")
+    rows = [json.dumps({"name": "With notes", "description": os.fspath(notes)})]
+    runner.invoke(idea, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(
+        idea,
+        ["open", "#1", "#9", "--format", "json", "--fields", "id,description_text"],
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.output) == [
+        {"id": "#1", "description_text": "first line\nsecond line\n"}
+    ]
@@ -1,10 +1,12 @@
 import click.testing
+import json
 import pytest
 import os
 from pathlib import Path
 from click.testing import CliRunner
 from absorb.core.kanban.commands import kanban
 from absorb.config.paths import ROOT_PATH
+from absorb.utils import git_utils
 
 card_path = os.fspath(
     Path(Path.cwd() / Path(Path("tests") / Path("files") / "example-fail.json"))
@@ -255,3 +257,119 @@ def test_kanban_show_FileNotFoundError(
         ROOT_PATH / "_kanban.json",
         ROOT_PATH / "kanban.json",
     )
+
+
+def test_kanban_show_does_not_open_repo(runner: CliRunner) -> None:
+    """Showing the kanban board should never open the git repository."""
+    git_utils._repo = None
+    runner.invoke(kanban, ["show"])
+    assert git_utils._repo is None
+
+
+def test_kanban_import(runner: CliRunner, workspace: Path) -> None:
+    """Importing cards should skip rows missing a status."""
+    (workspace / "kanban.json").write_text("[]")
+    rows = [
+        '{"name": "First", "status": "Doing", "tags": "@a, @b"}',
+        '{"name": "Second"}',
+        '["not", "an", "object"]',
+    ]
+    result = runner.invoke(
+        kanban, ["import", "--format", "jsonl"], input="\n".join(rows) + "\n"
+    )
+    assert result.exit_code == 0
+    assert "2 rejected" in result.output
+
+    imported = json.loads((workspace / "kanban.json").read_text())
+    assert imported == [
+        {
+            "id": "#1",
+            "name": "First",
+            "status": "doing",
+            "description": ".",
+            "tags": ["a", "b"],
+        }
+    ]
+
+
+def test_kanban_bulk_move_card(runner: CliRunner, workspace: Path) -> None:
+    """Moving cards with filters should move every matching card in a single
+    commit."""
+    (workspace / "kanban.json").write_text("[]")
+    rows = [
+        '{"name": "First", "status": "doing", "tags": "@sprint"}',
+        '{"name": "Second", "status": "doing", "tags": ""}',
+        '{"name": "Third", "status": "planned", "tags": "@sprint"}',
+    ]
+    runner.invoke(kanban, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(
+        kanban, ["move-card", ".", "completed", "--status", "doing", "--tag", "sprint"]
+    )
+    assert result.exit_code == 0
+    moved = json.loads((workspace / "kanban.json").read_text())
+    assert [card["status"] for card in moved] == ["completed", "doing", "planned"]
+    assert git_utils.get_repo().head.commit.message == (
+        "Moved 1 card to completed in the kanban board."
+    )
+
+    result = runner.invoke(kanban, ["delete", "--tag", "@sprint"])
+    assert result.exit_code == 0
+    remaining = json.loads((workspace / "kanban.json").read_text())
+    assert [card["name"] for card in remaining] == ["Second"]
+
+
+def test_kanban_show_page(runner: CliRunner, workspace: Path) -> None:
+    """The kanban board should be paginated in each column."""
+    (workspace / "kanban.json").write_text("[]")
+    rows = [
+        '{"name": "Doing one", "status": "doing"}',
+        '{"name": "Doing two", "status": "doing"}',
+        '{"name": "Planned one", "status": "planned"}',
+    ]
+    runner.invoke(kanban, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(kanban, ["show", "--limit", "1"])
+    assert result.exit_code == 0
+    assert "Doing one" in result.output and "Planned one" in result.output
+    assert "Doing two" not in result.output
+
+
+def test_kanban_show_tag(runner: CliRunner, workspace: Path) -> None:
+    """The kanban board should be filtered by tags."""
+    (workspace / "kanban.json").write_text("[]")
+    rows = [
+        '{"name": "Tagged card", "status": "doing", "tags": "@sprint @ui"}',
+        '{"name": "Other card", "status": "doing", "tags": "@ui"}',
+    ]
+    runner.invoke(kanban, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(kanban, ["show", "--tag", "@sprint", "--tag", "ui"])
+    assert result.exit_code == 0
+    assert "Tagged card" in result.output and "Other card" not in result.output
+
+
+def test_kanban_show_columns(runner: CliRunner, workspace: Path) -> None:
+    """The board should have the configured columns, extra columns for other
+    statuses, WIP counts and truncated columns."""
+    (workspace / "kanban.json").write_text("[]")
+    (workspace / "config.json").write_text(
+        json.dumps(
+            {"kanban_columns": ["todo", "doing"], "kanban_wip_limits": {"doing": 2}}
+        )
+    )
+    rows = [
+        '{"name": "Doing one", "status": "doing"}',
+        '{"name": "Doing two", "status": "doing"}',
+        '{"name": "Doing three", "status": "doing"}',
+        '{"name": "Blocked one", "status": "blocked"}',
+    ]
+    runner.invoke(kanban, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(kanban, ["show", "--max-cards", "2"])
+    assert result.exit_code == 0
+    assert "Todo (0)" in result.output and "(3/2)" in result.output
+    assert "Blocked (1)" in result.output and "Blocked one" in result.output
+    assert "Doing two" in result.output and "Doing three" not in result.output
+    assert "+1 more" in result.output
+    assert runner.invoke(kanban, ["show", "--max-cards", "2"]).output == result.output
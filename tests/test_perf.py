@@ -0,0 +1,97 @@
+import json
+import click.testing
+import pytest
+import tracemalloc
+from pathlib import Path
+from click.testing import CliRunner
+from absorb.main import cli
+from absorb.utils import profile_utils, trace_utils
+
+
+@pytest.fixture
+def runner() -> CliRunner:
+    return click.testing.CliRunner()
+
+
+def test_perf_report(
+    runner: CliRunner, workspace: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Sampled commands should be traced, and reported per command and
+    phase."""
+    (workspace / "ideas.json").write_text("[]")
+    runner.invoke(cli, ["idea", "show"])
+    assert not (workspace / "logs" / trace_utils.TRACE_FILE).exists()
+
+    monkeypatch.setenv("ABSORB_TRACE_SAMPLE_RATE", "1")
+    for _ in range(3):
+        assert runner.invoke(cli, ["idea", "show"]).exit_code == 0
+    lines = (workspace / "logs" / trace_utils.TRACE_FILE).read_text().splitlines()
+    trace = json.loads(lines[-1])
+    assert len(lines) == 3 and trace["command"] == "idea show"
+    phases = [trace_span["phase"] for trace_span in trace["spans"]]
+    assert phases[0] == "startup"
+    assert {"store.read", "store.parse", "render"} <= set(phases)
+
+    monkeypatch.setenv("ABSORB_TRACE_SAMPLE_RATE", "0")
+    result = runner.invoke(cli, ["perf", "report", "--command", "idea show"])
+    assert result.exit_code == 0
+    assert "idea show" in result.output and "store.parse" in result.output
+    assert "p99 (ms)" in result.output
+
+
+def test_percentile() -> None:
+    """Percentiles should follow the nearest-rank method."""
+    values = [float(value) for value in range(1, 101)]
+    assert trace_utils.percentile(values, 50) == 50.0
+    assert trace_utils.percentile(values, 99) == 99.0
+    assert trace_utils.percentile([3.0], 95) == 3.0
+
+
+def test_profile(runner: CliRunner, workspace: Path) -> None:
+    """--profile should write a profile of the command next to the logs."""
+    (workspace / "ideas.json").write_text("[]")
+    result = runner.invoke(
+        cli, ["--profile", "--profile-format", "collapsed", "idea", "show"]
+    )
+    assert result.exit_code == 0
+    (profile_path,) = (workspace / "logs").glob("profile-*.collapsed")
+    stacks = profile_path.read_text().splitlines()
+    assert any("show (commands.py" in stack for stack in stacks)
+    assert all(stack.rsplit(" ", 1)[1].isdigit() for stack in stacks)
+
+    assert runner.invoke(cli, ["--profile", "idea", "show"]).exit_code == 0
+    assert list((workspace / "logs").glob("profile-*.pstats"))
+
+
+def test_memprofile(runner: CliRunner, workspace: Path) -> None:
+    """--memprofile should report the memory of each phase."""
+    (workspace / "ideas.json").write_text(
+        json.dumps(
+            [
+                {"id": f"#{n}", "name": "x" * 100, "description": ".", "tags": []}
+                for n in range(1, 20001)
+            ]
+        )
+    )
+    result = runner.invoke(cli, ["--memprofile", "idea", "show", "--limit", "1"])
+    assert result.exit_code == 0
+    (report_path,) = (workspace / "logs").glob("memprofile-*.txt")
+    report = report_path.read_text()
+    assert report.startswith("absorb idea show\nPeak memory: ")
+    assert "store.parse" in report and "Top allocation sites of store.parse:" in report
+
+
+def test_memprofile_without_phase_peaks(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Without tracemalloc.reset_peak (before Python 3.9), the peaks of the
+    phases should be reported as unavailable."""
+    monkeypatch.setattr(profile_utils, "PHASE_PEAKS", False)
+    profiler = profile_utils.MemoryProfiler()
+    tracemalloc.start()
+    try:
+        with profiler.phase("store.parse"):
+            pass
+    finally:
+        tracemalloc.stop()
+    report = profiler.report("idea show")
+    assert "n/a" in report.splitlines()[4]
+    assert "Peaks of the phases need Python 3.9 or later." in report
@@ -0,0 +1,100 @@
+import click
+import click.testing
+import pytest
+from pathlib import Path
+from typing import Dict, Iterator, List
+from click.testing import CliRunner
+from absorb.config import paths
+from absorb.main import cli
+from absorb.utils import plugin_utils
+
+
+@click.command()
+def hello() -> None:
+    """Says hello."""
+    click.echo("hello from a plugin")
+
+
+@pytest.fixture
+def runner() -> CliRunner:
+    return click.testing.CliRunner()
+
+
+@pytest.fixture
+def scans(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[List[int]]:
+    """Points the plugin index at a temporary directory and fakes the entry
+    point scan, recording every scan.
+
+    :yield: The recorded scans, one entry each.
+    :rtype: Iterator[List[int]]
+    """
+    calls: List[int] = []
+
+    def fake_scan() -> Dict[str, str]:
+        calls.append(1)
+        return {"hello": "tests.test_plugins:hello"}
+
+    monkeypatch.setattr(paths, "CACHE_PATH", tmp_path)
+    monkeypatch.setattr(plugin_utils, "scan_entry_points", fake_scan)
+    monkeypatch.setattr(plugin_utils, "_plugins", None)
+    cli.commands.pop("hello", None)
+    yield calls
+    cli.commands.pop("hello", None)
+
+
+def test_discover_plugins_uses_index(scans: List[int]) -> None:
+    """A second discovery in a new process should read the on-disk index
+    instead of scanning the environment."""
+    assert "hello" in plugin_utils.discover_plugins()
+    plugin_utils._plugins = None
+    assert "hello" in plugin_utils.discover_plugins()
+    assert len(scans) == 1
+
+
+def test_discover_plugins_environment_changed(
+    scans: List[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A changed environment key should invalidate the index."""
+    plugin_utils.discover_plugins()
+    plugin_utils._plugins = None
+    monkeypatch.setattr(plugin_utils, "environment_key", lambda: {"changed": 1})
+    plugin_utils.discover_plugins()
+    assert len(scans) == 2
+
+
+def test_plugin_dispatch(scans: List[int], runner: CliRunner) -> None:
+    """Plugins should be imported and run when dispatched."""
+    result = runner.invoke(cli, ["hello"])
+    assert result.exit_code == 0
+    assert "hello from a plugin" in result.output
+
+
+def test_plugin_help_is_cached(scans: List[int], runner: CliRunner) -> None:
+    """Once a plugin is loaded, its short help should be listed in `--help`
+    from the index."""
+    plugin_utils.load_plugin("hello")
+    plugin_utils._plugins = None
+    result = runner.invoke(cli, ["--help"])
+    assert "Says hello." in result.output
+
+
+def test_broken_plugin(
+    scans: List[int], runner: CliRunner, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A broken plugin shouldn't take down the CLI."""
+    monkeypatch.setattr(
+        plugin_utils, "scan_entry_points", lambda: {"hello": "tests.missing:hello"}
+    )
+    result = runner.invoke(cli, ["--help"])
+    assert result.exit_code == 0
+    result = runner.invoke(cli, ["plugins", "--timings", "--refresh"])
+    assert result.exit_code == 0
+    assert "failed" in result.output
+
+
+def test_plugins_timings(scans: List[int], runner: CliRunner) -> None:
+    """The plugins command should report the load time of every plugin."""
+    result = runner.invoke(cli, ["plugins", "--timings"])
+    assert result.exit_code == 0
+    assert "hello" in result.output
+    assert "ms" in result.output
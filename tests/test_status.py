@@ -0,0 +1,51 @@
+import click.testing
+import pytest
+from pathlib import Path
+from click.testing import CliRunner
+from absorb.core.status.commands import status
+from absorb.utils import git_utils
+
+
+@pytest.fixture
+def runner() -> CliRunner:
+    return click.testing.CliRunner()
+
+
+@pytest.fixture
+def queued(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Queues one change for the background worker, without starting it."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "async")
+    monkeypatch.setattr(git_utils, "spawn_worker", lambda: None)
+    (workspace / "tasks.json").write_text("[]")
+    git_utils.record([workspace / "tasks.json"], "Queued change.")
+    return workspace
+
+
+def test_status(runner: CliRunner, queued: Path) -> None:
+    """The status command should report the queued commits."""
+    result = runner.invoke(status)
+    assert result.exit_code == 0
+    assert "Commit strategy: async" in result.output
+    assert "Queued commits: 1" in result.output
+
+
+def test_status_flush(runner: CliRunner, queued: Path) -> None:
+    """Flushing should commit the queued changes."""
+    result = runner.invoke(status, ["--flush"])
+    assert result.exit_code == 0
+    assert "Queued commits: 0" in result.output
+
+
+def test_status_failure(
+    runner: CliRunner, queued: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A failed background commit should be reported and return -1."""
+
+    def fail(entry: dict) -> bool:
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(git_utils, "commit_snapshot", fail)
+    result = runner.invoke(status, ["--flush"])
+    assert result.exit_code == -1
+    assert "disk full" in result.output
+    assert "Queued commits: 1" in result.output
@@ -0,0 +1,585 @@
+import click.testing
+import json
+import os
+import pytest
+import shutil
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+from typing import Any
+from click.testing import CliRunner
+from absorb import storage
+from absorb.core.compact.commands import compact
+from absorb.core.kanban.commands import kanban
+from absorb.core.tasks.commands import tasks
+from absorb.utils import git_utils
+
+
+@pytest.fixture
+def runner() -> CliRunner:
+    return click.testing.CliRunner()
+
+
+@pytest.fixture(params=["json", "journal", "sqlite"])
+def backend(
+    request: pytest.FixtureRequest, workspace: Path, monkeypatch: pytest.MonkeyPatch
+) -> str:
+    """Runs a test against every storage backend."""
+    monkeypatch.setenv("ABSORB_STORAGE_BACKEND", request.param)
+    (workspace / "tasks.json").write_text("[]")
+    (workspace / "kanban.json").write_text("[]")
+    return request.param
+
+
+def card(name: str, status: str, tags: list) -> dict:
+    return {"name": name, "status": status, "description": ".", "tags": tags}
+
+
+def test_store_add_and_get(backend: str) -> None:
+    """Added records should get sequential IDs and be found by ID."""
+    store = storage.get_store("kanban")
+    first = store.add(card("First", "doing", ["a"]))
+    second = store.add(card("Second", "planned", ["b"]))
+    assert (first["id"], second["id"]) == ("#1", "#2")
+    assert store.get("#2")["name"] == "Second"
+    assert store.get("#3") is None
+    assert store.save()
+
+
+def test_store_update_and_delete(backend: str) -> None:
+    """Updates and deletes should be persisted on save."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    store.add(card("Second", "planned", ["b"]))
+    store.save()
+
+    store = storage.get_store("kanban")
+    assert store.update("#1", {"status": "completed", "tags": ["c"]})["tags"] == ["c"]
+    assert store.update("#9", {"status": "completed"}) is None
+    assert store.delete("#2")
+    assert not store.delete("#2")
+    store.save()
+
+    store = storage.get_store("kanban")
+    assert [record["id"] for record in store.all()] == ["#1"]
+    assert store.find(tag="c") == store.all()
+    assert store.find(tag="a") == []
+
+
+def test_store_find(backend: str) -> None:
+    """Records should be filtered by tag and status, in insertion order."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a", "b"]))
+    store.add(card("Second", "doing", ["b"]))
+    store.add(card("Third", "planned", ["b"]))
+    names = [record["name"] for record in store.find(tag="b", status="doing")]
+    assert names == ["First", "Second"]
+
+
+def test_store_find_due_before(backend: str) -> None:
+    """Records should be filtered by due date, and selected by ID or filters."""
+    store = storage.get_store("tasks")
+    for name, due_date in [("Soon", "2030-01-01 10:00:00"), ("Later", "2031-01-01")]:
+        store.add({"name": name, "due_date": due_date, "group": ["a"]})
+    store.add({"name": "Undated", "group": []})
+    found = store.find(due_before="2030-06-01 00:00:00.000000")
+    assert [record["name"] for record in found] == ["Soon"]
+    assert store.select("#2") == [store.get("#2")]
+    assert store.select("#9") == []
+    assert len(store.select(".", tag="a")) == 2
+
+
+def test_store_save_unchanged(backend: str) -> None:
+    """Saving without mutations should report no change."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    assert store.save()
+    store.update("#1", {"status": "doing"})
+    assert not store.save()
+
+
+def test_store_ids_not_reused(backend: str) -> None:
+    """The ID of a deleted record shouldn't be given to a new one."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    store.add(card("Second", "doing", ["a"]))
+    store.save()
+
+    store = storage.get_store("kanban")
+    store.delete("#2")
+    store.save()
+
+    store = storage.get_store("kanban")
+    assert store.add(card("Third", "doing", ["a"]))["id"] == "#3"
+    store.save()
+    store = storage.get_store("kanban")
+    assert [record["name"] for record in store.all()] == ["First", "Third"]
+
+
+def test_store_renumbers_duplicates(backend: str, workspace: Path) -> None:
+    """Duplicate IDs left by older versions should be renumbered on load."""
+    records = [
+        {"id": "#1", **card("First", "doing", [])},
+        {"id": "#2", **card("Second", "doing", [])},
+        {"id": "#2", **card("Third", "doing", [])},
+    ]
+    (workspace / "kanban.json").write_text(json.dumps(records))
+
+    store = storage.get_store("kanban")
+    assert [record["id"] for record in store.all()] == ["#1", "#2", "#3"]
+    assert store.get("#3")["name"] == "Third"
+    assert store.add(card("Fourth", "doing", []))["id"] == "#4"
+
+
+def test_store_upgrades_dates(backend: str, workspace: Path) -> None:
+    """Dates stored by older versions should be read in ISO 8601, and filtered
+    chronologically."""
+    legacy = {"name": "Old", "priority": "low", "group": []}
+    records = [
+        {"id": "#1", "date": "2024-01-01 09:00:00.000000", **legacy},
+        {"id": "#2", "date": "2024-01-01 09:00:00", **legacy},
+    ]
+    records[0]["due_date"] = "2030-01-01 10:00:00.000000"
+    records[1]["due_date"] = "2031-01-01 10:00:00"
+    (workspace / "tasks.json").write_text(json.dumps(records))
+
+    store = storage.get_store("tasks")
+    assert [record["due_date"] for record in store.all()] == [
+        "2030-01-01T10:00:00.000000",
+        "2031-01-01T10:00:00.000000",
+    ]
+    assert store.get("#2")["date"] == "2024-01-01T09:00:00.000000"
+    found = store.find(due_before="2030-01-01T12:00:00.000000")
+    assert [record["id"] for record in found] == ["#1"]
+
+
+def test_store_find_tags(backend: str) -> None:
+    """Tag queries should match every tag or any of them, and follow
+    mutations."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a", "b"]))
+    store.add(card("Second", "doing", ["b"]))
+    store.add(card("Third", "planned", ["c"]))
+    store.save()
+
+    def names(tags: list, match_all: bool = True) -> list:
+        return [record["name"] for record in store.find_tags(tags, match_all)]
+
+    assert names(["a", "b"]) == ["First"]
+    assert names(["a", "c"], match_all=False) == ["First", "Third"]
+    assert names(["missing"]) == []
+
+    store.update("#2", {"tags": ["a"]})
+    store.delete("#1")
+    store.save()
+    assert names(["a"]) == ["Second"]
+    assert names(["b"]) == []
+    store = storage.get_store("kanban")
+    assert names(["a", "c"], match_all=False) == ["Second", "Third"]
+
+
+def test_tag_index_cache(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch, backend: str
+) -> None:
+    """The cached tag index should be reused for the same content, and
+    rebuilt when the store file changes. The store is only hashed by the
+    first read validating the index, not by each save."""
+    if backend == "sqlite":
+        pytest.skip("SQLite indexes tags in the database.")
+    hashed = []
+    digest = storage.tag_index.digest
+    monkeypatch.setattr(
+        storage.tag_index,
+        "digest",
+        lambda file_paths: hashed.append(1) or digest(file_paths),
+    )
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    store.save()
+    store.compact()
+    store.add(card("Second", "doing", ["c"]))
+    store.save()
+    assert (workspace / ".cache" / "kanban.tags.json").exists()
+    assert hashed == []
+    assert len(storage.get_store("kanban").find_tags(["a"])) == 1
+    assert len(storage.get_store("kanban").find_tags(["a"])) == 1
+    assert hashed == [1]
+    store.compact()
+    assert len(storage.get_store("kanban").find_tags(["a"])) == 1
+
+    # Same content, rewritten: the index is reused.
+    content = (workspace / "kanban.json").read_text()
+    (workspace / "kanban.json").unlink()
+    (workspace / "kanban.json").write_text(content)
+    builds = []
+    build = storage.tag_index.TagIndex.build
+    monkeypatch.setattr(
+        storage.tag_index.TagIndex,
+        "build",
+        lambda index, *args: builds.append(1) or build(index, *args),
+    )
+    assert len(storage.get_store("kanban").find_tags(["a"])) == 1
+    assert builds == []
+
+    # Changed content: the index is rebuilt.
+    records = json.loads(content)
+    records[0]["tags"] = ["b"]
+    (workspace / "kanban.json").write_text(json.dumps(records))
+    store = storage.get_store("kanban")
+    assert store.find_tags(["a"]) == []
+    assert len(store.find_tags(["b"])) == 1
+    assert builds == [1]
+
+
+def test_tag_index_unsaved_mutation(workspace: Path, backend: str) -> None:
+    """A mutation which is never saved shouldn't leave its tags in the cached
+    index."""
+    if backend == "sqlite":
+        pytest.skip("SQLite indexes tags in the database.")
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    store.save()
+    shutil.rmtree(workspace / ".cache")
+
+    store = storage.get_store("kanban")
+    store.update("#1", {"tags": ["ghost"]})
+    assert [record["id"] for record in store.find_tags(["ghost"])] == ["#1"]
+    store.reload()
+    assert not (workspace / ".cache" / "kanban.tags.json").exists()
+
+    store = storage.get_store("kanban")
+    assert store.find_tags(["ghost"]) == []
+    assert [record["id"] for record in store.find_tags(["a"])] == ["#1"]
+    assert (workspace / ".cache" / "kanban.tags.json").exists()
+
+
+def test_snapshot_cache(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch, backend: str
+) -> None:
+    """Records should be loaded from the snapshot while it matches the JSON
+    file, same content rewritten included, and from the file otherwise."""
+    if backend == "sqlite":
+        pytest.skip("SQLite doesn't load the JSON file.")
+    monkeypatch.setenv("ABSORB_SNAPSHOT_CACHE", "1")
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    store.save()
+    store.compact()
+    assert (workspace / ".cache" / "kanban.snapshot").exists()
+
+    hits = []
+    load = storage.snapshot_cache.SnapshotCache.load
+
+    def counted_load(cache: Any, *args: Any) -> Any:
+        records = load(cache, *args)
+        hits.append(records is not None)
+        return records
+
+    monkeypatch.setattr(storage.snapshot_cache.SnapshotCache, "load", counted_load)
+    assert storage.get_store("kanban").get("#1")["name"] == "First"
+
+    # Same content, rewritten: the snapshot is used, and only hashes the file
+    # the first time.
+    content = (workspace / "kanban.json").read_text()
+    (workspace / "kanban.json").unlink()
+    (workspace / "kanban.json").write_text(content)
+    hashed = []
+    digest = storage.snapshot_cache.content_digest
+    monkeypatch.setattr(
+        storage.snapshot_cache,
+        "content_digest",
+        lambda content: hashed.append(1) or digest(content),
+    )
+    assert storage.get_store("kanban").get("#1")["name"] == "First"
+    assert storage.get_store("kanban").get("#1")["name"] == "First"
+    assert hashed == [1]
+
+    # Changed content: the file is parsed, and the snapshot written again.
+    records = json.loads(content)
+    records[0]["name"] = "Edited"
+    (workspace / "kanban.json").write_text(json.dumps(records))
+    assert storage.get_store("kanban").get("#1")["name"] == "Edited"
+    assert storage.get_store("kanban").get("#1")["name"] == "Edited"
+    assert hits == [True, True, True, False, True]
+
+    # Records needing a fix aren't snapshotted; the counter still follows the
+    # IDs of records loaded from the snapshot.
+    records.append(dict(records[0], name="Duplicate"))
+    (workspace / "kanban.json").write_text(json.dumps(records))
+    assert [r["id"] for r in storage.get_store("kanban").all()] == ["#1", "#2"]
+    assert [r["id"] for r in storage.get_store("kanban").all()] == ["#1", "#2"]
+    assert hits[5:] == [False, False]
+    records[1]["id"] = "#7"
+    (workspace / "kanban.json").write_text(json.dumps(records))
+    storage.get_store("kanban").load()
+    store = storage.get_store("kanban")
+    assert store.add(card("Next", "todo", []))["id"] == "#8"
+    assert hits[7:] == [False, True]
+
+
+def test_store_export_matches_json(backend: str, workspace: Path) -> None:
+    """Every backend should export the same JSON file."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    store.save()
+    store.compact()
+    store.export()
+    exported = json.loads((workspace / "kanban.json").read_text())
+    assert exported == [{"id": "#1", **card("First", "doing", ["a"])}]
+
+
+def test_sqlite_imports_json(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The SQLite backend should import the existing JSON file once."""
+    records = [{"id": "#1", **card("First", "doing", ["a"])}]
+    (workspace / "kanban.json").write_text(json.dumps(records))
+    monkeypatch.setenv("ABSORB_STORAGE_BACKEND", "sqlite")
+    assert storage.get_store("kanban").all() == records
+
+    (workspace / "kanban.json").write_text("[]")
+    assert storage.get_store("kanban").all() == records
+
+
+def test_sqlite_transaction_keeps_pending(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Taking the lock of an SQLite store shouldn't roll back the pending
+    mutations of the shared connection; discarding should."""
+    monkeypatch.setenv("ABSORB_STORAGE_BACKEND", "sqlite")
+    store = storage.get_store("kanban")
+    ideas = storage.get_store("ideas")
+    store.add(card("First", "doing", ["a"]))
+    with ideas.transaction():
+        pass
+    with store.transaction():
+        assert len(store.all()) == 1
+    store.discard()
+    assert store.all() == []
+    assert not store.save()
+
+
+def test_sqlite_find_uses_indexes(backend: str) -> None:
+    """Tag and status lookups should use the indexes."""
+    if backend != "sqlite":
+        pytest.skip("SQLite only")
+    store = storage.get_store("kanban")
+    plan = store.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM kanban WHERE status = ? AND id IN "
+        "(SELECT record_id FROM kanban_tags WHERE tag = ?)",
+        ("doing", "a"),
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "kanban_tags_tag" in details
+    assert "SCAN kanban " not in details + " "
+
+
+def test_commands_with_backend(
+    backend: str, runner: CliRunner, workspace: Path
+) -> None:
+    """Commands should work with every backend, and the committed JSON file
+    should hold the records (once compacted)."""
+    result = runner.invoke(tasks, ["add", "New task.", "+1d", "low", "@relax"])
+    assert result.exit_code == 0
+    result = runner.invoke(tasks, ["show-group", "@relax"])
+    assert result.exit_code == 0
+    result = runner.invoke(kanban, ["add", "New card.", "doing", ".", "@new"])
+    assert result.exit_code == 0
+    result = runner.invoke(kanban, ["move-card", "#1", "completed"])
+    assert result.exit_code == 0
+    result = runner.invoke(compact)
+    assert result.exit_code == 0
+
+    repo = git_utils.get_repo()
+    committed = json.loads(repo.head.commit.tree["kanban.json"].data_stream.read())
+    assert committed[0]["status"] == "completed"
+    committed = json.loads(repo.head.commit.tree["tasks.json"].data_stream.read())
+    assert committed[0]["name"] == "New task."
+
+
+def journal_lines(workspace: Path) -> list:
+    journal_path = workspace / "kanban.journal.jsonl"
+    return [json.loads(line) for line in journal_path.read_text().splitlines()]
+
+
+@pytest.fixture
+def journal(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("ABSORB_STORAGE_BACKEND", "journal")
+    (workspace / "kanban.json").write_text("[]")
+    return workspace
+
+
+def test_journal_appends_entries(journal: Path) -> None:
+    """Every mutation should append one entry, leaving the snapshot alone."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", ["a"]))
+    store.save()
+    store = storage.get_store("kanban")
+    store.update("#1", {"status": "completed"})
+    store.delete("#1")
+    store.save()
+    assert [entry["op"] for entry in journal_lines(journal)] == [
+        "add",
+        "update",
+        "delete",
+    ]
+    assert (journal / "kanban.json").read_text() == "[]"
+    assert storage.get_store("kanban").all() == []
+
+
+def test_journal_ids_stay_stable(journal: Path) -> None:
+    """Deleted IDs should never be reused, even after compaction."""
+    store = storage.get_store("kanban")
+    store.add(card("First", "doing", []))
+    store.add(card("Second", "doing", []))
+    store.delete("#2")
+    store.save()
+    assert store.compact()
+
+    store = storage.get_store("kanban")
+    assert [record["id"] for record in store.all()] == ["#1"]
+    assert store.add(card("Third", "doing", []))["id"] == "#3"
+
+
+def test_journal_compaction(journal: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The journal should be folded into the snapshot once it grows past
+    journal_max_entries."""
+    monkeypatch.setenv("ABSORB_JOURNAL_MAX_ENTRIES", "2")
+    store = storage.get_store("kanban")
+    for name in ("First", "Second", "Third"):
+        store.add(card(name, "doing", []))
+        store.save()
+    snapshot = json.loads((journal / "kanban.json").read_text())
+    assert [record["name"] for record in snapshot] == ["First", "Second", "Third"]
+    assert [entry["op"] for entry in journal_lines(journal)] == ["meta"]
+
+
+def test_compact_command(
+    journal: Path, runner: CliRunner, caplog: pytest.LogCaptureFixture
+) -> None:
+    """The compact command should fold the journals and commit them, and skip
+    the stores which were never used."""
+    runner.invoke(kanban, ["add", "New card.", "doing", ".", "@new"])
+    result = runner.invoke(compact)
+    assert result.exit_code == 0
+    assert "kanban has been compacted" in result.output
+    assert "ideas: nothing to compact." in result.output
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]
+    snapshot = json.loads((journal / "kanban.json").read_text())
+    assert snapshot[0]["name"] == "New card."
+    result = runner.invoke(compact)
+    assert "kanban: nothing to compact." in result.output
+
+
+# Adds tasks from a separate process: python -c WRITER <name> <count>
+WRITER = """
+import sys
+from click.testing import CliRunner
+from absorb.core.tasks.commands import tasks
+
+runner = CliRunner()
+for number in range(int(sys.argv[2])):
+    result = runner.invoke(tasks, ["add", f"{sys.argv[1]}-{number}", ".", "low", "@stress"])
+    assert result.exit_code == 0, result.output
+"""
+
+
+# Compacts the stores from a separate process: python -c COMPACTOR <count>
+COMPACTOR = """
+import sys
+from click.testing import CliRunner
+from absorb.core.compact.commands import compact
+
+runner = CliRunner()
+for _ in range(int(sys.argv[1])):
+    result = runner.invoke(compact)
+    assert result.exit_code == 0, result.output
+"""
+
+
+def run_writers(
+    workspace: Path, writers: int, count: int, compactions: int = 0
+) -> None:
+    env = dict(os.environ, ABSORB_HOME=str(workspace))
+    commands = [
+        [sys.executable, "-c", WRITER, f"writer{number}", str(count)]
+        for number in range(writers)
+    ]
+    if compactions:
+        commands.append([sys.executable, "-c", COMPACTOR, str(compactions)])
+    # Runs the test's own scripts in fresh interpreters.
+    processes = [
+        subprocess.Popen(  # noqa: S603
+            command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        for command in commands
+    ]
+    for process in processes:
+        output, _ = process.communicate(timeout=120)
+        assert process.returncode == 0, output.decode()
+
+
+def test_concurrent_writers(backend: str, workspace: Path) -> None:
+    """Writers running in parallel shouldn't lose each other's changes."""
+    os.environ["ABSORB_COMMIT_STRATEGY"] = "off"
+    try:
+        run_writers(workspace, writers=4, count=15)
+    finally:
+        del os.environ["ABSORB_COMMIT_STRATEGY"]
+
+    store = storage.get_store("tasks")
+    records = store.all()
+    assert len(records) == 60
+    assert len({record["id"] for record in records}) == 60
+    assert {record["name"] for record in records} == {
+        f"writer{writer}-{number}" for writer in range(4) for number in range(15)
+    }
+
+
+def test_concurrent_compaction(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Compacting the journal while writers append to it shouldn't lose their
+    entries."""
+    monkeypatch.setenv("ABSORB_STORAGE_BACKEND", "journal")
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "off")
+    (workspace / "tasks.json").write_text("[]")
+    run_writers(workspace, writers=3, count=15, compactions=30)
+
+    records = storage.get_store("tasks").all()
+    assert len(records) == 45
+    assert len({record["id"] for record in records}) == 45
+
+
+def test_concurrent_commits(workspace: Path) -> None:
+    """Writers committing in parallel should each get their commit."""
+    (workspace / "tasks.json").write_text("[]")
+    run_writers(workspace, writers=3, count=5)
+
+    repo = git_utils.get_repo()
+    assert len(list(repo.iter_commits())) == 15
+    committed = json.loads(repo.head.commit.tree["tasks.json"].data_stream.read())
+    assert len(committed) == 15
+
+
+def test_models_round_trip() -> None:
+    """Models should convert to the same records they were built from, and
+    parse dates once."""
+    task = {
+        "id": "#1",
+        "name": "Task",
+        "date": "2030-01-01T10:00:00.000000",
+        "due_date": "2030-01-02T10:00:00.000000",
+        "priority": "low",
+        "group": ["a"],
+    }
+    model = storage.Task.from_record(task)
+    assert model.to_record() == task
+    assert model.due is model.due
+    assert (model.due - model.added).days == 1
+
+    stored_card = {"id": "#2", **card("First", "doing", ["a"])}
+    assert storage.Card.from_record(stored_card).to_record() == stored_card
+    assert list(storage.Idea("Idea", ".", []).to_record()) == [
+        "name",
+        "description",
+        "tags",
+    ]
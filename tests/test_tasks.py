@@ -1,4 +1,5 @@
 import click.testing
+import json
 import pytest
 import os
 from pathlib import Path
@@ -10,6 +11,7 @@ from absorb.core.tasks.commands import (
     load_json,
 )
 from absorb.config.paths import ROOT_PATH
+from absorb.utils import git_utils, tasks_utils
 
 
 @pytest.fixture
@@ -300,3 +302,172 @@ def test_task_delete_FileNotFoundError(
     assert result.exit_code == 0
     os.remove(ROOT_PATH / "tasks.json")
     os.rename(ROOT_PATH / "_tasks.json", ROOT_PATH / "tasks.json")
+
+
+# Read paths shouldn't open the git repository
+def test_task_show_does_not_open_repo(runner: CliRunner) -> None:
+    """Showing tasks should never open the git repository."""
+    git_utils._repo = None
+    runner.invoke(tasks, ["show"])
+    runner.invoke(tasks, ["show-group", "@relax"])
+    assert git_utils._repo is None
+
+
+# Tests for import
+def test_parse_date_strict() -> None:
+    """An invalid date string should raise in strict mode."""
+    with pytest.raises(ValueError):
+        parse_date("tomorrow", strict=True)
+    with pytest.raises(ValueError):
+        parse_date("+", strict=True)
+
+
+def test_task_import_csv(runner: CliRunner, workspace: Path) -> None:
+    """Importing a CSV file should add the valid rows in a single commit and
+    skip the malformed ones."""
+    (workspace / "tasks.json").write_text("[]")
+    source = workspace / "tasks.csv"
+    source.write_text(
+        "name,due_date,priority,group\n"
+        "First,+1d,high,@work @home\n"
+        "Second,tomorrow,low,\n"
+        ",+2d,low,\n"
+        "Third,2030-01-01 10:00:00.000000,low,work\n"
+    )
+    result = runner.invoke(tasks, ["import", str(source)])
+    assert result.exit_code == 0
+    assert "Imported 2 tasks" in result.output
+    assert "2 rejected" in result.output
+
+    imported = json.loads((workspace / "tasks.json").read_text())
+    assert [task["name"] for task in imported] == ["First", "Third"]
+    assert imported[0]["group"] == ["work", "home"]
+    assert imported[1]["due_date"] == "2030-01-01T10:00:00.000000"
+    assert len(list(git_utils.get_repo().iter_commits())) == 1
+
+
+def test_task_import_jsonl_stdin(runner: CliRunner, workspace: Path) -> None:
+    """Importing JSON Lines from the standard input should create the store if
+    needed and skip lines which aren't valid JSON or have fields of the wrong
+    type."""
+    rows = [
+        '{"name": "First", "due_date": ".", "priority": "low"}',
+        "{not json",
+        '{"name": "Second", "due_date": "+1h", "priority": "low", "group": ["a"]}',
+        '{"name": "Third", "due_date": ".", "priority": "low", "date": 5}',
+    ]
+    result = runner.invoke(tasks, ["import"], input="\n".join(rows) + "\n")
+    assert result.exit_code == 0
+    assert "Line 2 rejected" in result.output
+    assert "Line 4 rejected" in result.output
+
+    imported = json.loads((workspace / "tasks.json").read_text())
+    assert [task["id"] for task in imported] == ["#1", "#2"]
+
+
+# Tests for filters
+def test_task_bulk_edit_and_delete(runner: CliRunner, workspace: Path) -> None:
+    """Editing and deleting with filters should act on every matching task in
+    a single commit."""
+    (workspace / "tasks.json").write_text("[]")
+    rows = [
+        '{"name": "First", "due_date": "+1d", "priority": "low", "group": "@work"}',
+        '{"name": "Second", "due_date": "+5d", "priority": "low", "group": "@work"}',
+        '{"name": "Third", "due_date": "+1d", "priority": "low", "group": "@home"}',
+    ]
+    runner.invoke(tasks, ["import"], input="\n".join(rows) + "\n")
+    repo = git_utils.get_repo()
+
+    result = runner.invoke(
+        tasks, ["edit", ".", ".", ".", "high", ".", "--group", "@work"]
+    )
+    assert result.exit_code == 0
+    assert "2 tasks have been modified" in result.output
+    edited = json.loads((workspace / "tasks.json").read_text())
+    assert [task["priority"] for task in edited] == ["high", "high", "low"]
+    assert len(list(repo.iter_commits())) == 2
+
+    result = runner.invoke(tasks, ["delete", "--due-before", "+2d", "--dry-run"])
+    assert "2 tasks match: #1, #3" in result.output
+    assert len(json.loads((workspace / "tasks.json").read_text())) == 3
+
+    result = runner.invoke(tasks, ["delete", "--due-before", "+2d"])
+    assert result.exit_code == 0
+    remaining = json.loads((workspace / "tasks.json").read_text())
+    assert [task["id"] for task in remaining] == ["#2"]
+    assert len(list(repo.iter_commits())) == 3
+
+
+def test_task_filters_need_dot_id(runner: CliRunner, workspace: Path) -> None:
+    """Filters should only be accepted with the ID ".", and the ID "." only
+    with filters."""
+    result = runner.invoke(tasks, ["delete", "#1", "--group", "@work"])
+    assert result.exit_code == 2
+    result = runner.invoke(tasks, ["delete"])
+    assert result.exit_code == 2
+    result = runner.invoke(tasks, ["delete", "--due-before", "soon"])
+    assert result.exit_code == 2
+
+
+def test_task_show_page(runner: CliRunner, workspace: Path) -> None:
+    """The show command should only render the requested page of tasks."""
+    (workspace / "tasks.json").write_text("[]")
+    rows = [
+        f'{{"name": "{name}", "due_date": "+1d", "priority": "low"}}'
+        for name in ("First", "Second", "Third")
+    ]
+    runner.invoke(tasks, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(tasks, ["show", "--limit", "1", "--offset", "1"])
+    assert result.exit_code == 0
+    assert "Second" in result.output
+    assert "First" not in result.output and "Third" not in result.output
+
+    result = runner.invoke(tasks, ["show", "--limit", "2", "--page", "2"])
+    assert "Third" in result.output and "Second" not in result.output
+
+
+def test_due_displays() -> None:
+    """Due dates should be described relative to the same current time."""
+    now = datetime(2030, 1, 10, 12)
+    due_dates = [datetime(2030, 1, 10, 18), datetime(2030, 1, 7), now + timedelta(3)]
+    assert tasks_utils.due_displays(due_dates, now) == [
+        "Due today.",
+        "4 days overdue.",
+        "3 days to due date.",
+    ]
+
+
+def test_task_show_formats(runner: CliRunner, workspace: Path) -> None:
+    """Machine-readable formats should output the chosen fields, computed
+    ones included, and read back through `import`."""
+    (workspace / "tasks.json").write_text("[]")
+    rows = [
+        '{"name": "First", "due_date": "+1d", "priority": "low", "group": "@a @b"}',
+        '{"name": "Second", "due_date": "2000-01-01 10:00:00.000000", '
+        '"priority": "high"}',
+    ]
+    runner.invoke(tasks, ["import"], input="\n".join(rows) + "\n")
+
+    result = runner.invoke(tasks, ["show", "--format", "ndjson"])
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert [record["name"] for record in records] == ["First", "Second"]
+    assert 0 < records[0]["due_in_seconds"] <= 86400
+    assert records[0]["group"] == ["a", "b"] and "overdue" not in records[0]
+
+    result = runner.invoke(
+        tasks, ["show", "--format", "json", "--fields", "id,overdue", "--offset", "1"]
+    )
+    assert json.loads(result.output) == [{"id": "#2", "overdue": True}]
+
+    result = runner.invoke(tasks, ["show-group", "a", "--format", "csv"])
+    lines = result.output.splitlines()
+    assert lines[0] == "id,name,date,due_date,priority,group,due_in_seconds"
+    assert len(lines) == 2 and ",a b," in lines[1]
+    imported = runner.invoke(tasks, ["import", "--format", "csv"], input=result.output)
+    assert imported.exit_code == 0
+    assert len(json.loads((workspace / "tasks.json").read_text())) == 3
+
+    result = runner.invoke(tasks, ["show", "--format", "csv", "--fields", "nope"])
+    assert result.exit_code == 2 and "Unknown field nope" in result.output
@@ -0,0 +1,305 @@
+import gzip
+import io
+import logging
+import logging.handlers
+import os
+import pytest
+import stat
+import time
+from pathlib import Path
+from click.testing import CliRunner
+from rich.console import Console
+from absorb.main import cli
+from absorb.utils import (
+    description_utils,
+    git_utils,
+    log_utils,
+    render_utils,
+    store_utils,
+)
+
+
+def commit_count(workspace: Path) -> int:
+    repo = git_utils.get_repo()
+    if not repo.head.is_valid():
+        return 0
+    return len(list(repo.iter_commits()))
+
+
+def change_file(workspace: Path, content: str) -> Path:
+    file_path = workspace / "tasks.json"
+    file_path.write_text(content)
+    return file_path
+
+
+def test_get_logger_is_shared() -> None:
+    """The logger should be built once and shared across command groups."""
+    logger = log_utils.get_logger()
+    handlers = list(logger.handlers)
+    assert log_utils.get_logger() is logger
+    assert logger.handlers == handlers
+    assert any(
+        isinstance(handler, logging.handlers.QueueHandler) for handler in handlers
+    )
+
+
+def test_log_file_rotation(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The log file should only be created by the first record, and be
+    rotated into compressed files."""
+    monkeypatch.setenv("ABSORB_LOG_MAX_BYTES", "200")
+    monkeypatch.setenv("ABSORB_LOG_BACKUP_COUNT", "2")
+    handler = log_utils.file_handler()
+    assert not (workspace / "logs").exists()
+
+    for number in range(10):
+        handler.emit(
+            logging.LogRecord(
+                "absorb", logging.ERROR, "", 0, f"{number:080}", None, None
+            )
+        )
+    handler.close()
+
+    rotated = sorted((workspace / "logs").glob("absorb-logs.log.*.gz"))
+    assert [path.name for path in rotated] == [
+        "absorb-logs.log.1.gz",
+        "absorb-logs.log.2.gz",
+    ]
+    assert f"{7:080}".encode() in gzip.decompress(rotated[0].read_bytes())
+
+
+# store_utils
+def test_write_json_unchanged(workspace: Path) -> None:
+    """Writing the same content twice should only write the file once."""
+    file_path = workspace / "tasks.json"
+    assert store_utils.write_json(file_path, [{"id": "#1"}])
+    assert not store_utils.write_json(file_path, [{"id": "#1"}])
+    assert store_utils.write_json(file_path, [])
+
+
+def test_write_json_atomic(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A write interrupted before the rename should leave the old content and
+    no temporary file behind."""
+    file_path = workspace / "tasks.json"
+    store_utils.write_json(file_path, [{"id": "#1"}])
+
+    def interrupted(*args: str) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(store_utils.os, "fsync", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        store_utils.write_json(file_path, [])
+    assert file_path.read_text() == '[{"id": "#1"}]'
+    assert [path.name for path in workspace.iterdir()] == ["tasks.json"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_write_json_keeps_mode(workspace: Path) -> None:
+    """Rewriting a file should keep its permissions, and a new file should get
+    the default ones under the umask."""
+    file_path = workspace / "tasks.json"
+    umask = os.umask(0o022)
+    try:
+        store_utils.write_json(file_path, [])
+        assert stat.S_IMODE(file_path.stat().st_mode) == 0o644
+        file_path.chmod(0o640)
+        store_utils.write_json(file_path, [{"id": "#1"}])
+        assert stat.S_IMODE(file_path.stat().st_mode) == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_create_json_keeps_existing(workspace: Path) -> None:
+    """Creating a file which already exists should leave it untouched."""
+    file_path = workspace / "tasks.json"
+    assert store_utils.create_json(file_path, [{"id": "#1"}])
+    assert not store_utils.create_json(file_path, [])
+    assert file_path.read_text() == '[{"id": "#1"}]'
+    assert [path.name for path in workspace.iterdir()] == ["tasks.json"]
+
+
+# git_utils
+def test_commit_unchanged(workspace: Path) -> None:
+    """Committing files which haven't changed shouldn't create a commit."""
+    file_path = change_file(workspace, "[]")
+    assert git_utils.commit([file_path], "First")
+    assert not git_utils.commit([file_path], "Second")
+    assert commit_count(workspace) == 1
+
+
+def test_record_per_op(workspace: Path) -> None:
+    """The per-op strategy should commit every change."""
+    for content in ("[1]", "[2]"):
+        git_utils.record([change_file(workspace, content)], content)
+    assert commit_count(workspace) == 2
+
+
+def test_record_batch(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The batch strategy should commit once the batch size is reached."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "batch")
+    monkeypatch.setenv("ABSORB_COMMIT_BATCH_SIZE", "3")
+    for content in ("[1]", "[2]"):
+        git_utils.record([change_file(workspace, content)], content)
+    assert commit_count(workspace) == 0
+    git_utils.record([change_file(workspace, "[3]")], "[3]")
+    assert commit_count(workspace) == 1
+    assert git_utils.get_repo().head.commit.message.startswith("Batched 3 changes.")
+    assert git_utils.read_pending()["changes"] == []
+
+
+def test_record_batch_interval(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The batch strategy should commit once the oldest change is too old."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "batch")
+    monkeypatch.setenv("ABSORB_COMMIT_BATCH_INTERVAL", "0")
+    git_utils.record([change_file(workspace, "[1]")], "[1]")
+    assert commit_count(workspace) == 1
+
+
+def test_flush_overdue(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Any command should commit a pending batch once it is overdue."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "batch")
+    git_utils.record([change_file(workspace, "[1]")], "[1]")
+    assert not git_utils.flush_overdue()
+    assert commit_count(workspace) == 0
+
+    monkeypatch.setenv("ABSORB_COMMIT_BATCH_INTERVAL", "0")
+    assert CliRunner().invoke(cli, ["plugins"]).exit_code == 0
+    assert commit_count(workspace) == 1
+    assert not (workspace / ".state" / git_utils.PENDING_FILE).exists()
+
+
+def test_record_on_exit(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The on-exit strategy should commit every change once."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "on-exit")
+    for content in ("[1]", "[2]", "[3]"):
+        git_utils.record([change_file(workspace, content)], content)
+    assert git_utils._repo is None
+    git_utils.flush_exit_changes()
+    assert commit_count(workspace) == 1
+
+
+def test_record_off(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The off strategy should never open the repository."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "off")
+    git_utils.record([change_file(workspace, "[1]")], "[1]")
+    assert git_utils._repo is None
+
+
+def test_record_async(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The async strategy should queue snapshots and commit them in order,
+    even if the file has changed since."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "async")
+    monkeypatch.setattr(git_utils, "spawn_worker", lambda: None)
+    for content in ("[1]", "[2]"):
+        git_utils.record([change_file(workspace, content)], content)
+    change_file(workspace, "[3]")
+    assert git_utils._repo is None
+    assert len(git_utils.read_queue()) == 2
+
+    assert git_utils.drain_queue()
+    repo = git_utils.get_repo()
+    history = [
+        (c.message, c.tree["tasks.json"].data_stream.read().decode())
+        for c in repo.iter_commits()
+    ]
+    assert history == [("[2]", "[2]"), ("[1]", "[1]")]
+    assert git_utils.read_queue() == []
+    assert (workspace / "tasks.json").read_text() == "[3]"
+
+
+def test_drain_queue_failure(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A failed commit should stay queued and be recorded in the status."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "async")
+    monkeypatch.setattr(git_utils, "spawn_worker", lambda: None)
+    git_utils.record([change_file(workspace, "[1]")], "[1]")
+
+    def fail(entry: dict) -> bool:
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(git_utils, "commit_snapshot", fail)
+    assert not git_utils.drain_queue()
+    assert len(git_utils.read_queue()) == 1
+    assert "disk full" in git_utils.read_status()["failure"]["error"]
+
+
+def test_spawn_worker(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The background worker should drain the queue on its own."""
+    monkeypatch.setenv("ABSORB_COMMIT_STRATEGY", "async")
+    git_utils.record([change_file(workspace, "[1]")], "[1]")
+    deadline = time.time() + 30
+    while git_utils.read_queue() and time.time() < deadline:
+        time.sleep(0.1)
+    assert git_utils.read_queue() == []
+    assert commit_count(workspace) == 1
+
+
+def test_window() -> None:
+    """Windows should slice the records by offset and limit, or by page."""
+    assert list(render_utils.window(range(10), limit=3, offset=2)) == [2, 3, 4]
+    assert list(render_utils.window(range(10), limit=3, page=2)) == [3, 4, 5]
+    assert list(render_utils.window(range(10), offset=8)) == [8, 9]
+    page = list(render_utils.window(range(120), page=2))
+    assert page == list(range(render_utils.PAGE_SIZE, 2 * render_utils.PAGE_SIZE))
+
+
+def test_stream_table_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Tables larger than a chunk should be printed chunk by chunk, with the
+    header once, the rows in order and wider cells wrapped."""
+    output = io.StringIO()
+    monkeypatch.setattr(render_utils, "console", Console(file=output, width=80))
+    rows = ((f"#{index}", "x" * index) for index in range(1, 6))
+    render_utils.stream_table(("ID", "Name"), rows, chunk_size=2)
+
+    printed = output.getvalue()
+    assert printed.count("ID") == 1
+    positions = [printed.index(f"#{index} ") for index in range(1, 6)]
+    assert positions == sorted(positions)
+    assert printed.count("x") == 15
+
+
+def test_read_text_previews(tmp_path: Path) -> None:
+    """Previews read through a memory map should match the ones read line by
+    line."""
+    description_file = tmp_path / "notes.md"
+    description_file.write_text("".join(f"line {n}\n" for n in range(10)))
+    size = description_file.stat().st_size
+
+    for lines in (1, 3, 10, 20):
+        expected = description_utils.read_text(description_file, size, lines)
+        assert description_utils.read_head(description_file, lines) == expected
+    assert description_utils.read_text(description_file, size, 3).endswith("line 2\n…")
+    assert description_utils.read_text(description_file, size) == (
+        description_file.read_text()
+    )
+
+
+def test_description_cache_bounded(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The description cache should skip long texts and evict the least
+    recently used entries beyond its size."""
+    monkeypatch.setattr(description_utils, "MAX_CACHED_LENGTH", 10)
+    monkeypatch.setattr(description_utils, "MAX_CACHE_SIZE", 20)
+    names = ["a", "b", "c"]
+    for name in names:
+        (workspace / name).write_text(name * 8)
+    (workspace / "long").write_text("x" * 11)
+    descriptions = [os.fspath(workspace / name) for name in names]
+
+    cache = description_utils.DescriptionCache()
+    cache.resolve(descriptions[:2] + [os.fspath(workspace / "long")], 2)
+    assert [key.split(":", 1)[1] for key in cache.entries] == descriptions[:2]
+    cache.save()
+
+    cache = description_utils.DescriptionCache()
+    cache.load()
+    cache.resolve(descriptions[:2], 2)
+    assert not cache.changed
+    cache.resolve(descriptions[:1], 2)
+    cache.resolve(descriptions[2:], 2)
+    assert [key.split(":", 1)[1] for key in cache.entries] == [
+        descriptions[0],
+        descriptions[2],
+    ]
+    assert cache.size == 16 and cache.changed